@@ -0,0 +1,882 @@
+import asyncio
+import logging
+import math
+import os
+import random
+import resource
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlencode
+
+from asgiref.sync import async_to_sync
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.handlers.asgi import ASGIHandler
+from django.db import (
+    DatabaseError,
+    close_old_connections,
+    connection,
+    connections,
+    transaction,
+)
+from django.test.utils import override_settings
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, reverse
+from rest_framework.renderers import JSONRenderer
+
+from dev.db import configure_pooling
+
+from .counts import refresh_counts
+from .fastpath import author_rows, book_rows
+from .models import Author, Book
+from .prefetch import apply_plan
+from .renderers import FastJSONRenderer
+from .serializers import AuthorSerializer, BookSerializer
+from .throttling import THROTTLE_CACHE
+
+logger = logging.getLogger(__name__)
+
+BookAuthors = Book.authors.through
+
+# Эндпоинты, которые удаляют данные: выполняются один раз в самом конце
+DESTRUCTIVE: Tuple[str, ...] = ("author-delete-all", "book-delete-all")
+
+# Статус выборки, в которой запрос завершился ошибкой БД
+DATABASE_ERROR_STATUS: int = 500
+
+# Дешевые эндпоинты, где заметна цена установки подключения к БД
+RETRIEVE_SCENARIOS: Tuple[str, ...] = ("author-detail", "book-detail")
+
+# Эндпоинты для сравнения пропускной способности под WSGI и ASGI
+INTERFACE_SCENARIOS: Tuple[str, ...] = RETRIEVE_SCENARIOS + (
+    "author-list-create",
+    "book-list-create",
+)
+
+# Кэш ответов отключен, чтобы каждый запрос шел в БД
+NO_RESPONSE_CACHE: Dict[str, Any] = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "responses": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"},
+    "generations": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    THROTTLE_CACHE: {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+}
+
+# Без ограничения частоты и допуска к тяжелым url: прогон идет с одного адреса
+NO_LOAD_SHEDDING: Dict[str, Any] = {
+    "THROTTLE_ENABLED": False,
+    "HEAVY_VIEW_CONCURRENCY": 0,
+}
+
+# Тяжелые эндпоинты, которые в замере перегрузки запрашивают нарушители
+ABUSE_SCENARIOS: Tuple[str, ...] = (
+    "author-list-create",
+    "author-filter-countbook",
+    "book-filter-countbook",
+)
+
+# Окружение gunicorn для замера старта: before - как до профиля для
+# продакшена (DEBUG, админка, без preload и прогрева), after - dev/production.py
+STARTUP_PROFILES: Dict[str, Dict[str, str]] = {
+    "before": {
+        "DEBUG": "1",
+        "ADMIN_ENABLED": "1",
+        "API_DOCS_ENABLED": "1",
+        "GUNICORN_PRELOAD": "0",
+        "GUNICORN_WARM_UP": "0",
+    },
+    "after": {
+        "DEBUG": "0",
+        "ADMIN_ENABLED": "0",
+        "API_DOCS_ENABLED": "1",
+        "GUNICORN_PRELOAD": "1",
+        "GUNICORN_WARM_UP": "1",
+    },
+}
+
+
+def parse_fanout(spec: str) -> Callable[[random.Random], int]:
+    """Метод для разбора распределения числа авторов у книги
+
+    Форматы: ``fixed:K``, ``uniform:A-B``, ``poisson:L``, ``zipf:S[:MAX]``.
+    """
+    kind, _, args = spec.partition(":")
+    if kind == "fixed":
+        k: int = int(args)
+        return lambda rnd: k
+    if kind == "uniform":
+        low, high = (int(part) for part in args.split("-"))
+        return lambda rnd: rnd.randint(low, high)
+    if kind == "poisson":
+        lam: float = float(args)
+
+        def poisson(rnd: random.Random) -> int:
+            # Алгоритм Кнута, для небольших L этого достаточно
+            limit, k, p = math.exp(-lam), 0, 1.0
+            while True:
+                p *= rnd.random()
+                if p <= limit:
+                    return k
+                k += 1
+
+        return poisson
+    if kind == "zipf":
+        parts: List[str] = args.split(":")
+        shape: float = float(parts[0])
+        maximum: int = int(parts[1]) if len(parts) > 1 else 50
+        return lambda rnd: min(maximum, int(rnd.paretovariate(shape)))
+    raise ValueError(f"Неизвестное распределение: {spec}")
+
+
+def generate_catalog(
+    authors: int,
+    books: int,
+    fanout: str = "uniform:1-3",
+    seed: int = 0,
+    batch_size: int = 5000,
+) -> Dict[str, int]:
+    """Метод для генерации синтетического каталога пакетными вставками"""
+    rnd: random.Random = random.Random(seed)
+    draw: Callable[[random.Random], int] = parse_fanout(fanout)
+    run: str = uuid.UUID(int=rnd.getrandbits(128)).hex[:8]
+
+    author_ids: List[uuid.UUID] = [
+        uuid.UUID(int=rnd.getrandbits(128)) for _ in range(authors)
+    ]
+    Author.objects.bulk_create(
+        (Author(id=pk, name=f"Author {run}-{i}") for i, pk in enumerate(author_ids)),
+        batch_size=batch_size,
+    )
+
+    links: int = 0
+    for start in range(0, books, batch_size):
+        chunk: List[Book] = [
+            Book(id=uuid.UUID(int=rnd.getrandbits(128)), title=f"Book {run}-{i}")
+            for i in range(start, min(start + batch_size, books))
+        ]
+        Book.objects.bulk_create(chunk)
+        rows: List[Any] = []
+        for book in chunk:
+            count: int = min(draw(rnd), len(author_ids))
+            rows.extend(
+                BookAuthors(book_id=book.pk, author_id=author_id)
+                for author_id in rnd.sample(author_ids, count)
+            )
+        BookAuthors.objects.bulk_create(rows, batch_size=batch_size)
+        links += len(rows)
+
+    refresh_counts(
+        author_ids=Author.objects.values_list("pk", flat=True),
+        book_ids=Book.objects.values_list("pk", flat=True),
+    )
+    return {"authors": authors, "books": books, "links": links}
+
+
+@dataclass
+class Scenario:
+    """Описание нагрузки на один эндпоинт"""
+
+    name: str
+    method: str
+    path: str
+    params: Dict[str, Any] = field(default_factory=dict)
+    body: Any = None
+
+
+def build_scenarios(patterns: List[URLPattern]) -> List[Scenario]:
+    """Метод для построения сценариев по всем url из books/urls.py"""
+    author = Author.objects.filter(book_count__gt=0).first() or Author.objects.first()
+    book = Book.objects.filter(author_count__gt=0).first() or Book.objects.first()
+    params: Dict[str, Dict[str, Any]] = {
+        "author-filter-name": {"name": author.name if author else ""},
+        "book-filter-name": {"title": book.title if book else ""},
+        "author-batch": {"ids": author.pk if author else ""},
+        "book-batch": {"ids": book.pk if book else ""},
+    }
+    bodies: Dict[str, Any] = {
+        "author-bulk": (
+            [{"name": author.name, "books": [str(book.pk)]}] if author and book else []
+        ),
+        "book-bulk": [{"title": book.title}] if book else [],
+    }
+
+    scenarios: List[Scenario] = []
+    destructive: List[Scenario] = []
+    for pattern in patterns:
+        name: Optional[str] = pattern.name
+        if name is None:
+            continue
+        kwargs: Dict[str, Any] = {}
+        if "pk" in pattern.pattern.converters:
+            obj: Any = author if "author" in name else book
+            if obj is None:
+                continue
+            kwargs["pk"] = obj.pk
+        if name in bodies:
+            method: str = "post"
+        elif name in DESTRUCTIVE:
+            method = "delete"
+        else:
+            method = "get"
+        scenario = Scenario(
+            name,
+            method,
+            reverse(name, kwargs=kwargs),
+            params.get(name, {}),
+            bodies.get(name),
+        )
+        (destructive if name in DESTRUCTIVE else scenarios).append(scenario)
+    return scenarios + destructive
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Метод для вычисления перцентиля методом ближайшего ранга"""
+    ordered: List[float] = sorted(values)
+    index: int = max(0, math.ceil(q / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+def _run_requests(
+    scenario: Scenario,
+    count: int,
+    own_thread: bool = False,
+    close_connections: bool = False,
+) -> List[Tuple[float, int, int, int]]:
+    """Метод для выполнения запросов в одном потоке: (секунды, запросы к БД, статус, байты)
+
+    Тестовый клиент отключает close_old_connections, с close_connections
+    он вызывается до и после запроса, как в обработчике WSGI/ASGI. Ошибка БД
+    (например, блокировка таблицы SQLite) не прерывает прогон, а попадает в
+    выборку со статусом DATABASE_ERROR_STATUS.
+    """
+    client: Client = Client()
+    samples: List[Tuple[float, int, int, int]] = []
+    try:
+        for _ in range(count):
+            with CaptureQueriesContext(connection) as queries:
+                started: float = time.perf_counter()
+                if close_connections:
+                    close_old_connections()
+                try:
+                    if scenario.method == "get":
+                        response = client.get(scenario.path, scenario.params)
+                    else:
+                        response = getattr(client, scenario.method)(
+                            scenario.path,
+                            scenario.body,
+                            content_type="application/json",
+                        )
+                    status: int = response.status_code
+                    content: bytes = (
+                        b"".join(response.streaming_content)
+                        if response.streaming
+                        else response.content
+                    )
+                except DatabaseError as e:
+                    logger.warning("%s: ошибка БД: %s", scenario.name, e)
+                    status, content = DATABASE_ERROR_STATUS, b""
+                if close_connections:
+                    close_old_connections()
+                elapsed: float = time.perf_counter() - started
+            samples.append((elapsed, len(queries), status, len(content)))
+    finally:
+        if own_thread:
+            # У каждого потока свое подключение, закрываем его вместе с потоком
+            connections.close_all()
+    return samples
+
+
+def run_scenario(
+    scenario: Scenario,
+    requests: int,
+    concurrency: int,
+    close_connections: bool = False,
+) -> Dict[str, Any]:
+    """Метод для прогона одного сценария конкурентными клиентами
+
+    Запросы на запись идут в один поток: параллельные пакетные записи на
+    SQLite упираются в блокировку таблицы и меряют ее, а не эндпоинт.
+    """
+    if scenario.name in DESTRUCTIVE:
+        requests, concurrency = 1, 1
+    elif scenario.method != "get":
+        concurrency = 1
+    started: float = time.perf_counter()
+    if concurrency <= 1:
+        samples = _run_requests(scenario, requests, close_connections=close_connections)
+    else:
+        shares: List[int] = [
+            requests // concurrency + (1 if i < requests % concurrency else 0)
+            for i in range(concurrency)
+        ]
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            samples = [
+                sample
+                for part in pool.map(
+                    lambda n: _run_requests(scenario, n, True, close_connections),
+                    shares,
+                )
+                for sample in part
+            ]
+    wall: float = time.perf_counter() - started
+    return _summarize(scenario, samples, wall)
+
+
+def _summarize(
+    scenario: Scenario, samples: List[Tuple[float, int, int, int]], wall: float
+) -> Dict[str, Any]:
+    """Метод для сводки по выборкам (секунды, запросы к БД, статус, байты)"""
+    latencies: List[float] = [sample[0] * 1000 for sample in samples]
+    return {
+        "method": scenario.method.upper(),
+        "path": scenario.path,
+        "requests": len(samples),
+        "errors": sum(1 for sample in samples if sample[2] >= 400),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "mean_ms": round(sum(latencies) / len(latencies), 3),
+        "throughput_rps": round(len(samples) / wall, 1) if wall else None,
+        "queries_per_request": round(sum(s[1] for s in samples) / len(samples), 2),
+        "response_bytes": round(sum(s[3] for s in samples) / len(samples)),
+    }
+
+
+def peak_rss_kb() -> int:
+    """Метод для получения пикового RSS процесса в КБ (Linux)"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def run_benchmark(
+    patterns: List[URLPattern],
+    requests: int = 200,
+    concurrency: int = 8,
+    only: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """Метод для прогона всех сценариев на текущей базе данных"""
+    results: Dict[str, Any] = {}
+    for scenario in build_scenarios(patterns):
+        if only and scenario.name not in only:
+            continue
+        results[scenario.name] = run_scenario(scenario, requests, concurrency)
+    return {"endpoints": results, "peak_rss_kb": peak_rss_kb()}
+
+
+def _cpu_ms(func: Callable[[], Any], repeat: int) -> float:
+    """Метод для замера процессорного времени: лучший из repeat прогонов, мс"""
+    best: float = float("inf")
+    for _ in range(repeat):
+        started: float = time.process_time()
+        func()
+        best = min(best, time.process_time() - started)
+    return round(best * 1000, 3)
+
+
+def measure_read_paths(rows: int = 1000, repeat: int = 5) -> Dict[str, Any]:
+    """Метод для сравнения процессорного времени на страницу из rows строк
+
+    serializer - выборка с prefetch, сериализаторы DRF и JSONRenderer;
+    fast - values(), агрегированные связи (books/fastpath.py) и orjson.
+    """
+    results: Dict[str, Any] = {}
+    for name, model, serializer_class, fields, fast_rows in (
+        ("books", Book, BookSerializer, ("id", "title"), book_rows),
+        ("authors", Author, AuthorSerializer, ("id", "name"), author_rows),
+    ):
+        queryset = model.objects.order_by("pk")
+
+        def serializer_path() -> bytes:
+            page = apply_plan(queryset, serializer_class)[:rows]
+            return JSONRenderer().render(serializer_class(page, many=True).data)
+
+        def fast_path() -> bytes:
+            page = list(queryset.values(*fields)[:rows])
+            return FastJSONRenderer().render(fast_rows(page, queryset.db))
+
+        serializer_ms: float = _cpu_ms(serializer_path, repeat)
+        fast_ms: float = _cpu_ms(fast_path, repeat)
+        results[name] = {
+            "rows": min(rows, queryset.count()),
+            "serializer_cpu_ms": serializer_ms,
+            "fast_cpu_ms": fast_ms,
+            "speedup": round(serializer_ms / fast_ms, 1) if fast_ms else None,
+        }
+    return results
+
+
+def measure_connection_modes(
+    patterns: List[URLPattern], requests: int = 200
+) -> Dict[str, Any]:
+    """Метод для сравнения задержки retrieve-эндпоинтов в режимах none и persistent
+
+    Запросы идут последовательно в текущем потоке без кэша ответов и с
+    close_old_connections, режим переключается в settings_dict подключения
+    (dev/db.py). Режим pool замеряется обычным прогоном с DB_POOL_MODE=pool.
+    Для SQLite в памяти Django не закрывает подключение, и режимы совпадают.
+    """
+    scenarios: List[Scenario] = [
+        scenario
+        for scenario in build_scenarios(patterns)
+        if scenario.name in RETRIEVE_SCENARIOS
+    ]
+    original: Dict[str, Any] = dict(connection.settings_dict)
+    results: Dict[str, Any] = {}
+    try:
+        with override_settings(CACHES=NO_RESPONSE_CACHE):
+            for mode in ("none", "persistent"):
+                connection.close()
+                connection.settings_dict.update(configure_pooling(original, mode))
+                results[mode] = {
+                    scenario.name: run_scenario(scenario, requests, 1, True)
+                    for scenario in scenarios
+                }
+    finally:
+        connection.close()
+        connection.settings_dict.clear()
+        connection.settings_dict.update(original)
+
+    for name, stats in results["persistent"].items():
+        before: float = results["none"][name]["mean_ms"]
+        stats["saved_ms"] = round(before - stats["mean_ms"], 3)
+    return results
+
+
+async def _asgi_request(
+    handler: ASGIHandler, scenario: Scenario
+) -> Tuple[float, int, int, int]:
+    """Метод для GET-запроса через обработчик ASGI, как его вызывает uvicorn
+
+    Возвращает выборку как _run_requests; запросы к БД идут в потоках
+    sync_to_async и не считаются (0).
+    """
+    scope: Dict[str, Any] = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": scenario.path,
+        "raw_path": scenario.path.encode(),
+        "query_string": urlencode(scenario.params, doseq=True).encode(),
+        "root_path": "",
+        "headers": [(b"host", b"testserver")],
+        "client": ("127.0.0.1", 0),
+        "server": ("testserver", 80),
+    }
+    messages: List[Dict[str, Any]] = [
+        {"type": "http.request", "body": b"", "more_body": False}
+    ]
+    disconnected: asyncio.Event = asyncio.Event()
+    status: List[int] = []
+    size: List[int] = []
+
+    async def receive() -> Dict[str, Any]:
+        if messages:
+            return messages.pop()
+        # Клиент не отключается до конца ответа
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: Dict[str, Any]) -> None:
+        if message["type"] == "http.response.start":
+            status.append(message["status"])
+        elif message["type"] == "http.response.body":
+            size.append(len(message.get("body", b"")))
+
+    started: float = time.perf_counter()
+    await handler(scope, receive, send)
+    elapsed: float = time.perf_counter() - started
+    disconnected.set()
+    return elapsed, 0, status[0], sum(size)
+
+
+async def _run_asgi(
+    scenario: Scenario, requests: int, concurrency: int
+) -> Dict[str, Any]:
+    """Метод для прогона сценария через обработчик ASGI с concurrency запросами сразу"""
+    handler: ASGIHandler = ASGIHandler()
+    limit: asyncio.Semaphore = asyncio.Semaphore(concurrency)
+
+    async def one() -> Tuple[float, int, int, int]:
+        async with limit:
+            return await _asgi_request(handler, scenario)
+
+    started: float = time.perf_counter()
+    samples: List[Tuple[float, int, int, int]] = list(
+        await asyncio.gather(*(one() for _ in range(requests)))
+    )
+    return _summarize(scenario, samples, time.perf_counter() - started)
+
+
+def _save_authors(ids: List[Any], own_thread: bool = False) -> List[float]:
+    """Метод для сохранения авторов по одному в своей транзакции, секунды на запись
+
+    Запись, завершившаяся ошибкой БД, учитывается как NaN.
+    """
+    samples: List[float] = []
+    try:
+        for pk in ids:
+            started: float = time.perf_counter()
+            try:
+                with transaction.atomic():
+                    Author.objects.get(pk=pk).save()
+                samples.append(time.perf_counter() - started)
+            except DatabaseError as e:
+                logger.warning("concurrent-writes: ошибка БД: %s", e)
+                samples.append(math.nan)
+    finally:
+        if own_thread:
+            connections.close_all()
+    return samples
+
+
+def measure_concurrent_writes(
+    writes: int = 200, concurrency: int = 8
+) -> Dict[str, Any]:
+    """Метод для сравнения пропускной способности записи в 1 и concurrency потоков
+
+    Каждый поток сохраняет своих авторов (без общих строк каталога), поэтому
+    потоки конкурируют только за строку счетчика номеров изменений
+    (next_change_seq). scaling около 1 означает, что записи идут по очереди.
+    На SQLite запись сериализует сама база.
+    """
+    ids: List[Any] = list(Author.objects.order_by("pk").values_list("pk", flat=True))
+    if not ids:
+        return {}
+    results: Dict[str, Any] = {}
+    for threads in (1, concurrency):
+        own: List[List[Any]] = [ids[n::threads] or ids for n in range(threads)]
+        work: List[List[Any]] = [
+            [part[i % len(part)] for i in range(writes // threads)] for part in own
+        ]
+        started: float = time.perf_counter()
+        if threads == 1:
+            samples: List[float] = _save_authors(work[0])
+        else:
+            with ThreadPoolExecutor(max_workers=threads) as pool:
+                samples = [
+                    sample
+                    for part in pool.map(lambda part: _save_authors(part, True), work)
+                    for sample in part
+                ]
+        wall: float = time.perf_counter() - started
+        latencies: List[float] = [s * 1000 for s in samples if not math.isnan(s)]
+        results["serial" if threads == 1 else "concurrent"] = {
+            "threads": threads,
+            "writes": len(samples),
+            "errors": len(samples) - len(latencies),
+            "p50_ms": round(percentile(latencies, 50), 3) if latencies else None,
+            "p99_ms": round(percentile(latencies, 99), 3) if latencies else None,
+            "throughput_rps": round(len(latencies) / wall, 1) if wall else None,
+        }
+    serial: Optional[float] = results["serial"]["throughput_rps"]
+    parallel: Optional[float] = results["concurrent"]["throughput_rps"]
+    results["scaling"] = round(parallel / serial, 2) if serial and parallel else None
+    return results
+
+
+def measure_interfaces(
+    patterns: List[URLPattern], requests: int = 200, concurrency: int = 8
+) -> Dict[str, Any]:
+    """Метод для сравнения одних и тех же представлений под WSGI и ASGI
+
+    WSGI - concurrency потоков с тестовым клиентом (как gthread-воркер),
+    ASGI - concurrency одновременных запросов в обработчик dev/asgi.py в
+    одном цикле событий (как uvicorn-воркер). Кэш ответов отключен.
+    """
+    scenarios: List[Scenario] = [
+        scenario
+        for scenario in build_scenarios(patterns)
+        if scenario.name in INTERFACE_SCENARIOS
+    ]
+    results: Dict[str, Dict[str, Any]] = {"wsgi": {}, "asgi": {}}
+    with override_settings(CACHES=NO_RESPONSE_CACHE):
+        for scenario in scenarios:
+            results["wsgi"][scenario.name] = run_scenario(
+                scenario, requests, concurrency, True
+            )
+            results["asgi"][scenario.name] = async_to_sync(_run_asgi)(
+                scenario, requests, concurrency
+            )
+    return results
+
+
+def _abuse(
+    scenarios: List[Scenario],
+    address: str,
+    stop: threading.Event,
+    ready: threading.Semaphore,
+) -> Dict[int, int]:
+    """Метод для запросов клиента-нарушителя до события stop: {статус: число}
+
+    Запросы идут без пауз, после 429/503 клиент ждет Retry-After, как
+    HTTP-клиенты с повтором. После первого круга по scenarios отпускает
+    ready: замер начинается, когда нагрузка уже создана.
+    """
+    client: Client = Client(REMOTE_ADDR=address)
+    statuses: Dict[int, int] = defaultdict(int)
+    try:
+        while not stop.is_set():
+            for scenario in scenarios:
+                response = client.get(scenario.path, scenario.params)
+                statuses[response.status_code] += 1
+                if response.has_header("Retry-After"):
+                    stop.wait(float(response["Retry-After"]))
+            if sum(statuses.values()) == len(scenarios):
+                ready.release()
+    finally:
+        connections.close_all()
+    return statuses
+
+
+def _measure_under_abuse(
+    cheap: Scenario,
+    heavy: List[Scenario],
+    requests: int,
+    clients: int,
+    overrides: Dict[str, Any],
+) -> Dict[str, Any]:
+    """Метод для прогона cheap, пока clients нарушителей запрашивают heavy"""
+    statuses: Dict[int, int] = defaultdict(int)
+    with override_settings(CACHES=NO_RESPONSE_CACHE, **overrides):
+        caches[THROTTLE_CACHE].clear()
+        stop, ready = threading.Event(), threading.Semaphore(0)
+        with ThreadPoolExecutor(max_workers=max(clients, 1)) as pool:
+            futures: List[Future] = [
+                pool.submit(_abuse, heavy, f"10.0.0.{i + 1}", stop, ready)
+                for i in range(clients)
+            ]
+            try:
+                for _ in futures:
+                    ready.acquire(timeout=30)
+                stats: Dict[str, Any] = run_scenario(cheap, requests, 1)
+            finally:
+                stop.set()
+            for future in futures:
+                for code, count in future.result().items():
+                    statuses[code] += count
+    stats["abuser_statuses"] = {
+        str(code): count for code, count in sorted(statuses.items())
+    }
+    return stats
+
+
+def measure_load_shedding(
+    patterns: List[URLPattern], requests: int = 200, abusers: int = 8
+) -> Dict[str, Any]:
+    """Метод для замера задержки дешевого эндпоинта при перегрузке тяжелыми
+
+    Один клиент последовательно запрашивает author-detail, пока abusers
+    клиентов с других адресов запрашивают ABUSE_SCENARIOS (см. _abuse). Режимы:
+    baseline - без нарушителей, unprotected - без ограничений, protected - с
+    настройками THROTTLE_* и HEAVY_VIEW_CONCURRENCY (books/throttling.py).
+    """
+    scenarios: List[Scenario] = build_scenarios(patterns)
+    cheap: Scenario = next(s for s in scenarios if s.name == "author-detail")
+    heavy: List[Scenario] = [s for s in scenarios if s.name in ABUSE_SCENARIOS]
+    results: Dict[str, Any] = {}
+    # Иначе каждый отказ 429/503 пишется в журнал django.request
+    logger: logging.Logger = logging.getLogger("django.request")
+    disabled: bool = logger.disabled
+    logger.disabled = True
+    try:
+        for mode, clients, overrides in (
+            ("baseline", 0, NO_LOAD_SHEDDING),
+            ("unprotected", abusers, NO_LOAD_SHEDDING),
+            ("protected", abusers, {}),
+        ):
+            results[mode] = _measure_under_abuse(
+                cheap, heavy, requests, clients, overrides
+            )
+    finally:
+        logger.disabled = disabled
+    return results
+
+
+def process_memory_kb(pid: int) -> Dict[str, Optional[int]]:
+    """Метод для получения RSS и PSS процесса в КБ из /proc (Linux)
+
+    PSS делит общие с другими процессами страницы поровну между ними, поэтому
+    показывает, сколько памяти на самом деле добавляет каждый воркер.
+    """
+    memory: Dict[str, Optional[int]] = {"rss_kb": None, "pss_kb": None}
+    for name, key, field_name in (
+        ("status", "rss_kb", "VmRSS:"),
+        ("smaps_rollup", "pss_kb", "Pss:"),
+    ):
+        try:
+            with open(f"/proc/{pid}/{name}", encoding="ascii") as f:
+                for line in f:
+                    if line.startswith(field_name):
+                        memory[key] = int(line.split()[1])
+                        break
+        except OSError:
+            pass
+    return memory
+
+
+def child_pids(pid: int) -> List[int]:
+    """Метод для получения дочерних процессов (воркеров gunicorn) из /proc"""
+    children: List[int] = []
+    try:
+        entries: List[str] = os.listdir("/proc")
+    except OSError:
+        return children
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", encoding="ascii") as f:
+                # Имя процесса в скобках может содержать пробелы
+                ppid: int = int(f.read().rpartition(")")[2].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        if ppid == pid:
+            children.append(int(entry))
+    return sorted(children)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _get(url: str) -> Tuple[Optional[int], float]:
+    """Метод для GET-запроса: (статус или None без ответа, задержка в мс)"""
+    started: float = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=10) as response:
+            response.read()
+            code: Optional[int] = response.status
+    except urllib.error.HTTPError as e:
+        code = e.code
+    except OSError:
+        code = None
+    return code, (time.perf_counter() - started) * 1000
+
+
+def measure_server_start(
+    environ: Dict[str, str],
+    workers: int = 2,
+    path: str = "/api/authors/",
+    requests: int = 50,
+    timeout: float = 60,
+) -> Dict[str, Any]:
+    """Метод для замера старта gunicorn (gunicorn.conf.py) с окружением environ
+
+    time_to_first_request_ms - от запуска процесса до первого ответа 200 на
+    path, first_request_ms - задержка этого запроса. После еще requests
+    запросов и старта всех воркеров снимается память мастера и воркеров.
+    """
+    port: int = _free_port()
+    url: str = f"http://127.0.0.1:{port}{path}"
+    env: Dict[str, str] = {
+        **os.environ,
+        **environ,
+        "GUNICORN_BIND": f"127.0.0.1:{port}",
+        "WEB_CONCURRENCY": str(workers),
+    }
+    started: float = time.perf_counter()
+    server: subprocess.Popen = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py"],
+        cwd=settings.BASE_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while True:
+            code, first_ms = _get(url)
+            if code == 200:
+                break
+            if server.poll() is not None:
+                raise RuntimeError(f"gunicorn завершился с кодом {server.returncode}")
+            if time.perf_counter() - started > timeout:
+                raise RuntimeError(f"{url} не ответил 200 за {timeout} с")
+            time.sleep(0.01)
+        ready_ms: float = (time.perf_counter() - started) * 1000
+
+        latencies: List[float] = [_get(url)[1] for _ in range(requests)]
+        deadline: float = time.perf_counter() + timeout
+        while len(child_pids(server.pid)) < workers and time.perf_counter() < deadline:
+            time.sleep(0.05)
+        memory: List[Dict[str, Optional[int]]] = [
+            process_memory_kb(pid) for pid in child_pids(server.pid)
+        ]
+        master: Dict[str, Optional[int]] = process_memory_kb(server.pid)
+    finally:
+        server.send_signal(signal.SIGTERM)
+        try:
+            server.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            server.kill()
+            server.wait()
+
+    def mean(key: str) -> Optional[int]:
+        values: List[int] = [m[key] for m in memory if m[key] is not None]
+        return round(sum(values) / len(values)) if values else None
+
+    return {
+        "time_to_first_request_ms": round(ready_ms, 1),
+        "first_request_ms": round(first_ms, 3),
+        "p50_ms": round(percentile(latencies, 50), 3) if latencies else None,
+        "workers": len(memory),
+        "master_rss_kb": master["rss_kb"],
+        "worker_rss_kb": mean("rss_kb"),
+        "worker_pss_kb": mean("pss_kb"),
+    }
+
+
+def measure_startup(
+    settings_modules: Dict[str, str],
+    workers: int = 2,
+    path: str = "/api/authors/",
+    requests: int = 50,
+) -> Dict[str, Any]:
+    """Метод для сравнения старта воркеров в профилях STARTUP_PROFILES
+
+    settings_modules - {профиль: DJANGO_SETTINGS_MODULE}. Серверы работают с
+    БД из настроек профиля, в ней должны быть применены миграции.
+    """
+    return {
+        name: measure_server_start(
+            {**STARTUP_PROFILES[name], "DJANGO_SETTINGS_MODULE": module},
+            workers,
+            path,
+            requests,
+        )
+        for name, module in settings_modules.items()
+    }
+
+
+def compare(
+    baseline: Dict[str, Any], current: Dict[str, Any], metrics: Tuple[str, ...]
+) -> List[Tuple[str, str, Any, Any, Optional[float]]]:
+    """Метод для сравнения двух прогонов: (эндпоинт, метрика, было, стало, изменение %)"""
+    rows: List[Tuple[str, str, Any, Any, Optional[float]]] = []
+    for name, stats in current["endpoints"].items():
+        old: Optional[Dict[str, Any]] = baseline.get("endpoints", {}).get(name)
+        if old is None:
+            continue
+        for metric in metrics:
+            before, after = old.get(metric), stats.get(metric)
+            change: Optional[float] = (
+                round((after - before) / before * 100, 1)
+                if before and after is not None
+                else None
+            )
+            rows.append((name, metric, before, after, change))
+    return rows
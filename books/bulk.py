@@ -0,0 +1,271 @@
+import uuid
+from typing import Any, Callable, Dict, Iterable, List, Set, Type
+
+from django.db import DatabaseError, models, transaction
+from rest_framework import serializers
+
+from .cache import bump_on_commit
+from .changes import next_change_seq, touch
+from .counts import refresh_counts
+from .models import Author, Book
+
+BULK_BATCH_SIZE: int = 1000
+
+BookAuthors: Type[models.Model] = Book.authors.through
+
+
+def _replace_links(
+    owner_field: str,
+    target_field: str,
+    links: Dict[uuid.UUID, Iterable[uuid.UUID]],
+    seq: int,
+) -> None:
+    """Метод для замены связей в таблице books_authors пакетными запросами
+
+    seq - номер изменения, взятый транзакцией до записи строк.
+    """
+    if not links:
+        return
+    old_rows = BookAuthors.objects.filter(**{f"{owner_field}__in": list(links)})
+    touched: Set[uuid.UUID] = set(old_rows.values_list(target_field, flat=True))
+    old_rows.delete()
+    BookAuthors.objects.bulk_create(
+        [
+            BookAuthors(**{owner_field: owner_id, target_field: target_id})
+            for owner_id, targets in links.items()
+            for target_id in set(targets)
+        ],
+        ignore_conflicts=True,
+    )
+    touched.update(target_id for targets in links.values() for target_id in targets)
+    # Пакетная запись связей обходит m2m_changed, счетчики пересчитываются явно
+    if owner_field == "author_id":
+        refresh_counts(author_ids=links, book_ids=touched)
+        touch(author_ids=links, book_ids=touched, seq=seq)
+    else:
+        refresh_counts(author_ids=touched, book_ids=links)
+        touch(author_ids=touched, book_ids=links, seq=seq)
+
+
+def set_links(
+    owner: models.Model, targets: Iterable[Any], adding: bool = False
+) -> None:
+    """Метод для замены связей объекта по разнице с текущими
+
+    Текущие связи выбираются одним запросом, лишние удаляются одним DELETE,
+    новые добавляются одним INSERT; m2m_changed не отправляется, поэтому
+    счетчики, номера изменений и кэш ответов обновляются явно. targets -
+    объекты или id, adding=True - объект только что создан и связей нет.
+    """
+    if isinstance(owner, Author):
+        owner_field, target_field, relation = "author_id", "book_id", "books"
+    else:
+        owner_field, target_field, relation = "book_id", "author_id", "authors"
+    wanted: Set[Any] = {getattr(target, "pk", target) for target in targets}
+    with transaction.atomic():
+        rows = BookAuthors.objects.filter(**{owner_field: owner.pk})
+        current: Set[Any] = (
+            set() if adding else set(rows.values_list(target_field, flat=True))
+        )
+        removed: Set[Any] = current - wanted
+        added: Set[Any] = wanted - current
+        if not removed and not added:
+            return
+        # Номер изменения берется до блокировки строк связей и счетчиков
+        seq: int = next_change_seq()
+        if removed:
+            rows.filter(**{f"{target_field}__in": removed}).delete()
+        if added:
+            BookAuthors.objects.bulk_create(
+                [
+                    BookAuthors(**{owner_field: owner.pk, target_field: target})
+                    for target in added
+                ],
+                ignore_conflicts=True,
+            )
+        changed: Set[Any] = removed | added
+        if owner_field == "author_id":
+            refresh_counts(author_ids=[owner.pk], book_ids=changed)
+            touch(author_ids=[owner.pk], book_ids=changed, seq=seq)
+        else:
+            refresh_counts(author_ids=changed, book_ids=[owner.pk])
+            touch(author_ids=changed, book_ids=[owner.pk], seq=seq)
+        bump_on_commit("author", "book")
+    getattr(owner, "_prefetched_objects_cache", {}).pop(relation, None)
+
+
+def upsert_authors(rows: List[Dict[str, Any]]) -> Dict[str, uuid.UUID]:
+    """Метод для пакетного создания/обновления авторов по уникальному имени"""
+    for row in rows:
+        row["name"] = row["name"].strip()
+    names: List[str] = [row["name"] for row in rows]
+    seq: int = next_change_seq()
+    Author.objects.bulk_create(
+        [Author(name=name) for name in names],
+        update_conflicts=True,
+        unique_fields=["name"],
+        update_fields=["name"],
+    )
+    ids: Dict[str, uuid.UUID] = dict(
+        Author.objects.filter(name__in=names).values_list("name", "id")
+    )
+    touch(author_ids=ids.values(), seq=seq)
+    _replace_links(
+        "author_id",
+        "book_id",
+        {ids[row["name"]]: row["books"] for row in rows if "books" in row},
+        seq,
+    )
+    # bulk_create и пакетные связи не отправляют сигналы моделей
+    bump_on_commit("author", "book")
+    return ids
+
+
+def upsert_books(rows: List[Dict[str, Any]]) -> Dict[str, uuid.UUID]:
+    """Метод для пакетного создания/обновления книг по уникальному названию"""
+    for row in rows:
+        row["title"] = row["title"].strip()
+    titles: List[str] = [row["title"] for row in rows]
+    seq: int = next_change_seq()
+    Book.objects.bulk_create(
+        [Book(title=title) for title in titles],
+        update_conflicts=True,
+        unique_fields=["title"],
+        update_fields=["title"],
+    )
+    ids: Dict[str, uuid.UUID] = dict(
+        Book.objects.filter(title__in=titles).values_list("title", "id")
+    )
+    touch(book_ids=ids.values(), seq=seq)
+    _replace_links(
+        "book_id",
+        "author_id",
+        {ids[row["title"]]: row["authors"] for row in rows if "authors" in row},
+        seq,
+    )
+    bump_on_commit("author", "book")
+    return ids
+
+
+class BulkUpsert:
+    """Класс для пакетной загрузки с отчетом об ошибках по каждому элементу"""
+
+    def __init__(
+        self,
+        serializer_class: Type[serializers.Serializer],
+        key: str,
+        relation: str,
+        related_model: Type[models.Model],
+        upsert: Callable[[List[Dict[str, Any]]], Dict[str, uuid.UUID]],
+        batch_size: int = BULK_BATCH_SIZE,
+    ) -> None:
+        self.serializer_class = serializer_class
+        self.key = key
+        self.relation = relation
+        self.related_model = related_model
+        self.upsert = upsert
+        self.batch_size = batch_size
+
+    def run(self, items: List[Any]) -> Dict[str, List[Dict[str, Any]]]:
+        """Метод для загрузки всех элементов пакетами, каждый пакет в своей транзакции"""
+        results: List[Dict[str, Any]] = []
+        errors: List[Dict[str, Any]] = []
+        for start in range(0, len(items), self.batch_size):
+            batch: List[Any] = items[start : start + self.batch_size]
+            self._run_batch(start, batch, results, errors)
+        errors.sort(key=lambda error: error["index"])
+        return {"results": results, "errors": errors}
+
+    def _run_batch(
+        self,
+        offset: int,
+        batch: List[Any],
+        results: List[Dict[str, Any]],
+        errors: List[Dict[str, Any]],
+    ) -> None:
+        valid: Dict[int, Dict[str, Any]] = {}
+        for index, item in enumerate(batch, start=offset):
+            serializer = self.serializer_class(data=item)
+            if serializer.is_valid():
+                valid[index] = dict(serializer.validated_data)
+            else:
+                errors.append({"index": index, "errors": serializer.errors})
+
+        self._check_related(valid, errors)
+        self._check_duplicates(valid, errors)
+        if not valid:
+            return
+
+        try:
+            with transaction.atomic():
+                ids: Dict[str, uuid.UUID] = self.upsert(list(valid.values()))
+        except DatabaseError:
+            ids = self._run_items(valid, errors)
+
+        for index, row in valid.items():
+            results.append(
+                {"index": index, "id": ids[row[self.key]], self.key: row[self.key]}
+            )
+
+    def _run_items(
+        self, valid: Dict[int, Dict[str, Any]], errors: List[Dict[str, Any]]
+    ) -> Dict[str, uuid.UUID]:
+        """Метод для повтора упавшего пакета по одному элементу в точках сохранения
+
+        Ошибку БД получают только элементы, которые не удалось записать.
+        """
+        ids: Dict[str, uuid.UUID] = {}
+        with transaction.atomic():
+            for index, row in list(valid.items()):
+                try:
+                    with transaction.atomic():
+                        ids.update(self.upsert([row]))
+                except DatabaseError as e:
+                    del valid[index]
+                    errors.append({"index": index, "errors": str(e)})
+        return ids
+
+    def _check_related(
+        self, valid: Dict[int, Dict[str, Any]], errors: List[Dict[str, Any]]
+    ) -> None:
+        """Метод для проверки всех связанных id пакета одним запросом"""
+        wanted = {pk for row in valid.values() for pk in row.get(self.relation, [])}
+        if not wanted:
+            return
+        existing = set(
+            self.related_model.objects.filter(pk__in=wanted).values_list(
+                "pk", flat=True
+            )
+        )
+        for index, row in list(valid.items()):
+            missing: List[str] = [
+                str(pk) for pk in row.get(self.relation, []) if pk not in existing
+            ]
+            if missing:
+                del valid[index]
+                errors.append(
+                    {
+                        "index": index,
+                        "errors": {self.relation: [f"Не найдены объекты: {missing}"]},
+                    }
+                )
+
+    def _check_duplicates(
+        self, valid: Dict[int, Dict[str, Any]], errors: List[Dict[str, Any]]
+    ) -> None:
+        """Метод для отбрасывания повторов уникального поля внутри пакета"""
+        seen: Dict[str, int] = {}
+        for index, row in list(valid.items()):
+            value: str = row[self.key].strip()
+            if value in seen:
+                del valid[index]
+                errors.append(
+                    {
+                        "index": index,
+                        "errors": {
+                            self.key: [f"Повтор элемента с индексом {seen[value]}"]
+                        },
+                    }
+                )
+            else:
+                seen[value] = index
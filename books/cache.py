@@ -0,0 +1,162 @@
+import hashlib
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import BaseCache, caches
+from django.db import transaction
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
+from rest_framework.request import Request
+
+from .compression import cached_encoding, compress, mark_encoded
+from .routing import read_alias
+
+CACHE_ALIAS: str = "responses"
+# Поколения и время последней записи должны быть общими для всех воркеров
+GENERATION_CACHE_ALIAS: str = "generations"
+GENERATION_KEY: str = "books:generation:{}"
+BUMPED_KEY: str = "books:bumped"
+
+
+def response_cache() -> BaseCache:
+    """Метод для получения бэкенда кэша ответов"""
+    return caches[CACHE_ALIAS]
+
+
+def generation_cache() -> BaseCache:
+    """Метод для получения бэкенда кэша поколений моделей"""
+    return caches[GENERATION_CACHE_ALIAS]
+
+
+def response_cache_enabled() -> bool:
+    """Метод для проверки, что кэш ответов включен (RESPONSE_CACHE_ENABLED)"""
+    return getattr(settings, "RESPONSE_CACHE_ENABLED", True)
+
+
+def get_generations(labels: Iterable[str]) -> Dict[str, int]:
+    """Метод для получения текущих поколений моделей одним обращением к кэшу"""
+    cache: BaseCache = generation_cache()
+    keys: Dict[str, str] = {label: GENERATION_KEY.format(label) for label in labels}
+    values: Dict[str, Any] = cache.get_many(keys.values())
+    generations: Dict[str, int] = {}
+    for label, key in keys.items():
+        value: Optional[int] = values.get(key)
+        if value is None:
+            # Счетчик начинается со времени, чтобы после вытеснения не повторяться
+            cache.add(key, time.time_ns(), timeout=None)
+            value = cache.get(key)
+        generations[label] = value
+    return generations
+
+
+def bump_generations(*labels: str) -> None:
+    """Метод для увеличения поколений моделей, что делает старые ответы недоступными"""
+    cache: BaseCache = generation_cache()
+    for label in labels:
+        key: str = GENERATION_KEY.format(label)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), timeout=None)
+    cache.set(BUMPED_KEY, time.time(), timeout=None)
+
+
+def replica_may_lag() -> bool:
+    """Метод для проверки, что запрос читает с реплики, которая могла не получить последнюю запись
+
+    Задержка репликации считается не больше REPLICA_STICKY_SECONDS.
+    """
+    if read_alias() is None:
+        return False
+    bumped: Optional[float] = generation_cache().get(BUMPED_KEY)
+    window: float = float(getattr(settings, "REPLICA_STICKY_SECONDS", 5))
+    return bumped is not None and time.time() - bumped < window
+
+
+def bump_on_commit(*labels: str, using: Optional[str] = None) -> None:
+    """Метод для увеличения поколений после фиксации транзакции записи"""
+    transaction.on_commit(lambda: bump_generations(*labels), using=using)
+
+
+def response_cache_key(request: Request, labels: Iterable[str]) -> str:
+    """Метод для построения ключа ответа по URL, параметрам и поколениям моделей"""
+    generations: Dict[str, int] = get_generations(labels)
+    parts: Tuple[Any, ...] = (
+        request.path,
+        sorted(request.query_params.lists()),
+        request.accepted_media_type,
+        sorted(generations.items()),
+    )
+    return hashlib.md5(repr(parts).encode("utf-8")).hexdigest()
+
+
+class CachedResponseMixin:
+    """Миксин для кэширования GET-ответов с ETag и сбросом по поколениям моделей
+
+    Ответы можно хранить в памяти процесса: ключ включает поколения, и после
+    записи в любом воркере старые ответы не находятся, если поколения лежат в
+    общем кэше "generations".
+    """
+
+    cache_models: Tuple[str, ...] = ("author", "book")
+
+    def get(self, request: Request, *args: Any, **kwargs: Any) -> HttpResponse:
+        # Внутри транзакции могут быть видны незафиксированные записи
+        if not response_cache_enabled() or transaction.get_connection().in_atomic_block:
+            return super().get(request, *args, **kwargs)
+
+        cache: BaseCache = response_cache()
+        key: str = response_cache_key(request, self.cache_models)
+        etag: str = f'"{key}"'
+
+        # Сжатый ответ приходит со слабым ETag (W/"...")
+        if {etag, f"W/{etag}"} & set(
+            parse_etags(request.headers.get("If-None-Match", ""))
+        ):
+            response: HttpResponse = HttpResponseNotModified()
+            response["ETag"] = etag
+            return response
+
+        # Запись: (тело, Content-Type, {кодировка: сжатое тело})
+        cached: Optional[Tuple[bytes, str, Dict[str, bytes]]] = cache.get(key)
+        if cached is not None:
+            content, content_type = cached[:2]
+            variants: Dict[str, bytes] = cached[2] if len(cached) > 2 else {}
+            encoding: Optional[str] = cached_encoding(request, content, content_type)
+            if encoding is not None and encoding not in variants:
+                # Вариант сжимается один раз и хранится рядом с несжатым
+                variants = {**variants, encoding: compress(content, encoding)}
+                cache.set(key, (content, content_type, variants))
+            response = HttpResponse(
+                variants[encoding] if encoding else content, content_type=content_type
+            )
+            response["ETag"] = etag
+            response["X-Cache"] = "HIT"
+            if encoding:
+                mark_encoded(response, encoding)
+            return response
+
+        response = super().get(request, *args, **kwargs)
+        # Ответ с отстающей реплики не сохраняется под новым поколением
+        if response.status_code == 200 and not replica_may_lag():
+            response["ETag"] = etag
+            response["X-Cache"] = "MISS"
+            response.add_post_render_callback(
+                lambda rendered: self.store_response(request, cache, key, rendered)
+            )
+        return response
+
+    def store_response(
+        self, request: Request, cache: BaseCache, key: str, response: HttpResponse
+    ) -> None:
+        """Метод для сохранения ответа в кэш вместе со сжатым вариантом для клиента"""
+        content: bytes = response.content
+        content_type: str = response["Content-Type"]
+        variants: Dict[str, bytes] = {}
+        encoding: Optional[str] = cached_encoding(request, content, content_type)
+        if encoding is not None:
+            variants[encoding] = compress(content, encoding)
+            response.content = variants[encoding]
+            mark_encoded(response, encoding)
+        cache.set(key, (content, content_type, variants))
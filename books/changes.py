@@ -0,0 +1,257 @@
+import base64
+import uuid
+from datetime import timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Type, Union
+
+from django.db import DEFAULT_DB_ALIAS, connections, models, transaction
+from django.db.models import F, Max
+from django.db.models.functions import Greatest
+from django.db.models.query import QuerySet
+from django.utils import timezone
+
+from .fastpath import author_detail_rows, book_rows
+from .models import Author, Book, ChangeSequence, Tombstone
+
+CHANGES_PAGE_SIZE: int = 500
+MAX_CHANGES_PAGE_SIZE: int = 5000
+
+# Источники ленты: при равном номере изменения идут в этом порядке
+SOURCES: Tuple[Tuple[Type[models.Model], Tuple[str, ...]], ...] = (
+    (Author, ("id", "name", "change_seq", "updated_at")),
+    (Book, ("id", "title", "change_seq", "updated_at")),
+    (Tombstone, ("id", "model", "object_id", "change_seq", "deleted_at")),
+)
+
+# Позиция в ленте: (номер изменения, индекс источника, pk)
+Position = Tuple[int, int, Any]
+Ids = Union[Iterable[Any], QuerySet]
+
+
+def next_change_seq(using: str = DEFAULT_DB_ALIAS) -> int:
+    """Метод для получения следующего номера изменения
+
+    Строка счетчика остается заблокированной до конца транзакции, поэтому
+    транзакция с большим номером фиксируется позже транзакции с меньшим.
+    Транзакция записи берет номер до изменения строк каталога и передает его
+    в touch()/record_deletes(): иначе две транзакции блокируют строки и
+    счетчик в разном порядке и ждут друг друга.
+
+    Цена порядка - все транзакции записи каталога выполняются по очереди:
+    запись API ждет фиксации пакета импорта (IMPORT_BATCH_SIZE строк) или
+    bulk-запроса, взявших номер раньше. Масштабирование записи с числом
+    потоков показывает measure_concurrent_writes() в books/benchmark.py.
+    """
+    connection = connections[using]
+    sequence: QuerySet = ChangeSequence.objects.using(using)
+    with transaction.atomic(using=using, savepoint=False):
+        if connection.vendor == "postgresql" or (
+            connection.vendor == "sqlite"
+            and connection.features.can_return_rows_from_bulk_insert
+        ):
+            # Один запрос вместо UPDATE и SELECT
+            quote = connection.ops.quote_name
+            table: str = quote(ChangeSequence._meta.db_table)
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"UPDATE {table} SET {quote('value')} = {quote('value')} + 1 "
+                    f"WHERE {quote('id')} = 1 RETURNING {quote('value')}"
+                )
+                row: Optional[Tuple[int]] = cursor.fetchone()
+            if row is not None:
+                return row[0]
+        if not sequence.filter(pk=1).update(value=F("value") + 1):
+            sequence.get_or_create(pk=1)
+            sequence.filter(pk=1).update(value=F("value") + 1)
+        return sequence.values_list("value", flat=True).get(pk=1)
+
+
+def touch(
+    author_ids: Ids = (),
+    book_ids: Ids = (),
+    using: str = DEFAULT_DB_ALIAS,
+    seq: Optional[int] = None,
+) -> Optional[int]:
+    """Метод для отметки авторов и книг новым номером изменения и временем
+
+    Идентификаторы можно передать списком или подзапросом values_list("pk");
+    seq - уже полученный в этой транзакции номер.
+    """
+    targets: List[Tuple[Type[models.Model], Ids]] = []
+    for model, ids in ((Author, author_ids), (Book, book_ids)):
+        if not isinstance(ids, QuerySet):
+            ids = list(ids)
+            if not ids:
+                continue
+        targets.append((model, ids))
+    if not targets:
+        return None
+    with transaction.atomic(using=using, savepoint=False):
+        if seq is None:
+            seq = next_change_seq(using)
+        now = timezone.now()
+        for model, ids in targets:
+            model.objects.using(using).filter(pk__in=ids).update(
+                change_seq=seq, updated_at=now
+            )
+    return seq
+
+
+def record_deletes(
+    model: Type[models.Model],
+    ids: Optional[Iterable[Any]],
+    using: str = DEFAULT_DB_ALIAS,
+    seq: Optional[int] = None,
+) -> int:
+    """Метод для записи отметок об удалении, ids=None - удалены все объекты модели
+
+    seq - уже полученный в этой транзакции номер. Возвращает номер изменения
+    для отметки связанных объектов через touch().
+    """
+    label: str = model._meta.model_name
+    with transaction.atomic(using=using, savepoint=False):
+        if seq is None:
+            seq = next_change_seq(using)
+        Tombstone.objects.using(using).bulk_create(
+            [Tombstone(model=label, object_id=None, change_seq=seq)]
+            if ids is None
+            else [Tombstone(model=label, object_id=pk, change_seq=seq) for pk in ids]
+        )
+    return seq
+
+
+def pruned_seq(using: str = DEFAULT_DB_ALIAS) -> int:
+    """Метод для получения номера, до которого отметки об удалении очищены"""
+    return (
+        ChangeSequence.objects.using(using)
+        .filter(pk=1)
+        .values_list("pruned", flat=True)
+        .first()
+        or 0
+    )
+
+
+def prune_tombstones(days: int, using: str = DEFAULT_DB_ALIAS) -> int:
+    """Метод для удаления отметок об удалении старше days дней
+
+    Токены с номером меньше очищенного после этого недействительны: клиент
+    должен заново выполнить полную синхронизацию.
+    """
+    cutoff = timezone.now() - timedelta(days=days)
+    tombstones: QuerySet = Tombstone.objects.using(using)
+    with transaction.atomic(using=using):
+        last: Optional[int] = tombstones.filter(deleted_at__lt=cutoff).aggregate(
+            last=Max("change_seq")
+        )["last"]
+        if last is None:
+            return 0
+        deleted, _ = tombstones.filter(change_seq__lte=last).delete()
+        ChangeSequence.objects.using(using).filter(pk=1).update(
+            pruned=Greatest(F("pruned"), last)
+        )
+    return deleted
+
+
+def encode_token(position: Position, pruned: int) -> str:
+    """Метод для кодирования позиции в ленте в непрозрачный токен
+
+    В токен записывается номер очистки pruned_seq() на момент выдачи.
+    """
+    seq, source, pk = position
+    raw: bytes = f"{seq}:{source}:{pruned}:{pk}".encode("ascii")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_token(token: str) -> Tuple[Position, int]:
+    """Метод для разбора токена в (позиция, номер очистки), при ошибке - ValueError"""
+    try:
+        raw: str = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode(
+            "ascii"
+        )
+        seq, source, pruned, pk = raw.split(":", 3)
+        index: int = int(source)
+        if not 0 <= index < len(SOURCES):
+            raise ValueError(index)
+        key: Any = int(pk) if SOURCES[index][0] is Tombstone else uuid.UUID(pk)
+        return (int(seq), index, key), int(pruned)
+    except ValueError:
+        raise ValueError("Неверный токен ленты изменений")
+
+
+def token_expired(position: Position, token_pruned: int, pruned: int) -> bool:
+    """Метод для проверки, что после выдачи токена очищены нужные клиенту отметки
+
+    Отметки до номера очистки на момент выдачи клиенту не нужны: удаленные
+    объекты он не получал, т.к. начал синхронизацию уже после их удаления.
+    """
+    return pruned > token_pruned and position[0] < pruned
+
+
+def _after(queryset: QuerySet, index: int, position: Optional[Position]) -> QuerySet:
+    """Метод для отбора строк источника index строго после позиции position"""
+    if position is None:
+        return queryset
+    seq, source, pk = position
+    if index < source:
+        return queryset.filter(change_seq__gt=seq)
+    queryset = queryset.filter(change_seq__gte=seq)
+    if index == source:
+        # Диапазон по индексу (change_seq, id), исключается только начало группы
+        queryset = queryset.exclude(change_seq=seq, pk__lte=pk)
+    return queryset
+
+
+def read_changes(
+    position: Optional[Position],
+    limit: int = CHANGES_PAGE_SIZE,
+    using: str = DEFAULT_DB_ALIAS,
+) -> Tuple[List[Dict[str, Any]], Optional[Position], bool]:
+    """Метод для чтения ленты изменений после позиции position
+
+    Из каждого источника выбирается не больше limit + 1 строки по индексу
+    (change_seq, id), строки сливаются по (номер, источник, pk). Возвращает
+    изменения, позицию последнего из них и признак наличия следующих.
+    """
+    merged: List[Tuple[int, int, Any, Dict[str, Any]]] = []
+    for index, (model, fields) in enumerate(SOURCES):
+        queryset: QuerySet = _after(model.objects.using(using), index, position)
+        rows = queryset.order_by("change_seq", "pk").values(*fields)[: limit + 1]
+        merged.extend((row["change_seq"], index, row["id"], row) for row in rows)
+    merged.sort(key=lambda item: item[:3])
+    has_more: bool = len(merged) > limit
+    merged = merged[:limit]
+    if not merged:
+        return [], position, False
+
+    authors: List[Dict[str, Any]] = [row for _, index, _, row in merged if index == 0]
+    books: List[Dict[str, Any]] = [row for _, index, _, row in merged if index == 1]
+    data: Tuple[Dict[str, Dict[str, Any]], ...] = (
+        {item["id"]: item for item in author_detail_rows(authors, using)},
+        {item["id"]: item for item in book_rows(books, using)},
+    )
+
+    changes: List[Dict[str, Any]] = []
+    for seq, index, pk, row in merged:
+        if index == 2:
+            object_id: Optional[uuid.UUID] = row["object_id"]
+            changes.append(
+                {
+                    "seq": seq,
+                    "model": row["model"],
+                    "id": str(object_id) if object_id else None,
+                    "deleted": True,
+                    "updated_at": row["deleted_at"],
+                }
+            )
+            continue
+        changes.append(
+            {
+                "seq": seq,
+                "model": "author" if index == 0 else "book",
+                "id": str(pk),
+                "deleted": False,
+                "updated_at": row["updated_at"],
+                "data": data[index][str(pk)],
+            }
+        )
+    last: Tuple[int, int, Any, Dict[str, Any]] = merged[-1]
+    return changes, last[:3], has_more
@@ -0,0 +1,73 @@
+import uuid
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple, Type
+
+from django.db import models
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Author, Book
+
+BookAuthors: Type[models.Model] = Book.authors.through
+
+Link = Tuple[uuid.UUID, uuid.UUID]
+
+
+def _shift(model: Type[models.Model], field: str, counter: Counter, sign: int) -> None:
+    """Метод для сдвига счетчика, объекты с одинаковым сдвигом меняются одним UPDATE"""
+    groups: Dict[int, List[uuid.UUID]] = defaultdict(list)
+    for pk, amount in counter.items():
+        groups[amount].append(pk)
+    for amount, pks in groups.items():
+        model.objects.filter(pk__in=pks).update(**{field: F(field) + sign * amount})
+
+
+def adjust_counts(links: Iterable[Link], sign: int) -> None:
+    """Метод для изменения счетчиков на добавленные (+1) или удаленные (-1) связи"""
+    links = list(links)
+    if not links:
+        return
+    _shift(Author, "book_count", Counter(author_id for author_id, _ in links), sign)
+    _shift(Book, "author_count", Counter(book_id for _, book_id in links), sign)
+
+
+def existing_links(
+    author_ids: Optional[Iterable[uuid.UUID]] = None,
+    book_ids: Optional[Iterable[uuid.UUID]] = None,
+) -> List[Link]:
+    """Метод для получения существующих связей (author_id, book_id) по фильтру"""
+    queryset = BookAuthors.objects.all()
+    if author_ids is not None:
+        queryset = queryset.filter(author_id__in=list(author_ids))
+    if book_ids is not None:
+        queryset = queryset.filter(book_id__in=list(book_ids))
+    return list(queryset.values_list("author_id", "book_id"))
+
+
+def _count_subquery(field: str) -> Coalesce:
+    """Метод для подзапроса количества связей одного объекта"""
+    links = (
+        BookAuthors.objects.filter(**{field: OuterRef("pk")})
+        .values(field)
+        .annotate(total=Count("*"))
+        .values("total")
+    )
+    return Coalesce(Subquery(links, output_field=IntegerField()), 0)
+
+
+def refresh_counts(
+    author_ids: Optional[Iterable[uuid.UUID]] = None,
+    book_ids: Optional[Iterable[uuid.UUID]] = None,
+) -> None:
+    """Метод для точного пересчета счетчиков по таблице books_authors
+
+    Идентификаторы можно передать списком или подзапросом values_list("pk").
+    """
+    if author_ids is not None:
+        Author.objects.filter(pk__in=author_ids).update(
+            book_count=_count_subquery("author_id")
+        )
+    if book_ids is not None:
+        Book.objects.filter(pk__in=book_ids).update(
+            author_count=_count_subquery("book_id")
+        )
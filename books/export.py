@@ -0,0 +1,188 @@
+import gzip
+import json
+import os
+import uuid
+from itertools import islice
+from typing import (
+    Any,
+    AsyncIterator,
+    BinaryIO,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.db import connection, transaction
+from django.db.models.query import QuerySet
+from django.http import HttpRequest
+
+from .fastpath import author_detail_rows, book_rows
+from .models import Author, Book
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+EXPORT_CHUNK_SIZE: int = 2000
+
+# Сжатие файлов выгрузки и расширение для него; zstd требует пакет zstandard
+COMPRESSIONS: Dict[str, str] = {"none": "", "gzip": ".gz", "zstd": ".zst"}
+
+# Выгрузка графа: модель, колонки и сборка строк в формате API без вложенности
+SHARD_MODELS: Dict[str, Tuple[Any, Tuple[str, ...], Callable[..., List[Any]]]] = {
+    "authors": (Author, ("id", "name"), author_detail_rows),
+    "books": (Book, ("id", "title"), book_rows),
+}
+
+
+def book_row(book: Book) -> Dict[str, Any]:
+    """Метод для получения книги в формате BookSerializer"""
+    return {
+        "id": str(book.pk),
+        "title": book.title,
+        "authors": [str(author.pk) for author in book.authors.all()],
+    }
+
+
+def author_row(author: Author) -> Dict[str, Any]:
+    """Метод для получения автора в формате AuthorSerializer"""
+    books: List[Dict[str, Any]] = [book_row(book) for book in author.books.all()]
+    return {"id": str(author.pk), "name": author.name, "books": books}
+
+
+def author_detail_row(author: Author) -> Dict[str, Any]:
+    """Метод для получения автора в формате AuthorRetrieveSerializer"""
+    books: List[str] = [str(book.pk) for book in author.books.all()]
+    return {"id": str(author.pk), "name": author.name, "books": books}
+
+
+def iter_ndjson(
+    queryset: QuerySet,
+    row: Callable[[Any], Dict[str, Any]],
+    chunk_size: int = EXPORT_CHUNK_SIZE,
+) -> Iterator[bytes]:
+    """Метод для построчной выгрузки queryset в NDJSON через серверный курсор"""
+    for obj in queryset.iterator(chunk_size=chunk_size):
+        yield json.dumps(row(obj), ensure_ascii=False, separators=(",", ":")).encode(
+            "utf-8"
+        ) + b"\n"
+
+
+def _next_chunk(lines: Iterator[bytes], size: int) -> bytes:
+    return b"".join(islice(lines, size))
+
+
+async def aiter_ndjson(
+    queryset: QuerySet,
+    row: Callable[[Any], Dict[str, Any]],
+    chunk_size: int = EXPORT_CHUNK_SIZE,
+) -> AsyncIterator[bytes]:
+    """Метод для выгрузки NDJSON под ASGI
+
+    Синхронный итератор StreamingHttpResponse под ASGI читается в список
+    целиком до отправки первого байта, поэтому строки отдаются пачками по
+    chunk_size: каждая пачка собирается в потоке запроса (sync_to_async),
+    там же, где открыт серверный курсор.
+    """
+    lines: Iterator[bytes] = iter_ndjson(queryset, row, chunk_size)
+    try:
+        while True:
+            chunk: bytes = await sync_to_async(_next_chunk)(lines, chunk_size)
+            if not chunk:
+                return
+            yield chunk
+    finally:
+        await sync_to_async(lines.close)()
+
+
+def stream_ndjson(
+    request: HttpRequest,
+    queryset: QuerySet,
+    row: Callable[[Any], Dict[str, Any]],
+) -> Union[Iterator[bytes], AsyncIterator[bytes]]:
+    """Метод для выбора итератора выгрузки: асинхронный под ASGI, иначе обычный"""
+    if isinstance(getattr(request, "_request", request), ASGIRequest):
+        return aiter_ndjson(queryset, row, EXPORT_CHUNK_SIZE)
+    return iter_ndjson(queryset, row, EXPORT_CHUNK_SIZE)
+
+
+def uuid_ranges(count: int) -> List[Tuple[Optional[str], Optional[str]]]:
+    """Метод для деления пространства UUID на count равных диапазонов [от, до)
+
+    Первичные ключи случайные (uuid4), поэтому строки делятся примерно поровну.
+    """
+    step: int = (1 << 128) // count
+    bounds: List[Optional[str]] = [
+        str(uuid.UUID(int=i * step)) for i in range(1, count)
+    ]
+    return list(zip([None, *bounds], [*bounds, None]))
+
+
+def open_shard(path: str, compression: str) -> BinaryIO:
+    """Метод для открытия файла выгрузки на запись с заданным сжатием"""
+    if compression == "gzip":
+        return gzip.open(path, "wb", compresslevel=6)
+    if compression == "zstd":
+        import zstandard
+
+        return zstandard.ZstdCompressor().stream_writer(open(path, "wb"))
+    return open(path, "wb")
+
+
+def dumps_line(row: Dict[str, Any]) -> bytes:
+    """Метод для сериализации строки NDJSON"""
+    if orjson is not None:
+        return orjson.dumps(row) + b"\n"
+    return json.dumps(row, ensure_ascii=False, separators=(",", ":")).encode() + b"\n"
+
+
+def export_shard(task: Dict[str, Any]) -> Dict[str, Any]:
+    """Метод для выгрузки одного диапазона id одной модели в файл
+
+    Выполняется в процессе-воркере со своим подключением к БД. Диапазон
+    читается пачками по возрастанию id; если передан snapshot, чтение идет
+    в снимке PostgreSQL, общем для всех воркеров.
+    """
+    model, columns, build = SHARD_MODELS[task["model"]]
+    low, high = task["range"]
+    chunk_size: int = task.get("chunk_size", EXPORT_CHUNK_SIZE)
+    rows: int = 0
+    with transaction.atomic():
+        if task.get("snapshot"):
+            with connection.cursor() as cursor:
+                cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+                cursor.execute("SET TRANSACTION SNAPSHOT %s", [task["snapshot"]])
+        queryset: QuerySet = model.objects.order_by("pk").values(*columns)
+        if low is not None:
+            queryset = queryset.filter(pk__gte=low)
+        if high is not None:
+            queryset = queryset.filter(pk__lt=high)
+
+        with open_shard(task["path"], task["compression"]) as f:
+            last: Any = None
+            while True:
+                page: QuerySet = (
+                    queryset if last is None else queryset.filter(pk__gt=last)
+                )
+                chunk: List[Dict[str, Any]] = list(page[:chunk_size])
+                if not chunk:
+                    break
+                f.write(b"".join(map(dumps_line, build(chunk, queryset.db))))
+                rows += len(chunk)
+                last = chunk[-1]["id"]
+                if len(chunk) < chunk_size:
+                    break
+    return {
+        "model": task["model"],
+        "file": os.path.basename(task["path"]),
+        "range": [low, high],
+        "rows": rows,
+        "bytes": os.path.getsize(task["path"]),
+    }
@@ -0,0 +1,149 @@
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Type
+
+from django.conf import settings
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.db import connections, models
+from django.db.models.query import QuerySet
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from .models import Book
+from .prefetch import SPARSE_PARAMS
+
+BookAuthors: Type[models.Model] = Book.authors.through
+
+Row = Dict[str, Any]
+
+
+def _chunks(ids: List[Any], using: str) -> Iterator[List[Any]]:
+    """Метод для разбиения списка id на части по лимиту параметров запроса СУБД"""
+    step: int = connections[using].features.max_query_params or len(ids) or 1
+    for start in range(0, len(ids), step):
+        yield ids[start : start + step]
+
+
+def _group_links(
+    owner_field: str, other_field: str, owner_ids: List[Any], using: str
+) -> Dict[Any, List[str]]:
+    """Метод для получения id связанных объектов: {id владельца: [id]}
+
+    На PostgreSQL связи агрегируются в массив одним запросом (ArrayAgg), на
+    других СУБД выбираются парами частями по лимиту параметров.
+    """
+    links: QuerySet = BookAuthors.objects.using(using).order_by()
+    names: Dict[Any, str] = {}
+    grouped: Dict[Any, List[str]] = {}
+    if not owner_ids:
+        return grouped
+
+    if connections[using].vendor == "postgresql":
+        aggregated: QuerySet = (
+            links.filter(**{f"{owner_field}__in": owner_ids})
+            .values(owner_field)
+            .annotate(ids=ArrayAgg(other_field))
+            .values_list(owner_field, "ids")
+        )
+        for key, others in aggregated:
+            grouped[key] = [
+                names.get(pk) or names.setdefault(pk, str(pk)) for pk in others
+            ]
+        return grouped
+
+    for chunk in _chunks(owner_ids, using):
+        pairs: QuerySet = links.filter(**{f"{owner_field}__in": chunk}).values_list(
+            owner_field, other_field
+        )
+        for key, pk in pairs:
+            grouped.setdefault(key, []).append(
+                names.get(pk) or names.setdefault(pk, str(pk))
+            )
+    return grouped
+
+
+def book_rows(rows: List[Row], using: str) -> List[Row]:
+    """Метод для сборки списка книг в формате BookSerializer из строк values()"""
+    keys: List[Any] = [row["id"] for row in rows]
+    authors: Dict[Any, List[str]] = _group_links("book_id", "author_id", keys, using)
+    return [
+        {"id": str(row["id"]), "title": row["title"], "authors": authors.get(key, [])}
+        for key, row in zip(keys, rows)
+    ]
+
+
+def author_rows(rows: List[Row], using: str) -> List[Row]:
+    """Метод для сборки списка авторов в формате AuthorSerializer из строк values()
+
+    Книги с названиями выбираются одним запросом через таблицу связей, их
+    авторы - вторым, так что число запросов не зависит от размера страницы.
+    """
+    keys: List[Any] = [row["id"] for row in rows]
+    pairs: List[Tuple[Any, ...]] = []
+    for chunk in _chunks(keys, using):
+        pairs.extend(
+            BookAuthors.objects.using(using)
+            .order_by()
+            .filter(author_id__in=chunk)
+            .values_list("author_id", "book_id", "book__title")
+        )
+    book_ids: List[Any] = list({book_id for _, book_id, _ in pairs})
+    authors: Dict[Any, List[str]] = _group_links(
+        "book_id", "author_id", book_ids, using
+    )
+
+    book_cache: Dict[Any, Row] = {}
+    books: Dict[Any, List[Row]] = {}
+    for author_id, book_id, title in pairs:
+        book: Optional[Row] = book_cache.get(book_id)
+        if book is None:
+            book = book_cache[book_id] = {
+                "id": str(book_id),
+                "title": title,
+                "authors": authors.get(book_id, []),
+            }
+        books.setdefault(author_id, []).append(book)
+    return [
+        {"id": str(row["id"]), "name": row["name"], "books": books.get(key, [])}
+        for key, row in zip(keys, rows)
+    ]
+
+
+def author_detail_rows(rows: List[Row], using: str) -> List[Row]:
+    """Метод для сборки списка авторов в формате AuthorRetrieveSerializer из строк values()"""
+    keys: List[Any] = [row["id"] for row in rows]
+    books: Dict[Any, List[str]] = _group_links("author_id", "book_id", keys, using)
+    return [
+        {"id": str(row["id"]), "name": row["name"], "books": books.get(key, [])}
+        for key, row in zip(keys, rows)
+    ]
+
+
+class FastListMixin:
+    """Миксин для списков, собирающий ответ без сериализаторов DRF
+
+    Строки выбираются через values(), связи - агрегированным запросом к
+    таблице связей, а словари ответа строятся функцией fast_rows в том же
+    формате, что и сериализатор представления. При ?fields=/?expand= и при
+    FAST_READ_PATH = False используется обычный путь через сериализатор.
+    """
+
+    fast_fields: Tuple[str, ...]
+    fast_rows: Callable[[List[Row], str], List[Row]]
+
+    def use_fast_path(self, request: Request) -> bool:
+        if not getattr(settings, "FAST_READ_PATH", True):
+            return False
+        return not any(param in request.query_params for param in SPARSE_PARAMS)
+
+    def list(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        if not self.use_fast_path(request):
+            return super().list(request, *args, **kwargs)
+        queryset: QuerySet = (
+            self.filter_queryset(self.get_queryset())
+            .select_related(None)
+            .prefetch_related(None)
+            .values(*self.fast_fields)
+        )
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.fast_rows(page, queryset.db))
+        return Response(self.fast_rows(list(queryset), queryset.db))
@@ -0,0 +1,346 @@
+import logging
+import threading
+import uuid
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Type
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, models
+from django.db.models.query import QuerySet
+
+from .models import Author, Book, ChangeSequence, Tombstone
+
+logger = logging.getLogger(__name__)
+
+BookAuthors = Book.authors.through
+
+GRAPH_PAGE_SIZE: int = 100
+MAX_GRAPH_PAGE_SIZE: int = 1000
+MAX_GRAPH_DEPTH: int = 3
+# Больше изменений с прошлого обновления индекса - индекс строится заново
+MAX_INCREMENTAL_CHANGES: int = 10000
+
+# Модель: (столбец узла в таблице связей, столбец общего соседа, поле подписи)
+SIDES: Dict[Type[models.Model], Tuple[str, str, str]] = {
+    Author: ("author_id", "book_id", "name"),
+    Book: ("book_id", "author_id", "title"),
+}
+
+# Связанный объект: (id, подпись, расстояние, общих соседей с исходным)
+Neighbour = Tuple[uuid.UUID, str, int, int]
+# Снимок графа: модель -> {id узла: id соседей другой модели}
+Edges = Dict[Type[models.Model], Dict[uuid.UUID, Set[uuid.UUID]]]
+
+
+def neighbours_sql(model: Type[models.Model], using: str) -> str:
+    """Метод для построения SQL обхода графа от объекта model одним запросом
+
+    reach - рекурсивный обход по таблице связей на depth шагов (автор ->
+    книга -> автор), shared - число общих книг (авторов) с исходным объектом
+    через самосоединение таблицы связей. Параметры: id, depth, id, id, limit.
+    """
+    quote = connections[using].ops.quote_name
+    node, pivot, label = (quote(column) for column in SIDES[model])
+    links: str = quote(BookAuthors._meta.db_table)
+    table: str = quote(model._meta.db_table)
+    pk: str = quote(model._meta.pk.column)
+    return f"""
+        WITH RECURSIVE reach(node, distance) AS (
+            SELECT %s, 0
+            UNION
+            SELECT b.{node}, r.distance + 1
+            FROM reach r
+            JOIN {links} a ON a.{node} = r.node
+            JOIN {links} b ON b.{pivot} = a.{pivot}
+            WHERE r.distance < %s
+        ),
+        nearest AS (
+            SELECT node, MIN(distance) AS distance FROM reach GROUP BY node
+        ),
+        shared AS (
+            SELECT b.{node} AS node, COUNT(*) AS shared
+            FROM {links} a
+            JOIN {links} b ON b.{pivot} = a.{pivot}
+            WHERE a.{node} = %s
+            GROUP BY b.{node}
+        )
+        SELECT n.node, t.{label}, n.distance, COALESCE(s.shared, 0)
+        FROM nearest n
+        JOIN {table} t ON t.{pk} = n.node
+        LEFT JOIN shared s ON s.node = n.node
+        WHERE n.node <> %s
+        ORDER BY n.distance, COALESCE(s.shared, 0) DESC, n.node
+        LIMIT %s
+    """
+
+
+def query_neighbours(
+    model: Type[models.Model],
+    pk: uuid.UUID,
+    depth: int = 1,
+    limit: int = GRAPH_PAGE_SIZE,
+    using: str = DEFAULT_DB_ALIAS,
+) -> List[Neighbour]:
+    """Метод для получения связанных объектов одним запросом к БД
+
+    Для авторов это соавторы, для книг - книги с общими авторами; ближние
+    идут первыми, при равном расстоянии - с большим числом общих соседей.
+    """
+    connection = connections[using]
+    field: models.Field = model._meta.pk
+    value: Any = field.get_db_prep_value(pk, connection)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            neighbours_sql(model, using), [value, depth, value, value, limit]
+        )
+        rows: List[Tuple[Any, ...]] = cursor.fetchall()
+    return [
+        (field.to_python(node), label, distance, shared)
+        for node, label, distance, shared in rows
+    ]
+
+
+class AdjacencyIndex:
+    """Класс для графа связей авторов и книг в памяти процесса
+
+    Включается настройкой GRAPH_INDEX. Перед обходом индекс догоняет БД по
+    ленте изменений (books/changes.py): связи перечитываются только у
+    авторов и книг с change_seq больше последнего учтенного, удаленные
+    убираются по отметкам об удалении. Изменение связей меняет change_seq
+    обеих сторон, поэтому индекс видит запись любого писателя, включая
+    пакетные и COPY.
+
+    Обход читает готовый снимок edges без блокировки: обновление собирает
+    новый снимок (изменившиеся узлы копируются) и подменяет ссылку на него.
+    Обновляет индекс один поток; пока идет обновление или полная сборка в
+    фоне, устаревший индекс не используется, и обход выполняет query_neighbours.
+    """
+
+    def __init__(self) -> None:
+        # Держится на время обновления, читатели его не ждут
+        self._lock = threading.Lock()
+        self.seq: Optional[int] = None
+        self.edges: Edges = {Author: {}, Book: {}}
+
+    def other(self, model: Type[models.Model]) -> Type[models.Model]:
+        return Book if model is Author else Author
+
+    def build(self, using: str) -> Edges:
+        """Метод для построения нового снимка целиком из таблицы связей"""
+        edges: Edges = {Author: {}, Book: {}}
+        links: QuerySet = BookAuthors.objects.using(using).values_list(
+            "author_id", "book_id"
+        )
+        for author_id, book_id in links.iterator(chunk_size=10000):
+            edges[Author].setdefault(author_id, set()).add(book_id)
+            edges[Book].setdefault(book_id, set()).add(author_id)
+        return edges
+
+    def set_links(
+        self,
+        edges: Edges,
+        model: Type[models.Model],
+        pk: uuid.UUID,
+        targets: Set[uuid.UUID],
+    ) -> None:
+        """Метод для замены связей объекта в копии снимка
+
+        Множества соседей не меняются на месте, а заменяются новыми: их
+        может обходить читатель прежнего снимка.
+        """
+        reverse: Dict[uuid.UUID, Set[uuid.UUID]] = edges[self.other(model)]
+        current: Set[uuid.UUID] = edges[model].pop(pk, set())
+        for target in current - targets:
+            remaining: Set[uuid.UUID] = reverse.get(target, set()) - {pk}
+            if remaining:
+                reverse[target] = remaining
+            else:
+                reverse.pop(target, None)
+        for target in targets - current:
+            reverse[target] = reverse.get(target, set()) | {pk}
+        if targets:
+            edges[model][pk] = set(targets)
+
+    def reload(
+        self,
+        edges: Edges,
+        model: Type[models.Model],
+        ids: Iterable[uuid.UUID],
+        using: str,
+    ) -> None:
+        """Метод для перечитывания связей объектов ids из БД в копию снимка"""
+        node, pivot, _ = SIDES[model]
+        ids = list(ids)
+        links: Dict[uuid.UUID, Set[uuid.UUID]] = {pk: set() for pk in ids}
+        for pk, target in (
+            BookAuthors.objects.using(using)
+            .filter(**{f"{node}__in": ids})
+            .values_list(node, pivot)
+        ):
+            links[pk].add(target)
+        for pk, targets in links.items():
+            self.set_links(edges, model, pk, targets)
+
+    def current_seq(self, using: str) -> int:
+        return (
+            ChangeSequence.objects.using(using)
+            .filter(pk=1)
+            .values_list("value", flat=True)
+            .first()
+            or 0
+        )
+
+    def catch_up(self, seq: int, using: str) -> Optional[Edges]:
+        """Метод для сборки снимка по изменениям после self.seq
+
+        Возвращает None, если изменений слишком много или БД восстановлена
+        из копии и снимок нужно собрать целиком.
+        """
+        # Счетчик меньше учтенного - БД восстановлена из копии
+        if self.seq is None or seq < self.seq:
+            return None
+        changed: Dict[Type[models.Model], List[uuid.UUID]] = {
+            model: list(
+                model.objects.using(using)
+                .filter(change_seq__gt=self.seq)
+                .values_list("pk", flat=True)[: MAX_INCREMENTAL_CHANGES + 1]
+            )
+            for model in (Author, Book)
+        }
+        deleted: List[Tuple[str, Optional[uuid.UUID]]] = list(
+            Tombstone.objects.using(using)
+            .filter(change_seq__gt=self.seq)
+            .values_list("model", "object_id")[: MAX_INCREMENTAL_CHANGES + 1]
+        )
+        total: int = sum(map(len, changed.values())) + len(deleted)
+        if total > MAX_INCREMENTAL_CHANGES or any(pk is None for _, pk in deleted):
+            return None
+        # Копируются только словари узлов, множества соседей общие со снимком
+        edges: Edges = {model: dict(nodes) for model, nodes in self.edges.items()}
+        for label, pk in deleted:
+            model: Type[models.Model] = Author if label == "author" else Book
+            self.set_links(edges, model, pk, set())
+        for model, ids in changed.items():
+            self.reload(edges, model, ids, using)
+        return edges
+
+    def refresh(self, using: str = DEFAULT_DB_ALIAS) -> None:
+        """Метод для догона БД по ленте изменений с ожиданием (прогрев, команды)"""
+        with self._lock:
+            # Номер читается до данных: изменения после него применятся повторно
+            seq: int = self.current_seq(using)
+            if seq == self.seq:
+                return
+            edges: Optional[Edges] = self.catch_up(seq, using)
+            self.edges = edges if edges is not None else self.build(using)
+            self.seq = seq
+
+    def snapshot(self, using: str = DEFAULT_DB_ALIAS) -> Optional[Edges]:
+        """Метод для получения актуального снимка без ожидания
+
+        Небольшие изменения применяются сразу. Полная сборка запускается в
+        фоновом потоке, а пока она идет, как и пока индекс обновляет другой
+        поток, возвращается None.
+        """
+        seq: int = self.current_seq(using)
+        if seq == self.seq:
+            return self.edges
+        if not self._lock.acquire(blocking=False):
+            return None
+        # Блокировку полной сборки освобождает фоновый поток
+        building: bool = False
+        try:
+            seq = self.current_seq(using)
+            if seq != self.seq:
+                edges: Optional[Edges] = self.catch_up(seq, using)
+                if edges is None:
+                    threading.Thread(
+                        target=self._build_in_background,
+                        args=(seq, using),
+                        name="graph-index-build",
+                        daemon=True,
+                    ).start()
+                    building = True
+                    return None
+                self.edges, self.seq = edges, seq
+            return self.edges
+        finally:
+            if not building:
+                self._lock.release()
+
+    def _build_in_background(self, seq: int, using: str) -> None:
+        try:
+            self.edges, self.seq = self.build(using), seq
+        except Exception:
+            logger.exception("Не удалось построить индекс графа")
+        finally:
+            self._lock.release()
+            # У потока свое подключение к БД
+            connections[using].close()
+
+    def neighbours(
+        self,
+        model: Type[models.Model],
+        pk: uuid.UUID,
+        depth: int = 1,
+        limit: int = GRAPH_PAGE_SIZE,
+        using: str = DEFAULT_DB_ALIAS,
+    ) -> List[Neighbour]:
+        """Метод для обхода графа в ширину, порядок как у query_neighbours
+
+        Без актуального снимка обход выполняется запросом к БД.
+        """
+        edges: Optional[Edges] = self.snapshot(using)
+        if edges is None:
+            return query_neighbours(model, pk, depth, limit, using)
+        forward: Dict[uuid.UUID, Set[uuid.UUID]] = edges[model]
+        backward: Dict[uuid.UUID, Set[uuid.UUID]] = edges[self.other(model)]
+        shared: Counter = Counter(
+            node for pivot in forward.get(pk, ()) for node in backward.get(pivot, ())
+        )
+        distance: Dict[uuid.UUID, int] = {pk: 0}
+        frontier: Set[uuid.UUID] = {pk}
+        for level in range(1, depth + 1):
+            reached: Set[uuid.UUID] = set()
+            for current in frontier:
+                for pivot in forward.get(current, ()):
+                    for node in backward.get(pivot, ()):
+                        if node not in distance:
+                            distance[node] = level
+                            reached.add(node)
+            frontier = reached
+        del distance[pk]
+        ranked: List[uuid.UUID] = sorted(
+            distance, key=lambda node: (distance[node], -shared[node], node)
+        )[:limit]
+        _, _, label = SIDES[model]
+        labels: Dict[uuid.UUID, str] = dict(
+            model.objects.using(using).filter(pk__in=ranked).values_list("pk", label)
+        )
+        return [
+            (node, labels[node], distance[node], shared[node])
+            for node in ranked
+            if node in labels
+        ]
+
+
+INDEX: AdjacencyIndex = AdjacencyIndex()
+
+
+def neighbours(
+    model: Type[models.Model],
+    pk: uuid.UUID,
+    depth: int = 1,
+    limit: int = GRAPH_PAGE_SIZE,
+    using: str = DEFAULT_DB_ALIAS,
+) -> List[Neighbour]:
+    """Метод для обхода графа через индекс в памяти (GRAPH_INDEX) или запрос к БД
+
+    Ближние обходы запрос к БД выполняет быстрее индекса, индекс используется
+    с глубины GRAPH_INDEX_MIN_DEPTH.
+    """
+    if getattr(settings, "GRAPH_INDEX", False) and depth >= getattr(
+        settings, "GRAPH_INDEX_MIN_DEPTH", MAX_GRAPH_DEPTH
+    ):
+        return INDEX.neighbours(model, pk, depth, limit, using)
+    return query_neighbours(model, pk, depth, limit, using)
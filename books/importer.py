@@ -0,0 +1,282 @@
+import io
+import json
+import uuid
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    TextIO,
+    Tuple,
+    Type,
+)
+
+from django.db import connection, models, transaction
+
+from .cache import bump_on_commit
+from .changes import next_change_seq, touch
+from .counts import refresh_counts
+from .models import Author, Book
+
+IMPORT_BATCH_SIZE: int = 5000
+READ_CHUNK_SIZE: int = 1 << 16
+
+BookAuthors: Type[models.Model] = Book.authors.through
+
+# Символы между записями: массив JSON, NDJSON и BOM в начале файла
+SEPARATORS: str = " \t\r\n,[]\ufeff"
+
+# Модель, уникальное поле и поле связей в записи
+MODELS: Dict[str, Tuple[Type[models.Model], str, str]] = {
+    "books.author": (Author, "name", "books"),
+    "books.book": (Book, "title", "authors"),
+}
+
+Row = Tuple[uuid.UUID, str, List[uuid.UUID]]
+
+
+def iter_records(
+    stream: TextIO, chunk_size: int = READ_CHUNK_SIZE
+) -> Iterator[Dict[str, Any]]:
+    """Метод для потокового разбора JSON-массива объектов или NDJSON
+
+    Файл читается кусками по chunk_size, в памяти держится только текущий
+    кусок и незаконченная запись.
+    """
+    decoder: json.JSONDecoder = json.JSONDecoder()
+    buffer: str = ""
+    position: int = 0
+    eof: bool = False
+    while True:
+        while position < len(buffer) and buffer[position] in SEPARATORS:
+            position += 1
+        if position == len(buffer):
+            if eof:
+                return
+            buffer, position = stream.read(chunk_size), 0
+            eof = not buffer
+            continue
+        try:
+            record, position = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            chunk: str = stream.read(chunk_size)
+            eof = not chunk
+            buffer, position = buffer[position:] + chunk, 0
+            continue
+        yield record
+
+
+def parse_record(record: Any) -> Tuple[Type[models.Model], Row]:
+    """Метод для разбора записи в формате фикстур или выгрузки export
+
+    Поддерживаются {"model": "books.book", "pk": ..., "fields": {...}} и
+    плоские {"id": ..., "title": ..., "authors": [...]}; связи задаются
+    списком id или объектов с id.
+    """
+    if not isinstance(record, dict):
+        raise ValueError("Ожидается объект JSON")
+    if "model" in record:
+        label: str = str(record["model"]).lower()
+        fields: Dict[str, Any] = record.get("fields") or {}
+        pk: Any = record.get("pk")
+    else:
+        fields = record
+        label = "books.author" if "name" in record else "books.book"
+        pk = record.get("id")
+    if label not in MODELS:
+        raise ValueError(f"Неизвестная модель: {label}")
+
+    model, key, relation = MODELS[label]
+    value: Any = fields.get(key)
+    if not isinstance(value, str) or not value.strip():
+        raise ValueError(f"Не заполнено поле {key}")
+    related: List[uuid.UUID] = [
+        uuid.UUID(str(item["id"] if isinstance(item, dict) else item))
+        for item in fields.get(relation) or []
+    ]
+    return model, (uuid.UUID(str(pk)) if pk else uuid.uuid4(), value.strip(), related)
+
+
+def _copy_escape(value: str) -> str:
+    """Метод для экранирования значения в текстовом формате COPY"""
+    return (
+        value.replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def _copy_insert(
+    table: str,
+    columns: Dict[str, str],
+    rows: Iterable[Tuple[Any, ...]],
+    constants: Optional[Dict[str, str]] = None,
+) -> None:
+    """Метод для вставки через COPY во временную таблицу и INSERT ... ON CONFLICT DO NOTHING
+
+    columns - имена и типы колонок из rows, constants - колонки таблицы,
+    заполняемые SQL-константой.
+    """
+    quote = connection.ops.quote_name
+    temp: str = quote(f"import_{table}")
+    names: str = ", ".join(quote(name) for name in columns)
+    buffer: io.StringIO = io.StringIO()
+    for row in rows:
+        buffer.write("\t".join(_copy_escape(str(value)) for value in row) + "\n")
+    buffer.seek(0)
+
+    target: str = ", ".join([names, *(quote(name) for name in constants or {})])
+    source: str = ", ".join([names, *(constants or {}).values()])
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {temp}")
+        cursor.execute(
+            f"CREATE TEMP TABLE {temp} ("
+            + ", ".join(f"{quote(name)} {kind}" for name, kind in columns.items())
+            + ") ON COMMIT DROP"
+        )
+        cursor.copy_expert(f"COPY {temp} ({names}) FROM STDIN", buffer)
+        cursor.execute(
+            f"INSERT INTO {quote(table)} ({target}) SELECT {source} FROM {temp} "
+            "ON CONFLICT DO NOTHING"
+        )
+
+
+class CatalogImporter:
+    """Класс для пакетного импорта авторов, книг и связей
+
+    Записи копятся пачками; flush() пишет пачку в одной транзакции: строки
+    через bulk_create (или COPY на PostgreSQL), затем связи, у которых обе
+    стороны есть в БД, затем пересчет счетчиков. Уже существующие строки
+    (по id или уникальному имени) пропускаются, поэтому повторный импорт
+    того же файла безопасен. Model.save() и сигналы не вызываются, strip()
+    применяется при разборе записи.
+    """
+
+    def __init__(self, batch_size: int = IMPORT_BATCH_SIZE, use_copy: bool = False):
+        if use_copy and connection.vendor != "postgresql":
+            raise ValueError("COPY доступен только для PostgreSQL")
+        self.batch_size = batch_size
+        self.use_copy = use_copy
+        self.pending: Dict[Type[models.Model], List[Row]] = {Author: [], Book: []}
+        self.stats: Dict[str, int] = dict.fromkeys(
+            ("authors", "books", "links", "skipped_links"), 0
+        )
+
+    def add(self, record: Any) -> bool:
+        """Метод для добавления записи в пачку, возвращает True, если пачка заполнена"""
+        model, row = parse_record(record)
+        self.pending[model].append(row)
+        return sum(len(rows) for rows in self.pending.values()) >= self.batch_size
+
+    def flush(self) -> None:
+        """Метод для записи накопленной пачки в одной транзакции"""
+        if not any(self.pending.values()):
+            return
+        with transaction.atomic():
+            # Номер изменения берется до записи строк, как в остальных записях
+            seq: int = next_change_seq()
+            pairs: Set[Tuple[uuid.UUID, uuid.UUID]] = set()
+            touched: Dict[Type[models.Model], Set[uuid.UUID]] = {
+                Author: set(),
+                Book: set(),
+            }
+            for model, field in ((Author, "name"), (Book, "title")):
+                rows: List[Row] = self.pending[model]
+                if not rows:
+                    continue
+                ids: Dict[str, uuid.UUID] = self._insert(model, field, rows)
+                touched[model].update(ids.values())
+                for _, value, related in rows:
+                    pk: Optional[uuid.UUID] = ids.get(value)
+                    if pk is None:
+                        continue
+                    pairs.update(
+                        (pk, other) if model is Book else (other, pk)
+                        for other in related
+                    )
+                self.stats["authors" if model is Author else "books"] += len(rows)
+            for book, author in self._link(pairs):
+                touched[Book].add(book)
+                touched[Author].add(author)
+            touch(author_ids=touched[Author], book_ids=touched[Book], seq=seq)
+            bump_on_commit("author", "book")
+        self.pending = {Author: [], Book: []}
+
+    def _insert(
+        self, model: Type[models.Model], field: str, rows: List[Row]
+    ) -> Dict[str, uuid.UUID]:
+        """Метод для вставки новых строк, возвращает {значение поля: id в БД}"""
+        values: Dict[str, uuid.UUID] = {}
+        for pk, value, _ in rows:
+            values.setdefault(value, pk)
+        if self.use_copy:
+            counter: str = "book_count" if model is Author else "author_count"
+            _copy_insert(
+                model._meta.db_table,
+                {"id": "uuid", field: "text"},
+                ((pk, value) for value, pk in values.items()),
+                # Значения по умолчанию моделей задаются в Python, не в БД
+                {counter: "0", "change_seq": "0", "updated_at": "now()"},
+            )
+        else:
+            model.objects.bulk_create(
+                [model(pk=pk, **{field: value}) for value, pk in values.items()],
+                ignore_conflicts=True,
+            )
+        # Строка с тем же именем могла уже быть в БД под другим id
+        return dict(
+            model.objects.filter(**{f"{field}__in": list(values)}).values_list(
+                field, "pk"
+            )
+        )
+
+    def _link(
+        self, pairs: Set[Tuple[uuid.UUID, uuid.UUID]]
+    ) -> List[Tuple[uuid.UUID, uuid.UUID]]:
+        """Метод для записи связей (book_id, author_id), обе стороны проверяются в БД
+
+        Возвращает записанные связи.
+        """
+        if not pairs:
+            return []
+        books: Set[uuid.UUID] = set(
+            Book.objects.filter(pk__in={book for book, _ in pairs}).values_list(
+                "pk", flat=True
+            )
+        )
+        authors: Set[uuid.UUID] = set(
+            Author.objects.filter(pk__in={author for _, author in pairs}).values_list(
+                "pk", flat=True
+            )
+        )
+        valid: List[Tuple[uuid.UUID, uuid.UUID]] = [
+            (book, author)
+            for book, author in pairs
+            if book in books and author in authors
+        ]
+        self.stats["skipped_links"] += len(pairs) - len(valid)
+        if not valid:
+            return []
+        if self.use_copy:
+            _copy_insert(
+                BookAuthors._meta.db_table,
+                {"book_id": "uuid", "author_id": "uuid"},
+                valid,
+            )
+        else:
+            BookAuthors.objects.bulk_create(
+                [BookAuthors(book_id=book, author_id=author) for book, author in valid],
+                ignore_conflicts=True,
+            )
+        self.stats["links"] += len(valid)
+        refresh_counts(
+            author_ids={author for _, author in valid},
+            book_ids={book for book, _ in valid},
+        )
+        return valid
@@ -0,0 +1,309 @@
+import random
+import threading
+import time
+from collections import defaultdict
+from contextlib import ExitStack
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.http import HttpRequest, HttpResponse
+
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+METHODS: Set[str] = {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+# Сколько разных SQL помнить в одном запросе для поиска повторов
+MAX_TRACKED_STATEMENTS: int = 1000
+
+
+class QueryTracker:
+    """Класс для подсчета запросов к БД, их времени и повторов в рамках одного запроса"""
+
+    def __init__(self) -> None:
+        self.count: int = 0
+        self.seconds: float = 0.0
+        self.duplicates: int = 0
+        self.similar: int = 0
+        self._statements: Set[int] = set()
+        self._queries: Set[int] = set()
+        self.view_started: Optional[float] = None
+        self.render_started: Optional[float] = None
+        self.db_at_view: float = 0.0
+        self.db_before_render: float = 0.0
+
+    def __call__(
+        self, execute: Callable, sql: str, params: Any, many: bool, context: Any
+    ) -> Any:
+        started: float = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.count += 1
+            self._track(sql, params)
+
+    def _track(self, sql: str, params: Any) -> None:
+        statement: int = hash(sql)
+        query: int = hash((sql, repr(params)))
+        if query in self._queries:
+            self.duplicates += 1
+        if statement in self._statements:
+            self.similar += 1
+        elif len(self._statements) < MAX_TRACKED_STATEMENTS:
+            self._statements.add(statement)
+        if len(self._queries) < MAX_TRACKED_STATEMENTS:
+            self._queries.add(query)
+
+
+class MetricsRegistry:
+    """Класс для накопления метрик по представлениям фиксированного размера
+
+    Метки ограничены именами url и HTTP-методами, поэтому объем памяти не
+    растет с числом запросов. Метрики свои у каждого процесса-воркера.
+    """
+
+    COUNTERS: Tuple[str, ...] = (
+        "requests",
+        "sampled",
+        "queries",
+        "duplicate_queries",
+        "similar_queries",
+        "db_seconds",
+        "serialize_seconds",
+        "render_seconds",
+        "response_bytes",
+        "duration_seconds_sum",
+    )
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, str], Dict[str, float]] = defaultdict(
+            lambda: dict.fromkeys(self.COUNTERS, 0)
+        )
+        self._buckets: Dict[Tuple[str, str], List[int]] = defaultdict(
+            lambda: [0] * (len(LATENCY_BUCKETS) + 1)
+        )
+
+    def observe(self, labels: Tuple[str, str], values: Dict[str, float]) -> None:
+        duration: float = values["duration_seconds_sum"]
+        index: int = next(
+            (i for i, bound in enumerate(LATENCY_BUCKETS) if duration <= bound),
+            len(LATENCY_BUCKETS),
+        )
+        with self._lock:
+            counters: Dict[str, float] = self._counters[labels]
+            for name, value in values.items():
+                counters[name] += value
+            self._buckets[labels][index] += 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._buckets.clear()
+
+    def render(self) -> str:
+        """Метод для вывода метрик в текстовом формате Prometheus"""
+        with self._lock:
+            counters = {key: dict(value) for key, value in self._counters.items()}
+            buckets = {key: list(value) for key, value in self._buckets.items()}
+
+        lines: List[str] = []
+        for name in self.COUNTERS:
+            if name == "duration_seconds_sum":
+                continue
+            metric: str = f"books_{name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            for (view, method), values in sorted(counters.items()):
+                lines.append(
+                    f'{metric}{{view="{view}",method="{method}"}} {values[name]}'
+                )
+
+        lines.append("# TYPE books_request_duration_seconds histogram")
+        for (view, method), counts in sorted(buckets.items()):
+            labels: str = f'view="{view}",method="{method}"'
+            total: int = 0
+            for bound, count in zip(LATENCY_BUCKETS + (float("inf"),), counts):
+                total += count
+                le: str = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(
+                    f'books_request_duration_seconds_bucket{{{labels},le="{le}"}} {total}'
+                )
+            duration_sum: float = counters[(view, method)]["duration_seconds_sum"]
+            lines.append(
+                f"books_request_duration_seconds_sum{{{labels}}} {duration_sum}"
+            )
+            lines.append(f"books_request_duration_seconds_count{{{labels}}} {total}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY: MetricsRegistry = MetricsRegistry()
+
+
+class InstrumentationMiddleware:
+    """Middleware для замера запросов к БД, сериализации и рендеринга по представлениям
+
+    Подробный замер выполняется только для доли запросов
+    INSTRUMENTATION_SAMPLE_RATE, остальные учитываются лишь по длительности и
+    размеру ответа. Для замеренных запросов добавляется заголовок Server-Timing:
+    db - время запросов к БД, serialize - время в представлении без БД (в
+    основном сериализаторы), render - рендеринг ответа.
+    """
+
+    sync_capable: bool = True
+    async_capable: bool = True
+
+    def __init__(self, get_response: Callable[[HttpRequest], Any]) -> None:
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+            # Синхронные хуки под ASGI Django вызывал бы через sync_to_async
+            self.process_view = self._aprocess_view
+            self.process_template_response = self._aprocess_template_response
+
+    def __call__(self, request: HttpRequest) -> Any:
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started: float = time.perf_counter()
+        tracker: Optional[QueryTracker] = self._sample(request)
+        with self._tracking(tracker):
+            response: HttpResponse = self.get_response(request)
+        return self._observe(request, response, tracker, started)
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        started: float = time.perf_counter()
+        tracker: Optional[QueryTracker] = self._sample(request)
+        with self._tracking(tracker):
+            response: HttpResponse = await self.get_response(request)
+        return self._observe(request, response, tracker, started)
+
+    def _sample(self, request: HttpRequest) -> Optional[QueryTracker]:
+        """Метод для выбора запроса в долю INSTRUMENTATION_SAMPLE_RATE"""
+        rate: float = getattr(settings, "INSTRUMENTATION_SAMPLE_RATE", 0.0)
+        if rate > 0 and random.random() < rate:
+            tracker: QueryTracker = QueryTracker()
+            request._query_tracker = tracker
+            return tracker
+        return None
+
+    def _tracking(self, tracker: Optional[QueryTracker]) -> ExitStack:
+        stack: ExitStack = ExitStack()
+        if tracker is not None:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(tracker))
+        return stack
+
+    def _observe(
+        self,
+        request: HttpRequest,
+        response: HttpResponse,
+        tracker: Optional[QueryTracker],
+        started: float,
+    ) -> HttpResponse:
+        finished: float = time.perf_counter()
+        size: int = 0 if response.streaming else len(response.content)
+        values: Dict[str, float] = {
+            "requests": 1,
+            "response_bytes": size,
+            "duration_seconds_sum": finished - started,
+        }
+        if tracker is not None:
+            values.update(self._sampled_values(tracker, finished))
+            response["Server-Timing"] = self._server_timing(values, tracker)
+
+        match = request.resolver_match
+        view: str = (match.view_name or match._func_path) if match else "unmatched"
+        method: str = request.method if request.method in METHODS else "OTHER"
+        REGISTRY.observe((view, method), values)
+        return response
+
+    def process_view(
+        self, request: HttpRequest, view_func: Any, view_args: Any, view_kwargs: Any
+    ) -> None:
+        tracker: Optional[QueryTracker] = getattr(request, "_query_tracker", None)
+        if tracker is not None:
+            tracker.view_started = time.perf_counter()
+            tracker.db_at_view = tracker.seconds
+
+    def process_template_response(
+        self, request: HttpRequest, response: HttpResponse
+    ) -> HttpResponse:
+        tracker: Optional[QueryTracker] = getattr(request, "_query_tracker", None)
+        if tracker is not None:
+            tracker.render_started = time.perf_counter()
+            tracker.db_before_render = tracker.seconds
+        return response
+
+    async def _aprocess_view(
+        self, request: HttpRequest, view_func: Any, view_args: Any, view_kwargs: Any
+    ) -> None:
+        InstrumentationMiddleware.process_view(
+            self, request, view_func, view_args, view_kwargs
+        )
+
+    async def _aprocess_template_response(
+        self, request: HttpRequest, response: HttpResponse
+    ) -> HttpResponse:
+        return InstrumentationMiddleware.process_template_response(
+            self, request, response
+        )
+
+    def _sampled_values(
+        self, tracker: QueryTracker, finished: float
+    ) -> Dict[str, float]:
+        serialize: float = 0.0
+        render: float = 0.0
+        if tracker.view_started is not None:
+            view_end: float = tracker.render_started or finished
+            db_in_view: float = (
+                tracker.db_before_render if tracker.render_started else tracker.seconds
+            ) - tracker.db_at_view
+            serialize = max(0.0, view_end - tracker.view_started - db_in_view)
+        if tracker.render_started is not None:
+            render = max(
+                0.0,
+                finished
+                - tracker.render_started
+                - (tracker.seconds - tracker.db_before_render),
+            )
+        return {
+            "sampled": 1,
+            "queries": tracker.count,
+            "duplicate_queries": tracker.duplicates,
+            "similar_queries": tracker.similar,
+            "db_seconds": tracker.seconds,
+            "serialize_seconds": serialize,
+            "render_seconds": render,
+        }
+
+    def _server_timing(self, values: Dict[str, float], tracker: QueryTracker) -> str:
+        def ms(seconds: float) -> str:
+            return f"{seconds * 1000:.2f}"
+
+        return ", ".join(
+            [
+                f'db;dur={ms(values["db_seconds"])};desc="{tracker.count} queries, '
+                f'{tracker.duplicates} duplicate, {tracker.similar} similar"',
+                f"serialize;dur={ms(values['serialize_seconds'])}",
+                f"render;dur={ms(values['render_seconds'])}",
+                f"total;dur={ms(values['duration_seconds_sum'])}",
+            ]
+        )
+
+
+def metrics_view(request: HttpRequest) -> HttpResponse:
+    """Представление с метриками процесса в формате Prometheus"""
+    return HttpResponse(
+        REGISTRY.render(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -0,0 +1,196 @@
+import json
+import platform
+import subprocess
+from typing import Any, Dict, List, Optional
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import connection
+from django.test.utils import override_settings, setup_databases, teardown_databases
+
+from books import urls
+from books.benchmark import (
+    compare,
+    NO_LOAD_SHEDDING,
+    NO_RESPONSE_CACHE,
+    generate_catalog,
+    measure_concurrent_writes,
+    measure_connection_modes,
+    measure_interfaces,
+    measure_load_shedding,
+    measure_read_paths,
+    run_benchmark,
+)
+
+COMPARED_METRICS = (
+    "p50_ms",
+    "p95_ms",
+    "p99_ms",
+    "throughput_rps",
+    "queries_per_request",
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Нагрузочный прогон всех url из books/urls.py на синтетическом каталоге "
+        "во временной тестовой базе (SQLite или локальный PostgreSQL)"
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--authors", type=int, default=1000)
+        parser.add_argument("--books", type=int, default=2000)
+        parser.add_argument(
+            "--fanout",
+            default="uniform:1-3",
+            help="Число авторов у книги: fixed:K, uniform:A-B, poisson:L, zipf:S[:MAX]",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument("--only", nargs="*", help="Имена url для прогона")
+        parser.add_argument(
+            "--no-response-cache",
+            action="store_true",
+            help="Отключить кэш ответов, чтобы каждый запрос шел в БД",
+        )
+        parser.add_argument(
+            "--abusers",
+            type=int,
+            default=8,
+            help="Клиентов, перегружающих тяжелые url в замере load_shedding",
+        )
+        parser.add_argument("--output", default="benchmark.json")
+        parser.add_argument("--compare", help="JSON предыдущего прогона для сравнения")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            caches: Optional[Dict[str, Any]] = (
+                NO_RESPONSE_CACHE if options["no_response_cache"] else None
+            )
+            with override_settings(**({"CACHES": caches} if caches else {})):
+                dataset: Dict[str, int] = generate_catalog(
+                    options["authors"],
+                    options["books"],
+                    options["fanout"],
+                    options["seed"],
+                )
+                # До прогона url: сценарии удаления в конце очищают каталог
+                read_paths: Dict[str, Any] = measure_read_paths()
+                writes: Dict[str, Any] = measure_concurrent_writes(
+                    options["requests"], options["concurrency"]
+                )
+                load_shedding: Dict[str, Any] = measure_load_shedding(
+                    urls.urlpatterns, options["requests"], options["abusers"]
+                )
+                # Все запросы идут с одного адреса и не должны получать 429/503
+                with override_settings(**NO_LOAD_SHEDDING):
+                    connection_modes: Dict[str, Any] = measure_connection_modes(
+                        urls.urlpatterns, options["requests"]
+                    )
+                    interfaces: Dict[str, Any] = measure_interfaces(
+                        urls.urlpatterns, options["requests"], options["concurrency"]
+                    )
+                    report: Dict[str, Any] = run_benchmark(
+                        urls.urlpatterns,
+                        options["requests"],
+                        options["concurrency"],
+                        options["only"],
+                    )
+                report["read_paths"] = read_paths
+                report["concurrent_writes"] = writes
+                report["connection_modes"] = connection_modes
+                report["interfaces"] = interfaces
+                report["load_shedding"] = load_shedding
+            report["meta"] = self.meta(options, dataset)
+        finally:
+            teardown_databases(old_config, verbosity=0)
+
+        with open(options["output"], "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2, sort_keys=True)
+        self.print_report(report)
+        self.stdout.write(f"Результаты записаны в {options['output']}")
+
+        if options["compare"]:
+            with open(options["compare"], encoding="utf-8") as f:
+                baseline: Dict[str, Any] = json.load(f)
+            for name, metric, before, after, change in compare(
+                baseline, report, COMPARED_METRICS
+            ):
+                suffix: str = f"{change:+.1f}%" if change is not None else "-"
+                self.stdout.write(
+                    f"{name:32} {metric:20} {before} -> {after} ({suffix})"
+                )
+
+    def meta(self, options: Dict[str, Any], dataset: Dict[str, int]) -> Dict[str, Any]:
+        try:
+            commit: Optional[str] = subprocess.run(
+                ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+        return {
+            "commit": commit,
+            "database": connection.vendor,
+            "dataset": dataset,
+            "fanout": options["fanout"],
+            "seed": options["seed"],
+            "requests": options["requests"],
+            "concurrency": options["concurrency"],
+            "response_cache": not options["no_response_cache"],
+            "db_pool_mode": getattr(settings, "DB_POOL_MODE", None),
+            "abusers": options["abusers"],
+            "python": platform.python_version(),
+            "django": django.get_version(),
+        }
+
+    def print_report(self, report: Dict[str, Any]) -> None:
+        columns: List[str] = [
+            "p50_ms",
+            "p95_ms",
+            "p99_ms",
+            "throughput_rps",
+            "queries_per_request",
+        ]
+        self.stdout.write(f"{'endpoint':32} " + " ".join(f"{c:>20}" for c in columns))
+        for name, stats in report["endpoints"].items():
+            self.stdout.write(
+                f"{name:32} " + " ".join(f"{str(stats[c]):>20}" for c in columns)
+            )
+        self.stdout.write(f"peak RSS: {report['peak_rss_kb']} KB")
+        for name, stats in report["read_paths"].items():
+            self.stdout.write(
+                f"CPU на {stats['rows']} {name}: сериализаторы "
+                f"{stats['serializer_cpu_ms']} мс, fast path {stats['fast_cpu_ms']} мс "
+                f"(x{stats['speedup']})"
+            )
+        for name, stats in report["connection_modes"]["persistent"].items():
+            before: float = report["connection_modes"]["none"][name]["mean_ms"]
+            self.stdout.write(
+                f"{name}: подключение на запрос {before} мс, постоянное "
+                f"{stats['mean_ms']} мс (экономия {stats['saved_ms']} мс)"
+            )
+        for name, stats in report["interfaces"]["asgi"].items():
+            wsgi: Dict[str, Any] = report["interfaces"]["wsgi"][name]
+            self.stdout.write(
+                f"{name}: WSGI {wsgi['throughput_rps']} rps (p99 {wsgi['p99_ms']} мс), "
+                f"ASGI {stats['throughput_rps']} rps (p99 {stats['p99_ms']} мс)"
+            )
+        writes: Dict[str, Any] = report["concurrent_writes"]
+        if writes:
+            self.stdout.write(
+                f"Запись авторов: 1 поток {writes['serial']['throughput_rps']} rps, "
+                f"{writes['concurrent']['threads']} потоков "
+                f"{writes['concurrent']['throughput_rps']} rps "
+                f"(x{writes['scaling']}, ошибок {writes['concurrent']['errors']})"
+            )
+        shedding: Dict[str, Any] = report["load_shedding"]
+        self.stdout.write(
+            "author-detail p99 при перегрузке: без нарушителей "
+            f"{shedding['baseline']['p99_ms']} мс, без ограничений "
+            f"{shedding['unprotected']['p99_ms']} мс, с ограничениями "
+            f"{shedding['protected']['p99_ms']} мс; ответы нарушителям: "
+            f"{shedding['protected']['abuser_statuses']}"
+        )
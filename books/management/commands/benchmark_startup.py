@@ -0,0 +1,47 @@
+import json
+from typing import Any, Dict
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from books.benchmark import measure_startup
+
+
+class Command(BaseCommand):
+    help = (
+        "Замер старта gunicorn (gunicorn.conf.py): время до первого ответа и "
+        "память на воркер до профиля для продакшена и с ним"
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--workers", type=int, default=2)
+        parser.add_argument("--path", default="/api/authors/")
+        parser.add_argument("--requests", type=int, default=50)
+        parser.add_argument(
+            "--before", default="dev.settings", help="DJANGO_SETTINGS_MODULE до"
+        )
+        parser.add_argument(
+            "--after", default="dev.production", help="DJANGO_SETTINGS_MODULE после"
+        )
+        parser.add_argument("--output", default="benchmark-startup.json")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        try:
+            report: Dict[str, Any] = measure_startup(
+                {"before": options["before"], "after": options["after"]},
+                options["workers"],
+                options["path"],
+                options["requests"],
+            )
+        except RuntimeError as e:
+            raise CommandError(str(e))
+
+        with open(options["output"], "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2, sort_keys=True)
+        for name, stats in report.items():
+            self.stdout.write(
+                f"{name}: первый ответ через {stats['time_to_first_request_ms']} мс "
+                f"({stats['first_request_ms']} мс на запрос), p50 {stats['p50_ms']} мс, "
+                f"воркеров {stats['workers']}, RSS {stats['worker_rss_kb']} КБ, "
+                f"PSS {stats['worker_pss_kb']} КБ на воркер"
+            )
+        self.stdout.write(f"Результаты записаны в {options['output']}")
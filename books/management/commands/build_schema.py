@@ -0,0 +1,35 @@
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from books.schema import build_schema, read_artifact, schema_path, source_hash
+
+
+class Command(BaseCommand):
+    help = (
+        "Сборка схемы OpenAPI в файл для /api/schema/; схема строится заново, "
+        "только если изменились url, представления, сериализаторы или настройки"
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--output", default=None)
+        parser.add_argument("--force", action="store_true")
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Только проверить, что собранная схема актуальна (для CI)",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        path: Path = Path(options["output"] or schema_path())
+        if options["check"]:
+            artifact: Optional[Dict[str, Any]] = read_artifact(path)
+            if artifact is None or artifact["hash"] != source_hash():
+                raise CommandError(f"{path}: схема устарела, выполните build_schema")
+            self.stdout.write(f"{path}: схема актуальна")
+            return
+        if build_schema(path, force=options["force"]):
+            self.stdout.write(f"{path}: схема собрана")
+        else:
+            self.stdout.write(f"{path}: схема актуальна")
@@ -0,0 +1,132 @@
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import connection, transaction
+
+from books.export import (
+    COMPRESSIONS,
+    EXPORT_CHUNK_SIZE,
+    SHARD_MODELS,
+    export_shard,
+    uuid_ranges,
+)
+from books.workers import setup_django
+
+
+class Command(BaseCommand):
+    help = (
+        "Параллельная выгрузка авторов и книг в NDJSON-шарды по диапазонам UUID "
+        "(процесс на диапазон) с файлом manifest.json"
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--output-dir", default="export")
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+        parser.add_argument(
+            "--shards",
+            type=int,
+            help="Число диапазонов на модель, по умолчанию 4 на воркер",
+        )
+        parser.add_argument("--compression", choices=list(COMPRESSIONS), default="gzip")
+        parser.add_argument(
+            "--models",
+            nargs="+",
+            choices=list(SHARD_MODELS),
+            default=list(SHARD_MODELS),
+        )
+        parser.add_argument("--chunk-size", type=int, default=EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if options["compression"] == "zstd":
+            try:
+                import zstandard  # noqa: F401
+            except ImportError:
+                raise CommandError("Для --compression zstd установите zstandard")
+        workers: int = max(1, options["workers"])
+        shards: int = max(1, options["shards"] or workers * 4)
+        output_dir: str = options["output_dir"]
+        os.makedirs(output_dir, exist_ok=True)
+
+        extension: str = ".ndjson" + COMPRESSIONS[options["compression"]]
+        tasks: List[Dict[str, Any]] = [
+            {
+                "model": model,
+                "range": bounds,
+                "path": os.path.join(output_dir, f"{model}-{index:04d}{extension}"),
+                "compression": options["compression"],
+                "chunk_size": options["chunk_size"],
+            }
+            for model in options["models"]
+            for index, bounds in enumerate(uuid_ranges(shards))
+        ]
+
+        started: float = time.perf_counter()
+        with self.snapshot() as snapshot:
+            shard_results: List[Dict[str, Any]] = self.run(tasks, workers, snapshot)
+        elapsed: float = time.perf_counter() - started
+
+        shard_results.sort(key=lambda shard: shard["file"])
+        totals: Dict[str, int] = {model: 0 for model in options["models"]}
+        for shard in shard_results:
+            totals[shard["model"]] += shard["rows"]
+        manifest: Dict[str, Any] = {
+            "format": "ndjson",
+            "compression": options["compression"],
+            "database": connection.vendor,
+            "snapshot": snapshot is not None,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "elapsed_seconds": round(elapsed, 3),
+            "workers": workers,
+            "rows": totals,
+            "shards": shard_results,
+        }
+        with open(
+            os.path.join(output_dir, "manifest.json"), "w", encoding="utf-8"
+        ) as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+        total: int = sum(totals.values())
+        self.stdout.write(
+            f"Выгружено {total} строк в {len(shard_results)} файлов за {elapsed:.1f} с "
+            f"({total / elapsed if elapsed else 0:.0f} строк/с): {output_dir}"
+        )
+
+    @contextmanager
+    def snapshot(self) -> Iterator[Optional[str]]:
+        """Метод для открытия снимка PostgreSQL, общего для всех воркеров"""
+        if connection.vendor != "postgresql":
+            yield None
+            return
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+                cursor.execute("SELECT pg_export_snapshot()")
+                yield cursor.fetchone()[0]
+
+    def run(
+        self, tasks: List[Dict[str, Any]], workers: int, snapshot: Optional[str]
+    ) -> List[Dict[str, Any]]:
+        """Метод для выполнения задач в пуле процессов (или в текущем при одном воркере)"""
+        if workers == 1:
+            # Текущее подключение уже находится в снимке
+            return [self.report(export_shard(task)) for task in tasks]
+
+        for task in tasks:
+            task["snapshot"] = snapshot
+        # spawn: у каждого воркера свое подключение, родительское не наследуется
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(
+            workers, mp_context=context, initializer=setup_django
+        ) as pool:
+            futures = [pool.submit(export_shard, task) for task in tasks]
+            return [self.report(future.result()) for future in as_completed(futures)]
+
+    def report(self, shard: Dict[str, Any]) -> Dict[str, Any]:
+        self.stdout.write(f"{shard['file']}: {shard['rows']} строк")
+        return shard
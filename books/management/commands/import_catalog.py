@@ -0,0 +1,119 @@
+import gzip
+import json
+import os
+import time
+from typing import Any, Dict, TextIO
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from books.importer import IMPORT_BATCH_SIZE, CatalogImporter, iter_records
+
+
+def open_text(path: str) -> TextIO:
+    """Метод для открытия файла на чтение, .gz распаковывается на лету"""
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, encoding="utf-8")
+
+
+class Command(BaseCommand):
+    help = (
+        "Потоковый импорт авторов и книг из JSON-массивов (формат fixtures) или "
+        "NDJSON пачками bulk_create/COPY с возможностью продолжить после обрыва"
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "paths",
+            nargs="+",
+            help="Файлы .json/.ndjson (можно .gz), авторы должны идти раньше книг",
+        )
+        parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+        parser.add_argument(
+            "--copy", action="store_true", help="Вставка через COPY (только PostgreSQL)"
+        )
+        parser.add_argument("--state-file", default="import_catalog.state.json")
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="Продолжить с последней записанной пачки по --state-file",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        try:
+            importer = CatalogImporter(options["batch_size"], options["copy"])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        state: Dict[str, Any] = {}
+        if options["resume"] and os.path.exists(options["state_file"]):
+            with open(options["state_file"], encoding="utf-8") as f:
+                state = json.load(f)
+
+        started: float = time.perf_counter()
+        for path in options["paths"]:
+            self.import_file(importer, path, state, options["state_file"])
+
+        elapsed: float = time.perf_counter() - started
+        stats: Dict[str, int] = importer.stats
+        total: int = stats["authors"] + stats["books"]
+        self.stdout.write(
+            f"Готово за {elapsed:.1f} с: авторов {stats['authors']}, книг "
+            f"{stats['books']}, связей {stats['links']} (пропущено "
+            f"{stats['skipped_links']}), {total / elapsed if elapsed else 0:.0f} записей/с"
+        )
+
+    def import_file(
+        self,
+        importer: CatalogImporter,
+        path: str,
+        state: Dict[str, Any],
+        state_file: str,
+    ) -> None:
+        """Метод для импорта одного файла с сохранением позиции после каждой пачки"""
+        key: str = os.path.abspath(path)
+        stat = os.stat(path)
+        signature: Dict[str, int] = {"size": stat.st_size, "mtime": stat.st_mtime_ns}
+        entry: Dict[str, Any] = state.get(key, {})
+        if entry and any(entry.get(name) != value for name, value in signature.items()):
+            raise CommandError(f"{path}: файл изменился после прерванного импорта")
+        if entry.get("done"):
+            self.stdout.write(f"{path}: уже импортирован, пропуск")
+            return
+
+        skip: int = entry.get("records", 0)
+        records: int = skip
+        started: float = time.perf_counter()
+
+        def checkpoint(done: bool) -> None:
+            state[key] = {**signature, "records": records, "done": done}
+            temp: str = f"{state_file}.tmp"
+            with open(temp, "w", encoding="utf-8") as f:
+                json.dump(state, f, ensure_ascii=False, indent=2)
+            os.replace(temp, state_file)
+
+        if skip:
+            self.stdout.write(f"{path}: продолжение с записи {skip}")
+        with open_text(path) as stream:
+            try:
+                for index, record in enumerate(iter_records(stream)):
+                    if index < skip:
+                        continue
+                    try:
+                        full: bool = importer.add(record)
+                    except (ValueError, KeyError, TypeError) as e:
+                        raise CommandError(f"{path}: запись {index}: {e}")
+                    records = index + 1
+                    if full:
+                        importer.flush()
+                        checkpoint(done=False)
+                        elapsed: float = time.perf_counter() - started
+                        self.stdout.write(
+                            f"{path}: {records} записей, "
+                            f"{(records - skip) / elapsed:.0f} записей/с"
+                        )
+            except json.JSONDecodeError as e:
+                raise CommandError(f"{path}: неверный JSON: {e}")
+        importer.flush()
+        checkpoint(done=True)
+        self.stdout.write(f"{path}: {records} записей")
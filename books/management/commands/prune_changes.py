@@ -0,0 +1,19 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from books.changes import prune_tombstones
+
+
+class Command(BaseCommand):
+    help = (
+        "Удаление старых отметок об удалении из ленты изменений; клиенты с "
+        "более старым токеном получат 410 и выполнят полную синхронизацию"
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--days", type=int, default=30)
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        deleted: int = prune_tombstones(options["days"])
+        self.stdout.write(f"Удалено отметок об удалении: {deleted}")
@@ -0,0 +1,38 @@
+from typing import Any, List, Type
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import models, transaction
+
+from books.cache import bump_on_commit
+from books.counts import refresh_counts
+from books.models import Author, Book
+
+
+class Command(BaseCommand):
+    help = "Пересчет book_count у авторов и author_count у книг по таблице связей"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--batch-size", type=int, default=10000)
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        batch_size: int = options["batch_size"]
+        for model, field in ((Author, "author_ids"), (Book, "book_ids")):
+            total: int = self.rebuild(model, field, batch_size)
+            self.stdout.write(f"{model._meta.db_table}: пересчитано {total}")
+
+    def rebuild(self, model: Type[models.Model], field: str, batch_size: int) -> int:
+        """Метод для пересчета счетчиков пачками по первичному ключу"""
+        total: int = 0
+        last_pk: Any = None
+        while True:
+            queryset = model.objects.order_by("pk")
+            if last_pk is not None:
+                queryset = queryset.filter(pk__gt=last_pk)
+            pks: List[Any] = list(queryset.values_list("pk", flat=True)[:batch_size])
+            if not pks:
+                return total
+            with transaction.atomic():
+                refresh_counts(**{field: pks})
+                bump_on_commit("author", "book")
+            total += len(pks)
+            last_pk = pks[-1]
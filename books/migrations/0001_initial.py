@@ -0,0 +1,74 @@
+# Generated by Django 5.0.7 on 2026-10-18 12:47
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="Author",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                        unique=True,
+                        verbose_name="id",
+                    ),
+                ),
+                (
+                    "name",
+                    models.CharField(
+                        max_length=255, unique=True, verbose_name="Полное имя"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Автор",
+                "verbose_name_plural": "Авторы",
+                "db_table": "authors",
+            },
+        ),
+        migrations.CreateModel(
+            name="Book",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                        unique=True,
+                        verbose_name="id",
+                    ),
+                ),
+                (
+                    "title",
+                    models.CharField(
+                        max_length=100, unique=True, verbose_name="Название книги"
+                    ),
+                ),
+                (
+                    "authors",
+                    models.ManyToManyField(
+                        related_name="books", to="books.author", verbose_name="авторы"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Книга",
+                "verbose_name_plural": "Книги",
+                "db_table": "books",
+            },
+        ),
+    ]
@@ -0,0 +1,126 @@
+# Generated by Django 5.0.7 on 2026-10-18 12:47
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("books", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ChangeSequence",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("value", models.BigIntegerField(default=0)),
+                ("pruned", models.BigIntegerField(default=0)),
+            ],
+            options={
+                "db_table": "change_sequence",
+            },
+        ),
+        migrations.CreateModel(
+            name="Tombstone",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("model", models.CharField(max_length=16, verbose_name="Модель")),
+                ("object_id", models.UUIDField(null=True, verbose_name="id объекта")),
+                ("change_seq", models.BigIntegerField(verbose_name="Номер изменения")),
+                (
+                    "deleted_at",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now, verbose_name="Удален"
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "tombstones",
+            },
+        ),
+        migrations.AddField(
+            model_name="author",
+            name="book_count",
+            field=models.PositiveIntegerField(
+                db_index=True, default=0, editable=False, verbose_name="Количество книг"
+            ),
+        ),
+        migrations.AddField(
+            model_name="author",
+            name="change_seq",
+            field=models.BigIntegerField(
+                default=0, editable=False, verbose_name="Номер изменения"
+            ),
+        ),
+        migrations.AddField(
+            model_name="author",
+            name="updated_at",
+            field=models.DateTimeField(
+                default=django.utils.timezone.now,
+                editable=False,
+                verbose_name="Изменен",
+            ),
+        ),
+        migrations.AddField(
+            model_name="book",
+            name="author_count",
+            field=models.PositiveIntegerField(
+                db_index=True,
+                default=0,
+                editable=False,
+                verbose_name="Количество авторов",
+            ),
+        ),
+        migrations.AddField(
+            model_name="book",
+            name="change_seq",
+            field=models.BigIntegerField(
+                default=0, editable=False, verbose_name="Номер изменения"
+            ),
+        ),
+        migrations.AddField(
+            model_name="book",
+            name="updated_at",
+            field=models.DateTimeField(
+                default=django.utils.timezone.now,
+                editable=False,
+                verbose_name="Изменена",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="author",
+            index=models.Index(
+                fields=["change_seq", "id"], name="authors_change_seq_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="book",
+            index=models.Index(
+                fields=["change_seq", "id"], name="books_change_seq_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="tombstone",
+            index=models.Index(
+                fields=["change_seq", "id"], name="tombstones_change_seq_idx"
+            ),
+        ),
+    ]
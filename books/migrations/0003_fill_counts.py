@@ -0,0 +1,36 @@
+from django.db import migrations
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_counts(apps, schema_editor):
+    """Пересчет book_count/author_count у строк, созданных до появления счетчиков"""
+    using = schema_editor.connection.alias
+    Author = apps.get_model("books", "Author")
+    Book = apps.get_model("books", "Book")
+    BookAuthors = Book.authors.through
+    for model, field, counter in (
+        (Author, "author_id", "book_count"),
+        (Book, "book_id", "author_count"),
+    ):
+        links = (
+            BookAuthors.objects.using(using)
+            .filter(**{field: OuterRef("pk")})
+            .values(field)
+            .annotate(total=Count("*"))
+            .values("total")
+        )
+        model.objects.using(using).update(
+            **{counter: Coalesce(Subquery(links, output_field=IntegerField()), 0)}
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("books", "0002_counts_and_change_feed"),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_counts, migrations.RunPython.noop),
+    ]
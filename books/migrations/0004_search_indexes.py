@@ -0,0 +1,97 @@
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.contrib.postgres.operations import AddIndexConcurrently, TrigramExtension
+from django.db import migrations, models
+
+
+class PostgresOnly:
+    """Миксин для операций, которые на других СУБД меняют только состояние"""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != "postgresql":
+            return
+        super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != "postgresql":
+            return
+        super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+
+class SearchExtension(PostgresOnly, TrigramExtension):
+    """Операция для установки расширения pg_trgm"""
+
+
+class AddSearchIndex(PostgresOnly, AddIndexConcurrently):
+    """Операция для построения поискового индекса без блокировки записи
+
+    Индекс, уже построенный прежним обработчиком post_migrate под тем же
+    именем, не пересоздается.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        connection = schema_editor.connection
+        if connection.vendor != "postgresql":
+            return
+        model = to_state.apps.get_model(app_label, self.model_name)
+        with connection.cursor() as cursor:
+            existing = connection.introspection.get_constraints(
+                cursor, model._meta.db_table
+            )
+        if self.index.name in existing:
+            return
+        super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY не выполняется внутри транзакции
+    atomic = False
+
+    dependencies = [
+        ("books", "0003_fill_counts"),
+    ]
+
+    operations = [
+        SearchExtension(),
+        AddSearchIndex(
+            model_name="author",
+            index=models.Index(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("name"),
+                    name="text_pattern_ops",
+                ),
+                name="authors_name_prefix_idx",
+            ),
+        ),
+        AddSearchIndex(
+            model_name="author",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("name"),
+                    name="gin_trgm_ops",
+                ),
+                name="authors_name_trgm_idx",
+            ),
+        ),
+        AddSearchIndex(
+            model_name="book",
+            index=models.Index(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("title"),
+                    name="text_pattern_ops",
+                ),
+                name="books_title_prefix_idx",
+            ),
+        ),
+        AddSearchIndex(
+            model_name="book",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("title"),
+                    name="gin_trgm_ops",
+                ),
+                name="books_title_trgm_idx",
+            ),
+        ),
+    ]
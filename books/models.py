@@ -1,6 +1,19 @@
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.db import models, router, transaction
+from django.db.models.functions import Upper
+from django.utils import timezone
 import uuid
-from typing import Any
+from datetime import datetime
+from typing import Any, List, Optional
+
+
+def saved_fields(instance: models.Model, *excluded: str) -> List[str]:
+    """Метод для получения всех сохраняемых полей модели, кроме excluded"""
+    return [
+        field.name
+        for field in instance._meta.concrete_fields
+        if not field.primary_key and field.name not in excluded
+    ]
 
 
 class Author(models.Model):
@@ -16,11 +29,28 @@ class Author(models.Model):
     name: str = models.CharField(
         max_length=255, unique=True, null=False, blank=False, verbose_name="Полное имя"
     )
+    book_count: int = models.PositiveIntegerField(
+        default=0, editable=False, db_index=True, verbose_name="Количество книг"
+    )
+    updated_at: datetime = models.DateTimeField(
+        default=timezone.now, editable=False, verbose_name="Изменен"
+    )
+    change_seq: int = models.BigIntegerField(
+        default=0, editable=False, verbose_name="Номер изменения"
+    )
 
     def save(self, *args: Any, **kwargs: Any) -> None:
         """Метод для сохранеения без пробелов в начале и конце"""
         self.name = self.name.strip()
-        super().save(*args, **kwargs)
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            # Счетчик ведут сигналы связей, устаревшее значение не перезаписываем
+            kwargs["update_fields"] = saved_fields(self, "book_count")
+        # Номер изменения берется в pre_save и фиксируется вместе со строкой
+        using: str = kwargs.get("using") or router.db_for_write(
+            type(self), instance=self
+        )
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
 
     def __str__(self) -> str:
         return self.name
@@ -29,6 +59,19 @@ class Author(models.Model):
         db_table = "authors"
         verbose_name: str = "Автор"
         verbose_name_plural: str = "Авторы"
+        indexes: List[models.Index] = [
+            models.Index(fields=["change_seq", "id"], name="authors_change_seq_idx"),
+            # UPPER(...) совпадает с выражением, которое Django строит для
+            # istartswith/icontains; text_pattern_ops нужен для LIKE 'x%'
+            models.Index(
+                OpClass(Upper("name"), name="text_pattern_ops"),
+                name="authors_name_prefix_idx",
+            ),
+            GinIndex(
+                OpClass(Upper("name"), name="gin_trgm_ops"),
+                name="authors_name_trgm_idx",
+            ),
+        ]
 
 
 class Book(models.Model):
@@ -51,11 +94,27 @@ class Book(models.Model):
     authors: models.ManyToManyField = models.ManyToManyField(
         Author, verbose_name="авторы", related_name="books"
     )
+    author_count: int = models.PositiveIntegerField(
+        default=0, editable=False, db_index=True, verbose_name="Количество авторов"
+    )
+    updated_at: datetime = models.DateTimeField(
+        default=timezone.now, editable=False, verbose_name="Изменена"
+    )
+    change_seq: int = models.BigIntegerField(
+        default=0, editable=False, verbose_name="Номер изменения"
+    )
 
     def save(self, *args: Any, **kwargs: Any) -> None:
         """Метод для сохранеения без пробелов в начале и конце"""
         self.title = self.title.strip()
-        super().save(*args, **kwargs)
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = saved_fields(self, "author_count")
+        # Номер изменения берется в pre_save и фиксируется вместе со строкой
+        using: str = kwargs.get("using") or router.db_for_write(
+            type(self), instance=self
+        )
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
 
     def __str__(self) -> str:
         return self.title
@@ -64,3 +123,52 @@ class Book(models.Model):
         db_table = "books"
         verbose_name: str = "Книга"
         verbose_name_plural: str = "Книги"
+        indexes: List[models.Index] = [
+            models.Index(fields=["change_seq", "id"], name="books_change_seq_idx"),
+            models.Index(
+                OpClass(Upper("title"), name="text_pattern_ops"),
+                name="books_title_prefix_idx",
+            ),
+            GinIndex(
+                OpClass(Upper("title"), name="gin_trgm_ops"),
+                name="books_title_trgm_idx",
+            ),
+        ]
+
+
+class ChangeSequence(models.Model):
+    """Модель для счетчика номеров изменений каталога (одна строка)
+
+    Номер увеличивается UPDATE внутри транзакции записи, блокировка строки
+    держится до фиксации, поэтому номера видны читателям в порядке фиксации,
+    а транзакции записи каталога выполняются по очереди.
+    pruned - наибольший номер удаленных при очистке отметок об удалении.
+    """
+
+    value: int = models.BigIntegerField(default=0)
+    pruned: int = models.BigIntegerField(default=0)
+
+    class Meta:
+        db_table = "change_sequence"
+
+
+class Tombstone(models.Model):
+    """Модель для отметки об удалении автора или книги в ленте изменений
+
+    object_id = NULL означает удаление всех объектов модели (TRUNCATE).
+    """
+
+    model: str = models.CharField(max_length=16, verbose_name="Модель")
+    object_id: Optional[uuid.UUID] = models.UUIDField(
+        null=True, verbose_name="id объекта"
+    )
+    change_seq: int = models.BigIntegerField(verbose_name="Номер изменения")
+    deleted_at: datetime = models.DateTimeField(
+        default=timezone.now, verbose_name="Удален"
+    )
+
+    class Meta:
+        db_table = "tombstones"
+        indexes: List[models.Index] = [
+            models.Index(fields=["change_seq", "id"], name="tombstones_change_seq_idx")
+        ]
@@ -0,0 +1,64 @@
+from typing import Any, Dict, List, Optional
+
+from django.db.models.query import QuerySet
+from rest_framework.pagination import CursorPagination, LimitOffsetPagination
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetCursorPagination(CursorPagination):
+    """Класс для курсорной (keyset) пагинации по первичному ключу
+
+    Страница выбирается условием ``id > <курсор>`` вместо OFFSET, поэтому
+    стоимость запроса не зависит от глубины, а порядок не сдвигается при
+    одновременных вставках.
+    """
+
+    ordering: str = "id"
+    page_size_query_param: str = "page_size"
+    max_page_size: int = 1000
+
+
+class RankedPagination(LimitOffsetPagination):
+    """Класс для пагинации результатов поиска, упорядоченных по релевантности
+
+    Вместо COUNT(*) по всем совпадениям выбирается limit + 1 строка, по
+    лишней строке определяется наличие следующей страницы.
+    """
+
+    max_limit: int = 1000
+
+    def paginate_queryset(
+        self, queryset: QuerySet, request: Request, view: Any = None
+    ) -> List[Any]:
+        self.request = request
+        self.limit = self.get_limit(request)
+        self.offset = self.get_offset(request)
+        rows: List[Any] = list(queryset[self.offset : self.offset + self.limit + 1])
+        self.has_next = len(rows) > self.limit
+        return rows[: self.limit]
+
+    def get_next_link(self) -> Optional[str]:
+        if not self.has_next:
+            return None
+        url: str = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.limit_query_param, self.limit)
+        return replace_query_param(
+            url, self.offset_query_param, self.offset + self.limit
+        )
+
+    def get_paginated_response(self, data: Any) -> Response:
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema: Dict[str, Any]) -> Dict[str, Any]:
+        response_schema: Dict[str, Any] = super().get_paginated_response_schema(schema)
+        response_schema["properties"].pop("count", None)
+        response_schema["required"] = ["results"]
+        return response_schema
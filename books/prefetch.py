@@ -0,0 +1,155 @@
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple, Type
+
+from django.db.models import Prefetch
+from django.db.models.query import QuerySet
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+SPARSE_PARAMS: Tuple[str, ...] = ("fields", "expand")
+
+
+def _related_model(model: Any, source: str) -> Any:
+    """Метод для получения модели, на которую ссылается поле связи"""
+    return model._meta.get_field(source).related_model
+
+
+def _concrete_columns(model: Any) -> FrozenSet[str]:
+    """Метод для получения имен обычных (не связанных) полей модели"""
+    return frozenset(
+        field.name
+        for field in model._meta.concrete_fields
+        if not field.is_relation or field.many_to_one
+    )
+
+
+def _walk(
+    serializer: serializers.Serializer, model: Any, prefix: str, trim: bool
+) -> Tuple[List[str], List[Prefetch], List[str]]:
+    """Метод для обхода дерева сериализатора и сбора select/prefetch связей и колонок"""
+    select: List[str] = []
+    prefetch: List[Prefetch] = []
+    only: List[str] = ["pk"]
+    columns: FrozenSet[str] = _concrete_columns(model)
+
+    for field in serializer.fields.values():
+        source: str = field.source
+        if source == "*" or "." in source:
+            continue
+
+        if isinstance(field, serializers.ListSerializer) and isinstance(
+            field.child, serializers.ModelSerializer
+        ):
+            child = field.child
+            child_model = child.Meta.model
+            child_select, child_prefetch, child_only = _walk(
+                child, child_model, "", trim
+            )
+            queryset: QuerySet = child_model.objects.all()
+            if trim:
+                queryset = queryset.only(*child_only)
+            if child_select:
+                queryset = queryset.select_related(*child_select)
+            if child_prefetch:
+                queryset = queryset.prefetch_related(*child_prefetch)
+            prefetch.append(Prefetch(prefix + source, queryset=queryset))
+
+        elif isinstance(field, serializers.ModelSerializer):
+            select.append(prefix + source)
+            only.append(source)
+            child_select, child_prefetch, _ = _walk(
+                field, field.Meta.model, prefix + source + "__", False
+            )
+            select.extend(child_select)
+            prefetch.extend(child_prefetch)
+
+        elif isinstance(field, serializers.ManyRelatedField):
+            related = _related_model(model, source)
+            # Для PrimaryKeyRelatedField нужен только первичный ключ
+            prefetch.append(
+                Prefetch(prefix + source, queryset=related.objects.only("pk"))
+            )
+
+        elif isinstance(field, serializers.RelatedField):
+            select.append(prefix + source)
+            only.append(source)
+
+        elif source in columns:
+            only.append(source)
+
+    return select, prefetch, only
+
+
+@lru_cache(maxsize=256)
+def plan_for(
+    serializer_class: Type[serializers.ModelSerializer],
+    fields: Optional[FrozenSet[str]] = None,
+    expand: Optional[FrozenSet[str]] = None,
+) -> Tuple[Tuple[str, ...], Tuple[Prefetch, ...], Optional[Tuple[str, ...]]]:
+    """Метод для построения плана select_related/prefetch_related/only по сериализатору
+
+    Колонки (only) ограничиваются только при явно запрошенных полях.
+    """
+    kwargs: Dict[str, FrozenSet[str]] = {}
+    if fields is not None:
+        kwargs["fields"] = fields
+    if expand:
+        kwargs["expand"] = expand
+    trim: bool = fields is not None
+    select, prefetch, only = _walk(
+        serializer_class(**kwargs), serializer_class.Meta.model, "", trim
+    )
+    return tuple(select), tuple(prefetch), tuple(only) if trim else None
+
+
+def apply_plan(
+    queryset: QuerySet,
+    serializer_class: Type[serializers.ModelSerializer],
+    fields: Optional[FrozenSet[str]] = None,
+    expand: Optional[FrozenSet[str]] = None,
+) -> QuerySet:
+    """Метод для применения плана загрузки связей к queryset"""
+    select, prefetch, only = plan_for(serializer_class, fields, expand)
+    if only is not None:
+        queryset = queryset.only(*only)
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        # Каждому запросу свои копии Prefetch, чтобы не делить состояние queryset
+        queryset = queryset.prefetch_related(
+            *(
+                Prefetch(lookup.prefetch_through, queryset=lookup.queryset.all())
+                for lookup in prefetch
+            )
+        )
+    return queryset
+
+
+class PrefetchRelatedMixin:
+    """Миксин для представлений, подгружающий связи сериализатора фиксированным числом запросов
+
+    Для безопасных методов поддерживает ?fields= и ?expand= (см.
+    SparseFieldsMixin): связи, которых нет в ответе, не подгружаются, а при
+    заданном ?fields= из БД выбираются только нужные колонки.
+    """
+
+    def sparse_fields(self) -> Dict[str, FrozenSet[str]]:
+        request = getattr(self, "request", None)
+        if request is None or request.method not in SAFE_METHODS:
+            return {}
+        sparse: Dict[str, FrozenSet[str]] = {}
+        for param in SPARSE_PARAMS:
+            value: Optional[str] = request.query_params.get(param)
+            if value is not None:
+                sparse[param] = frozenset(
+                    part.strip() for part in value.split(",") if part.strip()
+                )
+        return sparse
+
+    def get_serializer(self, *args: Any, **kwargs: Any) -> serializers.BaseSerializer:
+        kwargs.update(self.sparse_fields())
+        return super().get_serializer(*args, **kwargs)
+
+    def get_queryset(self) -> QuerySet:
+        queryset: QuerySet = super().get_queryset()
+        return apply_plan(queryset, self.get_serializer_class(), **self.sparse_fields())
@@ -0,0 +1,91 @@
+from typing import Any, List, Optional, Set, Tuple, Type
+
+from django.db import connections, models, transaction
+from django.db.models.query import QuerySet
+
+from .cache import bump_on_commit
+from .changes import next_change_seq, record_deletes, touch
+from .counts import refresh_counts
+from .models import Author, Book
+
+PURGE_BATCH_SIZE: int = 5000
+MAX_PURGE_BATCH_SIZE: int = 50000
+
+BookAuthors: Type[models.Model] = Book.authors.through
+
+
+def _sides(model: Type[models.Model]) -> Tuple[str, str, Type[models.Model], str]:
+    """Метод для получения полей связи: (своя колонка, чужая колонка, чужая модель, счетчик)"""
+    if model is Author:
+        return "author_id", "book_id", Book, "author_count"
+    return "book_id", "author_id", Author, "book_count"
+
+
+def _truncate(model: Type[models.Model], using: str) -> None:
+    """Метод для очистки таблицы и таблицы связей одной командой TRUNCATE"""
+    _, _, other, counter = _sides(model)
+    quote = connections[using].ops.quote_name
+    with transaction.atomic(using=using):
+        seq: int = next_change_seq(using)
+        with connections[using].cursor() as cursor:
+            cursor.execute(
+                f"TRUNCATE {quote(BookAuthors._meta.db_table)}, "
+                f"{quote(model._meta.db_table)}"
+            )
+        linked: QuerySet = other.objects.using(using).filter(**{f"{counter}__gt": 0})
+        # Одна отметка на все удаленные строки, связанные объекты теряют связи
+        record_deletes(model, None, using, seq=seq)
+        touch(
+            **{f"{other._meta.model_name}_ids": linked.values("pk")},
+            using=using,
+            seq=seq,
+        )
+        linked.update(**{counter: 0})
+        bump_on_commit("author", "book", using=using)
+
+
+def purge(queryset: QuerySet, batch_size: int = PURGE_BATCH_SIZE) -> Optional[int]:
+    """Метод для удаления строк queryset без загрузки объектов моделей
+
+    Без фильтра на PostgreSQL выполняется TRUNCATE (число строк неизвестно,
+    возвращается None). Иначе строки удаляются пачками по batch_size, каждая
+    в своей короткой транзакции: DELETE связей и DELETE строк по списку id,
+    затем пересчет счетчиков у затронутых объектов другой стороны связи.
+    Сигналы pre_delete/post_delete при этом не отправляются.
+    """
+    model: Type[models.Model] = queryset.model
+    using: str = queryset.db
+    if not queryset.query.has_filters() and connections[using].vendor == "postgresql":
+        _truncate(model, using)
+        return None
+
+    owner_field, other_field, other, _ = _sides(model)
+    queryset = queryset.order_by("pk").values_list("pk", flat=True)
+    total: int = 0
+    while True:
+        with transaction.atomic(using=using):
+            pks: List[Any] = list(queryset[:batch_size])
+            if not pks:
+                return total
+            seq: int = next_change_seq(using)
+            links: QuerySet = BookAuthors.objects.using(using).filter(
+                **{f"{owner_field}__in": pks}
+            )
+            touched: Set[Any] = set(links.values_list(other_field, flat=True))
+            # У таблицы связей нет сигналов, delete() выполняет один DELETE
+            links.delete()
+            # QuerySet.delete() для авторов и книг загрузил бы объекты ради
+            # сигналов удаления (books/signals.py) и их же связей. Частный
+            # _raw_delete - единственный способ выполнить один DELETE по id
+            # без Collector; его наличие закреплено тестом PurgeTests
+            model.objects.using(using).filter(pk__in=pks)._raw_delete(using)
+            if other is Author:
+                refresh_counts(author_ids=touched)
+            else:
+                refresh_counts(book_ids=touched)
+            record_deletes(model, pks, using, seq=seq)
+            touch(**{f"{other._meta.model_name}_ids": touched}, using=using, seq=seq)
+            bump_on_commit("author", "book", using=using)
+        total += len(pks)
+        if len(pks) < batch_size:
+            return total
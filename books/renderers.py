@@ -0,0 +1,41 @@
+from typing import Any, Mapping, Optional
+
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """Класс для рендеринга JSON через orjson
+
+    Вывод совпадает с JSONRenderer в компактном режиме: типы, которых нет в
+    orjson (и datetime, чтобы сохранить формат DRF), передаются в
+    rest_framework.utils.encoders.JSONEncoder. Если orjson не установлен или
+    запрошен отступ, используется стандартный JSONRenderer.
+    """
+
+    def render(
+        self,
+        data: Any,
+        accepted_media_type: Optional[str] = None,
+        renderer_context: Optional[Mapping[str, Any]] = None,
+    ) -> bytes:
+        if orjson is None or data is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        content: bytes = orjson.dumps(
+            data,
+            default=self.encoder_class().default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME,
+        )
+        # Как и JSONRenderer, экранируем разделители строк для встраивания в JS
+        if b"\xe2\x80\xa8" in content or b"\xe2\x80\xa9" in content:
+            content = content.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+                b"\xe2\x80\xa9", b"\\u2029"
+            )
+        return content
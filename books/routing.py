@@ -0,0 +1,289 @@
+import math
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Type,
+)
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Model
+from django.http import HttpRequest, HttpResponse
+from rest_framework.permissions import SAFE_METHODS
+
+APP_LABEL: str = "books"
+STICKY_COOKIE: str = "books_primary_until"
+STICKY_KEY: str = "books:primary:{}"
+STRATEGIES = ("round-robin", "least-loaded")
+
+# Реплика, выбранная для текущего запроса (None - основная БД)
+_read_alias: ContextVar[Optional[str]] = ContextVar("books_read_alias", default=None)
+
+
+def replica_aliases() -> List[str]:
+    """Метод для получения алиасов реплик из настройки DATABASE_REPLICAS"""
+    return list(getattr(settings, "DATABASE_REPLICAS", ()))
+
+
+def read_alias() -> Optional[str]:
+    """Метод для получения реплики, с которой читает текущий запрос"""
+    return _read_alias.get()
+
+
+@contextmanager
+def read_from(alias: Optional[str]) -> Iterator[None]:
+    """Метод для чтения моделей books из указанной БД внутри блока with"""
+    token = _read_alias.set(alias)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+class ReplicaSelector:
+    """Класс для выбора реплики по кругу или по наименьшему числу запросов в работе
+
+    Счетчики ведутся в пределах процесса, при равной загрузке реплики
+    чередуются по кругу.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._next: int = 0
+        self._in_flight: Dict[str, int] = defaultdict(int)
+
+    def acquire(self, aliases: Sequence[str], strategy: str = "round-robin") -> str:
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Неизвестная стратегия выбора реплики: {strategy}")
+        with self._lock:
+            start: int = self._next % len(aliases)
+            self._next += 1
+            ordered: List[str] = [*aliases[start:], *aliases[:start]]
+            alias: str = (
+                min(ordered, key=lambda name: self._in_flight[name])
+                if strategy == "least-loaded"
+                else ordered[0]
+            )
+            self._in_flight[alias] += 1
+            return alias
+
+    def release(self, alias: str) -> None:
+        with self._lock:
+            self._in_flight[alias] -= 1
+
+    def in_flight(self, alias: str) -> int:
+        return self._in_flight[alias]
+
+
+SELECTOR: ReplicaSelector = ReplicaSelector()
+# Конец потока в _stream/_astream
+_DONE: object = object()
+
+
+def _releaser(alias: str) -> Callable[[], None]:
+    """Метод для освобождения реплики не больше одного раза"""
+    released: List[bool] = []
+
+    def release() -> None:
+        if not released:
+            released.append(True)
+            SELECTOR.release(alias)
+
+    return release
+
+
+def _stream(
+    chunks: Iterator[bytes], alias: str, release: Callable[[], None]
+) -> Iterator[bytes]:
+    """Метод для чтения потокового ответа с реплики alias до конца потока
+
+    Запросы к БД в генераторе (выгрузка NDJSON) выполняются при отдаче тела,
+    уже после выхода из middleware, поэтому реплика выставляется на каждый
+    шаг, а слот освобождается, когда поток закончен или ответ закрыт.
+    """
+    iterator: Iterator[bytes] = iter(chunks)
+    try:
+        while True:
+            with read_from(alias):
+                chunk: Any = next(iterator, _DONE)
+            if chunk is _DONE:
+                return
+            yield chunk
+    finally:
+        release()
+
+
+async def _astream(
+    chunks: AsyncIterator[bytes], alias: str, release: Callable[[], None]
+) -> AsyncIterator[bytes]:
+    """Метод для чтения асинхронного потокового ответа с реплики alias"""
+    iterator: AsyncIterator[bytes] = aiter(chunks)
+    try:
+        while True:
+            with read_from(alias):
+                chunk: Any = await anext(iterator, _DONE)
+            if chunk is _DONE:
+                return
+            yield chunk
+    finally:
+        release()
+
+
+class ReplicaRouter:
+    """Роутер, направляющий чтение моделей books на реплику текущего запроса
+
+    Реплику выбирает ReplicaRoutingMiddleware только для безопасных методов;
+    запись и миграции всегда идут в основную БД.
+    """
+
+    def db_for_read(self, model: Type[Model], **hints: Any) -> Optional[str]:
+        if model._meta.app_label != APP_LABEL:
+            return None
+        return _read_alias.get()
+
+    def db_for_write(self, model: Type[Model], **hints: Any) -> Optional[str]:
+        # Объект, прочитанный с реплики, сохраняется в основную БД
+        if model._meta.app_label == APP_LABEL and replica_aliases():
+            return DEFAULT_DB_ALIAS
+        return None
+
+    def allow_relation(self, obj1: Model, obj2: Model, **hints: Any) -> Optional[bool]:
+        databases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db: str, app_label: str, **hints: Any) -> Optional[bool]:
+        if db in replica_aliases():
+            return False
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    """Middleware для выбора реплики на время GET/HEAD/OPTIONS-запроса
+
+    После успешной записи клиент на REPLICA_STICKY_SECONDS читает из
+    основной БД (read-your-writes): отметка хранится в cookie и в кэше по
+    адресу клиента для клиентов без cookie.
+    """
+
+    sync_capable: bool = True
+    async_capable: bool = True
+
+    def __init__(self, get_response: Callable[[HttpRequest], Any]) -> None:
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> Any:
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        aliases: List[str] = replica_aliases()
+        if not aliases:
+            return self.get_response(request)
+
+        if request.method not in SAFE_METHODS:
+            return self.after_write(request, self.get_response(request))
+
+        if self.pinned(request):
+            return self.get_response(request)
+
+        alias: str = self.acquire(aliases)
+        try:
+            with read_from(alias):
+                response: HttpResponse = self.get_response(request)
+        except BaseException:
+            SELECTOR.release(alias)
+            raise
+        return self.hold(response, alias)
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        aliases: List[str] = replica_aliases()
+        if not aliases:
+            return await self.get_response(request)
+
+        if request.method not in SAFE_METHODS:
+            return self.after_write(request, await self.get_response(request))
+
+        if self.pinned(request):
+            return await self.get_response(request)
+
+        alias: str = self.acquire(aliases)
+        try:
+            with read_from(alias):
+                response: HttpResponse = await self.get_response(request)
+        except BaseException:
+            SELECTOR.release(alias)
+            raise
+        return self.hold(response, alias)
+
+    def acquire(self, aliases: List[str]) -> str:
+        return SELECTOR.acquire(
+            aliases, getattr(settings, "REPLICA_SELECTION", "round-robin")
+        )
+
+    def hold(self, response: HttpResponse, alias: str) -> HttpResponse:
+        """Метод для освобождения реплики после ответа или после его потока"""
+        if not response.streaming:
+            SELECTOR.release(alias)
+            return response
+        release: Callable[[], None] = _releaser(alias)
+        if response.is_async:
+            response.streaming_content = _astream(
+                response.streaming_content, alias, release
+            )
+        else:
+            response.streaming_content = _stream(
+                response.streaming_content, alias, release
+            )
+        # Поток, который не начали читать (HEAD, обрыв), закрывается с ответом
+        response._resource_closers.append(release)
+        return response
+
+    def after_write(self, request: HttpRequest, response: HttpResponse) -> HttpResponse:
+        if response.status_code < 400:
+            self.pin(request, response)
+        return response
+
+    def sticky_seconds(self) -> float:
+        return float(getattr(settings, "REPLICA_STICKY_SECONDS", 5))
+
+    def pin(self, request: HttpRequest, response: HttpResponse) -> None:
+        """Метод для закрепления клиента за основной БД после записи"""
+        seconds: float = self.sticky_seconds()
+        if seconds <= 0:
+            return
+        response.set_cookie(
+            STICKY_COOKIE,
+            str(time.time() + seconds),
+            max_age=math.ceil(seconds),
+            httponly=True,
+            samesite="Lax",
+        )
+        caches["default"].set(
+            STICKY_KEY.format(request.META.get("REMOTE_ADDR")), True, seconds
+        )
+
+    def pinned(self, request: HttpRequest) -> bool:
+        """Метод для проверки, не было ли у клиента записи в последние секунды"""
+        try:
+            if float(request.COOKIES.get(STICKY_COOKIE, 0)) > time.time():
+                return True
+        except ValueError:
+            pass
+        return bool(
+            caches["default"].get(STICKY_KEY.format(request.META.get("REMOTE_ADDR")))
+        )
@@ -0,0 +1,227 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from importlib import import_module
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
+from drf_spectacular.settings import spectacular_settings
+from drf_spectacular.views import SpectacularAPIView
+from rest_framework.renderers import BaseRenderer
+from rest_framework.request import Request
+
+from .compression import cached_encoding, compress, mark_encoded
+
+logger = logging.getLogger(__name__)
+
+# Пакеты, от версии которых зависит содержимое схемы
+SCHEMA_PACKAGES: Tuple[str, ...] = ("django", "djangorestframework", "drf-spectacular")
+# Файлы приложений, которые не влияют на схему
+IGNORED_SOURCES: Tuple[str, ...] = ("tests", "migrations", "management")
+
+
+def schema_path() -> Path:
+    """Метод для получения пути к собранной схеме (OPENAPI_SCHEMA_PATH)"""
+    return Path(
+        getattr(settings, "OPENAPI_SCHEMA_PATH", None)
+        or Path(settings.BASE_DIR) / "openapi.json"
+    )
+
+
+def source_files() -> List[Path]:
+    """Метод для получения исходников, из которых строится схема
+
+    Это модуль ROOT_URLCONF и модули приложений проекта (представления,
+    сериализаторы, url), без тестов, миграций и команд.
+    """
+    base: Path = Path(settings.BASE_DIR).resolve()
+    files: List[Path] = [Path(import_module(settings.ROOT_URLCONF).__file__).resolve()]
+    for app in settings.INSTALLED_APPS:
+        module: Any = import_module(app.rpartition(".apps.")[0] or app)
+        root: Path = Path(module.__file__).resolve().parent
+        # Сторонние пакеты (в том числе из venv внутри проекта) не учитываются
+        if base not in root.parents or "site-packages" in root.parts:
+            continue
+        for path in sorted(root.rglob("*.py")):
+            if not set(path.relative_to(root).parts) & set(IGNORED_SOURCES):
+                files.append(path)
+    return files
+
+
+def source_hash() -> str:
+    """Метод для подсчета хэша всего, от чего зависит схема
+
+    Исходники url, представлений и сериализаторов, настройки
+    SPECTACULAR_SETTINGS и REST_FRAMEWORK и версии пакетов. Схема
+    собирается заново, только если хэш изменился.
+    """
+    digest = hashlib.sha256()
+    base: Path = Path(settings.BASE_DIR).resolve()
+    for path in source_files():
+        name: Path = path.relative_to(base) if base in path.parents else path
+        digest.update(str(name).encode() + b"\0" + path.read_bytes() + b"\0")
+    config: Dict[str, Any] = {
+        "spectacular": getattr(settings, "SPECTACULAR_SETTINGS", {}),
+        "rest_framework": getattr(settings, "REST_FRAMEWORK", {}),
+        "packages": {name: _package_version(name) for name in SCHEMA_PACKAGES},
+    }
+    digest.update(json.dumps(config, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+def _package_version(name: str) -> Optional[str]:
+    try:
+        return version(name)
+    except PackageNotFoundError:  # pragma: no cover
+        return None
+
+
+def generate_schema() -> Dict[str, Any]:
+    """Метод для построения схемы обходом всех представлений (как spectacular --file)"""
+    generator: Any = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+    schema: Dict[str, Any] = generator.get_schema(request=None, public=True)
+    # Ленивые строки и перечисления приводятся к JSON так же, как при отдаче
+    return json.loads(json.dumps(schema, default=str))
+
+
+def read_artifact(path: Path) -> Optional[Dict[str, Any]]:
+    """Метод для чтения собранной схемы: {"hash": ..., "schema": ...}"""
+    try:
+        with open(path, encoding="utf-8") as file:
+            artifact: Any = json.load(file)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(artifact, dict) or "hash" not in artifact:
+        return None
+    return artifact
+
+
+def build_schema(path: Optional[Path] = None, force: bool = False) -> bool:
+    """Метод для сборки схемы в файл, если хэш исходников изменился
+
+    Возвращает True, если файл записан заново. Запись идет во временный
+    файл с заменой, чтобы воркер не прочитал схему наполовину.
+    """
+    path = Path(path or schema_path())
+    current: str = source_hash()
+    artifact: Optional[Dict[str, Any]] = read_artifact(path)
+    if not force and artifact is not None and artifact["hash"] == current:
+        return False
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary: Path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(temporary, "w", encoding="utf-8") as file:
+        json.dump({"hash": current, "schema": generate_schema()}, file)
+    os.replace(temporary, path)
+    return True
+
+
+class SchemaStore:
+    """Класс для схемы OpenAPI в памяти процесса
+
+    Схема загружается при первом запросе к /api/schema/, а не при старте
+    воркера: из файла OPENAPI_SCHEMA_PATH (команда build_schema), если его
+    хэш совпадает с исходниками, иначе строится заново с предупреждением в
+    логе. Каждый формат и сжатый вариант рендерится один раз.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.hash: Optional[str] = None
+        self.schema: Optional[Dict[str, Any]] = None
+        # (media type, кодировка или "") -> тело ответа
+        self.rendered: Dict[Tuple[str, str], bytes] = {}
+
+    def load(self) -> None:
+        """Метод для загрузки схемы, если она еще не загружена"""
+        if self.schema is not None:
+            return
+        with self._lock:
+            if self.schema is not None:
+                return
+            current: str = source_hash()
+            artifact: Optional[Dict[str, Any]] = read_artifact(schema_path())
+            if artifact is not None and artifact["hash"] == current:
+                schema: Dict[str, Any] = artifact["schema"]
+            else:
+                logger.warning(
+                    "Схема OpenAPI %s устарела или не собрана, строится при запросе; "
+                    "выполните python manage.py build_schema",
+                    schema_path(),
+                )
+                schema = generate_schema()
+            self.rendered = {}
+            self.hash, self.schema = current, schema
+
+    def etag(self, renderer: BaseRenderer) -> str:
+        self.load()
+        return f'"{self.hash[:32]}-{renderer.format}"'
+
+    def render(self, renderer: BaseRenderer, encoding: Optional[str] = None) -> bytes:
+        """Метод для получения отрендеренной (и сжатой) схемы"""
+        self.load()
+        key: Tuple[str, str] = (renderer.media_type, encoding or "")
+        content: Optional[bytes] = self.rendered.get(key)
+        if content is None:
+            if encoding:
+                content = compress(self.render(renderer), encoding)
+            else:
+                content = renderer.render(self.schema, renderer.media_type, {})
+            self.rendered[key] = content
+        return content
+
+    def clear(self) -> None:
+        with self._lock:
+            self.hash, self.schema, self.rendered = None, None, {}
+
+
+STORE: SchemaStore = SchemaStore()
+
+
+class CachedSchemaView(SpectacularAPIView):
+    """Класс для отдачи заранее собранной схемы OpenAPI с ETag
+
+    Формат выбирается по Accept, как у SpectacularAPIView. Запросы с ?lang=
+    или ?version= и представления с собственными настройками строят схему
+    обычным способом.
+    """
+
+    def _get_schema_response(self, request: Request) -> HttpResponse:
+        custom: bool = any(
+            (self.urlconf, self.api_version, self.custom_settings, self.patterns)
+        )
+        if custom or request.GET.get("lang") or request.GET.get("version"):
+            return super()._get_schema_response(request)
+
+        renderer: BaseRenderer = request.accepted_renderer
+        etag: str = STORE.etag(renderer)
+        if {etag, f"W/{etag}"} & set(
+            parse_etags(request.headers.get("If-None-Match", ""))
+        ):
+            response: HttpResponse = HttpResponseNotModified()
+            response["ETag"] = etag
+            return response
+
+        content_type: str = renderer.media_type
+        if renderer.charset:
+            content_type += f"; charset={renderer.charset}"
+        content: bytes = STORE.render(renderer)
+        encoding: Optional[str] = cached_encoding(request, content, content_type)
+        response = HttpResponse(
+            STORE.render(renderer, encoding) if encoding else content,
+            content_type=content_type,
+        )
+        response["ETag"] = etag
+        # Клиент каждый раз сверяет ETag: схема меняется с выкладкой
+        response["Cache-Control"] = "no-cache"
+        response["Content-Disposition"] = 'inline; filename="{}.{}"'.format(
+            spectacular_settings.TITLE or "schema", renderer.format
+        )
+        if encoding:
+            mark_encoded(response, encoding)
+        return response
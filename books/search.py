@@ -0,0 +1,75 @@
+from typing import List, Optional
+
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db import connections
+from django.db.models import Value
+from django.db.models.functions import Abs, Length, Upper
+from django.db.models.query import QuerySet
+from drf_spectacular.utils import OpenApiParameter
+from rest_framework import serializers
+from rest_framework.pagination import BasePagination
+
+from .pagination import RankedPagination
+
+SEARCH_MODES: List[str] = ["prefix", "contains", "fuzzy"]
+
+SEARCH_PARAMETERS: List[OpenApiParameter] = [
+    OpenApiParameter("q", str, description="Строка поиска"),
+    OpenApiParameter(
+        "mode", str, enum=SEARCH_MODES, description="Режим поиска, по умолчанию prefix"
+    ),
+]
+
+
+def search_queryset(
+    queryset: QuerySet, field: str, term: str, mode: str, vendor: str
+) -> QuerySet:
+    """Метод для поиска по полю с сортировкой по релевантности"""
+    if mode == "prefix":
+        return queryset.filter(**{f"{field}__istartswith": term}).order_by(field, "pk")
+    if mode == "contains":
+        return queryset.filter(**{f"{field}__icontains": term}).order_by(field, "pk")
+
+    if vendor == "postgresql":
+        # Выражение совпадает с GIN-индексом UPPER(field) gin_trgm_ops (Meta.indexes)
+        return (
+            queryset.annotate(search_key=Upper(field))
+            .filter(search_key__trigram_similar=term.upper())
+            .annotate(similarity=TrigramSimilarity(Upper(field), term.upper()))
+            .order_by("-similarity", field, "pk")
+        )
+    # Переносимый вариант без pg_trgm: подстрока, ближайшие по длине выше
+    return (
+        queryset.filter(**{f"{field}__icontains": term})
+        .annotate(distance=Abs(Length(field) - Value(len(term))))
+        .order_by("distance", field, "pk")
+    )
+
+
+class SearchMixin:
+    """Миксин для представлений-фильтров с поиском ?q=&mode=prefix|contains|fuzzy"""
+
+    search_field: str
+
+    def search_term(self) -> Optional[str]:
+        term: str = self.request.query_params.get("q", "").strip()
+        return term or None
+
+    @property
+    def paginator(self) -> Optional[BasePagination]:
+        if not hasattr(self, "_paginator"):
+            if self.search_term() is None:
+                return super().paginator
+            self._paginator = RankedPagination()
+        return self._paginator
+
+    def filter_queryset(self, queryset: QuerySet) -> QuerySet:
+        queryset = super().filter_queryset(queryset)
+        term: Optional[str] = self.search_term()
+        if term is None:
+            return queryset
+        mode: str = self.request.query_params.get("mode", "prefix")
+        if mode not in SEARCH_MODES:
+            raise serializers.ValidationError({"mode": f"Допустимо: {SEARCH_MODES}"})
+        vendor: str = connections[queryset.db].vendor
+        return search_queryset(queryset, self.search_field, term, mode, vendor)
@@ -1,22 +1,175 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import models, transaction
 from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS
+from .bulk import set_links
 from .models import Author, Book
-from typing import List, Dict, Any, Optional
+from typing import Callable, Iterable, List, Dict, Any, Optional, Set
 import uuid
 
+# Наибольшее число id в одном запросе пакетного получения
+MAX_BATCH_IDS: int = 500
+
+
+def _split_paths(paths: Iterable[str]) -> Dict[str, Set[str]]:
+    """Метод для разбора путей вида books.title в {"books": {"title"}}"""
+    tree: Dict[str, Set[str]] = {}
+    for path in paths:
+        name, _, rest = path.partition(".")
+        tree.setdefault(name, set())
+        if rest:
+            tree[name].add(rest)
+    return tree
+
+
+def _nested(field: Any) -> Optional[serializers.Serializer]:
+    """Метод для получения вложенного сериализатора поля (в том числе many=True)"""
+    target: Any = getattr(field, "child", field)
+    return target if isinstance(target, serializers.Serializer) else None
+
+
+def restrict_fields(serializer: serializers.Serializer, paths: Iterable[str]) -> None:
+    """Метод для удаления из сериализатора полей, не перечисленных в paths
+
+    Путь без точки оставляет поле целиком, books.title - только title у
+    вложенного сериализатора books. Неизвестные имена игнорируются.
+    """
+    tree: Dict[str, Set[str]] = _split_paths(paths)
+    for name in list(serializer.fields):
+        if name not in tree:
+            serializer.fields.pop(name)
+    for name, rest in tree.items():
+        nested: Optional[serializers.Serializer] = _nested(serializer.fields.get(name))
+        if rest and name not in paths and nested is not None:
+            restrict_fields(nested, rest)
+
+
+def expand_fields(serializer: serializers.Serializer, paths: Iterable[str]) -> None:
+    """Метод для замены полей-ссылок на вложенные объекты по списку expandable"""
+    for name, rest in _split_paths(paths).items():
+        factory: Optional[Callable[[], serializers.Field]] = getattr(
+            serializer, "expandable", {}
+        ).get(name)
+        if factory is not None and name in serializer.fields:
+            serializer.fields[name] = factory()
+        nested: Optional[serializers.Serializer] = _nested(serializer.fields.get(name))
+        if rest and nested is not None:
+            expand_fields(nested, rest)
+
+
+class SparseFieldsMixin:
+    """Миксин для сериализаторов с выбором полей (fields) и раскрытием связей (expand)
+
+    fields и expand передаются представлением из ?fields= и ?expand=, см.
+    PrefetchRelatedMixin.
+    """
+
+    expandable: Dict[str, Callable[[], serializers.Field]] = {}
+
+    def __init__(
+        self,
+        *args: Any,
+        fields: Optional[Iterable[str]] = None,
+        expand: Optional[Iterable[str]] = None,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(*args, **kwargs)
+        if expand:
+            expand_fields(self, expand)
+        if fields is not None:
+            restrict_fields(self, fields)
+
+
+class BulkManyRelatedField(serializers.ManyRelatedField):
+    """Поле для списка id, которое проверяет все id одним запросом pk__in
+
+    Стандартное поле выполняет отдельный запрос на каждый id. Повторы
+    отбрасываются, объекты загружаются только с первичным ключом.
+    """
+
+    def to_internal_value(self, data: Any) -> List[models.Model]:
+        if isinstance(data, str) or not hasattr(data, "__iter__"):
+            self.fail("not_a_list", input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail("empty")
+
+        child: serializers.RelatedField = self.child_relation
+        queryset = child.get_queryset()
+        pk_field: models.Field = queryset.model._meta.pk
+        ids: List[Any] = []
+        for item in data:
+            try:
+                ids.append(pk_field.to_python(item))
+            except (TypeError, ValueError, DjangoValidationError):
+                child.fail("incorrect_type", data_type=type(item).__name__)
+        ids = list(dict.fromkeys(ids))
+        found: Dict[Any, models.Model] = {
+            obj.pk: obj for obj in queryset.filter(pk__in=ids).only("pk")
+        }
+        for pk in ids:
+            if pk not in found:
+                child.fail("does_not_exist", pk_value=pk)
+        return [found[pk] for pk in ids]
+
+
+class BulkPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Поле первичного ключа, которое при many=True создает BulkManyRelatedField"""
+
+    @classmethod
+    def many_init(cls, *args: Any, **kwargs: Any) -> BulkManyRelatedField:
+        list_kwargs: Dict[str, Any] = {"child_relation": cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return BulkManyRelatedField(**list_kwargs)
+
+
+class AuthorBriefSerializer(serializers.ModelSerializer):
+    """Сериализатор для краткого представления автора внутри книги"""
 
-class BookSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Author
+        fields: List[str] = ["id", "name"]
+
+
+class BookSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Сериализатор для книг"""
 
-    authors = serializers.PrimaryKeyRelatedField(
+    authors = BulkPrimaryKeyRelatedField(
         queryset=Author.objects.all(), many=True, required=False
     )
 
+    expandable: Dict[str, Callable[[], serializers.Field]] = {
+        "authors": lambda: AuthorBriefSerializer(many=True, read_only=True),
+    }
+
     class Meta:
         model = Book
         fields: List[str] = ["id", "title", "authors"]
 
+    def create(self, validated_data: Dict[str, Any]) -> Book:
+        """Метод для создания книги со связями одним INSERT"""
+        authors_data: List[Author] = validated_data.pop("authors", [])
+        with transaction.atomic():
+            book: Book = Book.objects.create(**validated_data)
+            if authors_data:
+                set_links(book, authors_data, adding=True)
+        return book
+
+    def update(self, instance: Book, validated_data: Dict[str, Any]) -> Book:
+        """Метод для обновления книги: UPDATE только при смене названия, связи по разнице"""
+        authors_data: Optional[List[Author]] = validated_data.pop("authors", None)
+        title: Optional[str] = validated_data.get("title")
+        with transaction.atomic():
+            if title is not None and title.strip() != instance.title:
+                instance.title = title
+                instance.save()
+            if authors_data is not None:
+                set_links(instance, authors_data)
+        return instance
 
-class AuthorSerializer(serializers.ModelSerializer):
+
+class AuthorSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Сериализатор для авторов"""
 
     books: BookSerializer = BookSerializer(many=True, read_only=True)
@@ -26,10 +179,14 @@ class AuthorSerializer(serializers.ModelSerializer):
         fields: List[str] = ["id", "name", "books"]
 
 
-class AuthorRetrieveSerializer(serializers.ModelSerializer):
+class AuthorRetrieveSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Сериализатор для работы с одним автором"""
 
-    books = serializers.PrimaryKeyRelatedField(many=True, queryset=Book.objects.all())
+    books = BulkPrimaryKeyRelatedField(many=True, queryset=Book.objects.all())
+
+    expandable: Dict[str, Callable[[], serializers.Field]] = {
+        "books": lambda: BookSerializer(many=True, read_only=True),
+    }
 
     class Meta:
         model = Author
@@ -38,19 +195,21 @@ class AuthorRetrieveSerializer(serializers.ModelSerializer):
     def create(self, validated_data: Dict[str, Any]) -> Author:
         """Метод для создания автора"""
         books_data: List[Book] = validated_data.pop("books")
-        author: Author = Author.objects.create(**validated_data)
-        author.books.set(books_data)
+        with transaction.atomic():
+            author: Author = Author.objects.create(**validated_data)
+            set_links(author, books_data, adding=True)
         return author
 
     def update(self, instance: Author, validated_data: Dict[str, Any]) -> Author:
-        """Метод для обновления автора"""
+        """Метод для обновления автора: UPDATE только при смене имени, связи по разнице"""
         books_data: Optional[List[Book]] = validated_data.pop("books", None)
-        instance.name = validated_data.get("name", instance.name)
-        instance.save()
-
-        if books_data is not None:
-            instance.books.set(books_data)
-
+        name: Optional[str] = validated_data.get("name")
+        with transaction.atomic():
+            if name is not None and name.strip() != instance.name:
+                instance.name = name
+                instance.save()
+            if books_data is not None:
+                set_links(instance, books_data)
         return instance
 
     def validate(self, data: Dict[str, Any]) -> Dict[str, Any]:
@@ -58,3 +217,31 @@ class AuthorRetrieveSerializer(serializers.ModelSerializer):
         if not data.get("books"):
             raise serializers.ValidationError("У автора должна быть хотя бы одна книга")
         return data
+
+
+class AuthorBulkSerializer(serializers.Serializer):
+    """Сериализатор для элемента пакетной загрузки авторов"""
+
+    name = serializers.CharField(max_length=255)
+    books = serializers.ListField(child=serializers.UUIDField())
+
+    def validate_books(self, value: List[uuid.UUID]) -> List[uuid.UUID]:
+        """Метод проверки, что у автора есть хотя бы одна книга"""
+        if not value:
+            raise serializers.ValidationError("У автора должна быть хотя бы одна книга")
+        return value
+
+
+class BookBulkSerializer(serializers.Serializer):
+    """Сериализатор для элемента пакетной загрузки книг"""
+
+    title = serializers.CharField(max_length=100)
+    authors = serializers.ListField(child=serializers.UUIDField(), required=False)
+
+
+class BatchIdsSerializer(serializers.Serializer):
+    """Сериализатор для списка id в запросе пакетного получения"""
+
+    ids = serializers.ListField(
+        child=serializers.UUIDField(), allow_empty=False, max_length=MAX_BATCH_IDS
+    )
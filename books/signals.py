@@ -0,0 +1,148 @@
+from typing import Any, List, Optional
+
+from django.db import connections
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+
+from .cache import bump_on_commit
+from .changes import next_change_seq, record_deletes, touch
+from .counts import Link, adjust_counts, existing_links
+from .models import Author, Book
+
+
+def _pop_seq(instance: Any) -> Optional[int]:
+    return instance.__dict__.pop("_change_seq", None)
+
+
+def _take_seq(instance: Any, using: str) -> None:
+    """Метод для получения номера изменения до записи строк каталога
+
+    Номер запоминается на объекте до post_* сигнала. Вне транзакции номер
+    не берется: он зафиксировался бы раньше самой записи, поэтому save()
+    авторов и книг выполняется в транзакции.
+    """
+    if connections[using].in_atomic_block:
+        instance._change_seq = next_change_seq(using)
+    else:
+        # Номер от прерванной ошибкой записи уже не действителен
+        _pop_seq(instance)
+
+
+@receiver(pre_save, sender=Author)
+@receiver(pre_save, sender=Book)
+def catalog_saving(sender: Any, instance: Any, using: str, **kwargs: Any) -> None:
+    """Номер изменения берется до UPDATE/INSERT строки"""
+    _take_seq(instance, using)
+
+
+@receiver(post_save, sender=Author)
+def author_saved(sender: Any, instance: Author, using: str, **kwargs: Any) -> None:
+    """Сброс кэша ответов и новый номер изменения после сохранения автора"""
+    touch(author_ids=[instance.pk], using=using, seq=_pop_seq(instance))
+    bump_on_commit("author", using=using)
+
+
+@receiver(post_save, sender=Book)
+def book_saved(sender: Any, instance: Book, using: str, **kwargs: Any) -> None:
+    """Сброс кэша ответов после сохранения книги (книги вложены в авторов)"""
+    touch(book_ids=[instance.pk], using=using, seq=_pop_seq(instance))
+    bump_on_commit("author", "book", using=using)
+
+
+@receiver(post_delete, sender=Author)
+@receiver(post_delete, sender=Book)
+def catalog_deleted(sender: Any, instance: Any, using: str, **kwargs: Any) -> None:
+    """Сброс кэша ответов и отметка об удалении, связи удаляются без m2m_changed"""
+    record_deletes(sender, [instance.pk], using=using, seq=_pop_seq(instance))
+    bump_on_commit("author", "book", using=using)
+
+
+@receiver(m2m_changed, sender=Book.authors.through)
+def authors_changed(sender: Any, action: str, using: str, **kwargs: Any) -> None:
+    """Сброс кэша ответов после изменения связей книг и авторов"""
+    if action.startswith("post_"):
+        bump_on_commit("author", "book", using=using)
+
+
+@receiver(m2m_changed, sender=Book.authors.through)
+def authors_counts_changed(
+    sender: Any,
+    instance: Any,
+    action: str,
+    reverse: bool,
+    pk_set: Any,
+    using: str,
+    **kwargs: Any,
+) -> None:
+    """Поддержка book_count/author_count и номеров изменений при изменении связей"""
+    if action == "pre_clear" or (action in ("pre_add", "pre_remove") and pk_set):
+        # Сигналы связей отправляются внутри транзакции менеджера
+        _take_seq(instance, using)
+    if action == "post_add":
+        seq: Optional[int] = _pop_seq(instance)
+        if not pk_set:
+            return
+        # В post_add pk_set содержит только действительно добавленные связи
+        if reverse:
+            links = [(instance.pk, pk) for pk in pk_set]
+        else:
+            links = [(pk, instance.pk) for pk in pk_set]
+        adjust_counts(links, 1)
+        _touch_links(links, using, seq)
+    elif action in ("pre_remove", "pre_clear"):
+        targets = pk_set if action == "pre_remove" else None
+        if reverse:
+            instance._removed_links = existing_links([instance.pk], targets)
+        else:
+            instance._removed_links = existing_links(targets, [instance.pk])
+    elif action in ("post_remove", "post_clear"):
+        links = instance.__dict__.pop("_removed_links", [])
+        seq = _pop_seq(instance)
+        adjust_counts(links, -1)
+        _touch_links(links, using, seq)
+
+
+def _touch_links(links: List[Link], using: str, seq: Optional[int]) -> None:
+    """Метод для отметки изменения обеих сторон измененных связей"""
+    if links:
+        touch(
+            author_ids={author_id for author_id, _ in links},
+            book_ids={book_id for _, book_id in links},
+            using=using,
+            seq=seq,
+        )
+
+
+@receiver(pre_delete, sender=Author)
+def author_counts_deleted(
+    sender: Any, instance: Author, using: str, **kwargs: Any
+) -> None:
+    """Уменьшение author_count книг удаляемого автора, книги теряют связь"""
+    # Номер нужен и для отметки об удалении в post_delete
+    _take_seq(instance, using)
+    links: List[Link] = existing_links(author_ids=[instance.pk])
+    adjust_counts(links, -1)
+    touch(
+        book_ids={book_id for _, book_id in links},
+        using=using,
+        seq=instance.__dict__.get("_change_seq"),
+    )
+
+
+@receiver(pre_delete, sender=Book)
+def book_counts_deleted(sender: Any, instance: Book, using: str, **kwargs: Any) -> None:
+    """Уменьшение book_count авторов удаляемой книги, авторы теряют связь"""
+    _take_seq(instance, using)
+    links: List[Link] = existing_links(book_ids=[instance.pk])
+    adjust_counts(links, -1)
+    touch(
+        author_ids={author_id for author_id, _ in links},
+        using=using,
+        seq=instance.__dict__.get("_change_seq"),
+    )
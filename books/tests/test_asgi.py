@@ -0,0 +1,38 @@
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.core.cache import caches
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from ..models import Author, Book
+from ..throttling import THROTTLE_CACHE
+
+
+class AsgiViewTests(APITestCase):
+    def setUp(self):
+        caches[THROTTLE_CACHE].clear()
+        self.authors = [Author.objects.create(name=f"Author {i}") for i in range(3)]
+        self.book = Book.objects.create(title="Book 1")
+        self.book.authors.set(self.authors[:2])
+
+    async def test_same_views_under_asgi(self):
+        for url, params in (
+            (reverse("author-list-create"), {"page_size": 2}),
+            (reverse("book-filter-name"), {"title": "Book 1"}),
+            (reverse("author-detail", args=[self.authors[0].pk]), {}),
+            (reverse("book-detail", args=[uuid.uuid4()]), {}),
+        ):
+            wsgi = await sync_to_async(self.client.get)(url, params)
+            asgi = await self.async_client.get(url, params)
+            self.assertEqual(asgi.status_code, wsgi.status_code)
+            self.assertEqual(asgi.json(), wsgi.json())
+
+    @override_settings(THROTTLE_RATE=1, THROTTLE_BURST=10)
+    async def test_throttle_applies_under_asgi(self):
+        url = reverse("author-filter-countbook")
+        self.assertEqual((await self.async_client.get(url)).status_code, 200)
+        response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
@@ -0,0 +1,52 @@
+import uuid
+
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from ..models import Author, Book
+from ..serializers import MAX_BATCH_IDS
+
+
+class BatchLookupTests(APITestCase):
+    def setUp(self):
+        self.authors = [Author.objects.create(name=f"Author {i}") for i in range(3)]
+        self.book = Book.objects.create(title="Book 1")
+        self.book.authors.set(self.authors)
+
+    def test_get_resolves_ids_in_fixed_queries(self):
+        missing = uuid.uuid4()
+        ids = [self.authors[2].id, missing, self.authors[0].id, self.authors[2].id]
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                reverse("author-batch"), {"ids": ",".join(map(str, ids))}
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            list(response.data["results"]),
+            [str(self.authors[2].id), str(self.authors[0].id)],
+        )
+        self.assertEqual(
+            response.data["results"][str(self.authors[0].id)]["books"],
+            [self.book.id],
+        )
+        self.assertEqual(response.data["missing"], [str(missing)])
+
+    def test_post_body(self):
+        response = self.client.post(
+            reverse("book-batch"), {"ids": [str(self.book.id)]}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"][str(self.book.id)]["authors"]), 3)
+
+    def test_invalid_and_too_many_ids(self):
+        response = self.client.get(reverse("book-batch"), {"ids": "not-a-uuid"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(
+            reverse("book-batch"),
+            {"ids": [str(uuid.uuid4()) for _ in range(MAX_BATCH_IDS + 1)]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(reverse("book-batch"))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
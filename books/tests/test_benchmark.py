@@ -0,0 +1,95 @@
+import random
+from unittest import mock
+
+from django.db.utils import OperationalError
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from ..benchmark import (
+    build_scenarios,
+    generate_catalog,
+    measure_interfaces,
+    measure_load_shedding,
+    parse_fanout,
+    run_benchmark,
+    run_scenario,
+)
+from ..models import Author, Book
+from ..urls import urlpatterns
+
+
+class BenchmarkHarnessTests(TestCase):
+    def test_generate_catalog(self):
+        dataset = generate_catalog(20, 30, fanout="fixed:2", seed=1)
+        self.assertEqual(dataset, {"authors": 20, "books": 30, "links": 60})
+        self.assertEqual(set(Book.objects.values_list("author_count", flat=True)), {2})
+        self.assertEqual(sum(Author.objects.values_list("book_count", flat=True)), 60)
+
+    def test_parse_fanout(self):
+        rnd = random.Random(0)
+        self.assertTrue(
+            all(1 <= parse_fanout("uniform:1-3")(rnd) <= 3 for _ in range(50))
+        )
+        self.assertTrue(all(parse_fanout("zipf:1.5:4")(rnd) <= 4 for _ in range(50)))
+        with self.assertRaises(ValueError):
+            parse_fanout("normal:1")
+
+    def test_run_benchmark_reports_every_endpoint(self):
+        generate_catalog(5, 5, seed=2)
+        report = run_benchmark(urlpatterns, requests=2, concurrency=1)
+        names = {pattern.name for pattern in urlpatterns}
+        self.assertEqual(set(report["endpoints"]), names)
+        stats = report["endpoints"]["author-list-create"]
+        self.assertEqual(stats["requests"], 2)
+        self.assertEqual(stats["errors"], 0)
+        self.assertLessEqual(stats["p50_ms"], stats["p99_ms"])
+        self.assertGreater(report["peak_rss_kb"], 0)
+
+    def test_database_errors_are_recorded_per_sample(self):
+        generate_catalog(5, 5, seed=3)
+        scenario = next(
+            s for s in build_scenarios(urlpatterns) if s.name == "author-bulk"
+        )
+        with mock.patch(
+            "books.views.BulkUpsert.run",
+            side_effect=OperationalError("database table is locked"),
+        ), mock.patch("books.benchmark.ThreadPoolExecutor") as pool:
+            with self.assertLogs("books.benchmark", "WARNING") as logs:
+                stats = run_scenario(scenario, requests=3, concurrency=8)
+        pool.assert_not_called()
+        self.assertEqual(len(logs.records), 3)
+        self.assertEqual(stats["requests"], 3)
+        self.assertEqual(stats["errors"], 3)
+
+
+class LoadSheddingBenchmarkTests(TransactionTestCase):
+    # Нарушитель успевает один тяжелый запрос на url, дешевых хватает на замер
+    @override_settings(THROTTLE_RATE=1, THROTTLE_BURST=15)
+    def test_measure_load_shedding(self):
+        generate_catalog(5, 5, seed=4)
+        results = measure_load_shedding(urlpatterns, requests=10, abusers=2)
+        self.assertEqual(set(results), {"baseline", "unprotected", "protected"})
+        self.assertEqual(results["baseline"]["abuser_statuses"], {})
+        for stats in results.values():
+            self.assertEqual(stats["requests"], 10)
+            self.assertEqual(stats["errors"], 0)
+        self.assertNotIn("429", results["unprotected"]["abuser_statuses"])
+        self.assertIn("429", results["protected"]["abuser_statuses"])
+
+    @override_settings(THROTTLE_ENABLED=False, HEAVY_VIEW_CONCURRENCY=0)
+    def test_measure_interfaces(self):
+        generate_catalog(5, 5, seed=5)
+        results = measure_interfaces(urlpatterns, requests=6, concurrency=3)
+        self.assertEqual(set(results), {"wsgi", "asgi"})
+        for interface in results.values():
+            self.assertEqual(
+                set(interface),
+                {
+                    "author-detail",
+                    "book-detail",
+                    "author-list-create",
+                    "book-list-create",
+                },
+            )
+            for stats in interface.values():
+                self.assertEqual((stats["requests"], stats["errors"]), (6, 0))
+                self.assertGreater(stats["throughput_rps"], 0)
@@ -0,0 +1,129 @@
+import uuid
+
+from django.db import connection
+from django.db.utils import OperationalError
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from ..bulk import BulkUpsert, upsert_books
+from ..models import Author, Book
+from ..serializers import BookSerializer
+
+
+class BulkUpsertViewTests(APITestCase):
+    def setUp(self):
+        self.book1 = Book.objects.create(title="Book 1")
+        self.book2 = Book.objects.create(title="Book 2")
+        self.author = Author.objects.create(name="Existing Author")
+        self.author.books.add(self.book1)
+
+    def test_bulk_upsert_authors(self):
+        data = [
+            {"name": "  New Author  ", "books": [str(self.book1.id)]},
+            {"name": "Existing Author", "books": [str(self.book2.id)]},
+            {"name": "No books", "books": []},
+            {"name": "Missing book", "books": [str(uuid.uuid4())]},
+            {"name": "New Author", "books": [str(self.book2.id)]},
+        ]
+        response = self.client.post(reverse("author-bulk"), data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item["index"] for item in response.data["results"]], [0, 1])
+        self.assertEqual([item["index"] for item in response.data["errors"]], [2, 3, 4])
+        self.assertEqual(Author.objects.count(), 2)
+        self.assertTrue(Author.objects.filter(name="New Author").exists())
+        self.author.refresh_from_db()
+        self.assertEqual(list(self.author.books.all()), [self.book2])
+
+    def test_bulk_upsert_books(self):
+        data = [
+            {"title": "Book 1 ", "authors": [str(self.author.id)]},
+            {"title": "Book 3"},
+        ]
+        response = self.client.post(reverse("book-bulk"), data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["errors"], [])
+        self.assertEqual(Book.objects.count(), 3)
+        self.assertEqual(response.data["results"][0]["id"], self.book1.id)
+        self.assertEqual(Book.objects.get(title="Book 3").authors.count(), 0)
+
+    def test_failed_batch_retried_item_by_item(self):
+        def upsert(rows):
+            if any(row["title"] == "Bad" for row in rows):
+                raise OperationalError("value too long")
+            return upsert_books(rows)
+
+        report = BulkUpsert(
+            BookSerializer, "title", "authors", Author, upsert, batch_size=3
+        ).run([{"title": "Book 3"}, {"title": "Bad"}, {"title": "Book 4"}])
+        self.assertEqual([item["index"] for item in report["results"]], [0, 2])
+        self.assertEqual(report["errors"], [{"index": 1, "errors": "value too long"}])
+        self.assertEqual(Book.objects.filter(title__in=["Book 3", "Book 4"]).count(), 2)
+
+    def test_bulk_requires_list(self):
+        response = self.client.post(
+            reverse("book-bulk"), {"title": "Book"}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class RelationWriteTests(APITestCase):
+    def setUp(self):
+        self.books = Book.objects.bulk_create([Book(title=f"B{i}") for i in range(40)])
+        self.author = Author.objects.create(name="Author")
+        self.author.books.add(*self.books[:3])
+        self.url = reverse("author-detail", kwargs={"pk": self.author.pk})
+
+    def patch_books(self, books, name="Author"):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(
+                self.url,
+                {"name": name, "books": [str(book.pk) for book in books]},
+                format="json",
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [query["sql"] for query in queries]
+
+    def test_queries_do_not_depend_on_number_of_books(self):
+        few = self.patch_books(self.books[1:5])
+        many = self.patch_books(self.books[5:40])
+        self.assertEqual(len(few), len(many))
+        self.assertEqual(
+            set(self.author.books.values_list("pk", flat=True)),
+            {book.pk for book in self.books[5:40]},
+        )
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.book_count, 35)
+        self.assertEqual(Book.objects.get(pk=self.books[1].pk).author_count, 0)
+        self.assertEqual(Book.objects.get(pk=self.books[39].pk).author_count, 1)
+
+    def test_unchanged_author_is_not_written(self):
+        sql = self.patch_books(self.books[:3], name=" Author ")
+        self.assertFalse(
+            [query for query in sql if query.startswith(("UPDATE", "INSERT", "DELETE"))]
+        )
+
+    def test_invalid_ids(self):
+        missing = uuid.uuid4()
+        response = self.client.patch(
+            self.url, {"books": [str(self.books[0].pk), str(missing)]}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn(str(missing), str(response.data["books"]))
+        response = self.client.patch(self.url, {"books": ["not-a-uuid"]}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_book_authors_diff(self):
+        other = Author.objects.create(name="Other")
+        book = self.books[0]
+        response = self.client.patch(
+            reverse("book-detail", kwargs={"pk": book.pk}),
+            {"authors": [str(other.pk)]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["authors"], [other.pk])
+        self.author.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual((self.author.book_count, other.book_count), (2, 1))
@@ -0,0 +1,106 @@
+import importlib.util
+import os
+from unittest import mock
+
+from django.conf import settings as django_settings
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITransactionTestCase
+
+from ..cache import GENERATION_KEY, bump_generations, generation_cache, response_cache
+from ..models import Author, Book
+from ..throttling import LIMITER
+
+
+class CachedResponseTests(APITransactionTestCase):
+    def setUp(self):
+        response_cache().clear()
+        self.book = Book.objects.create(title="Book 1")
+        self.author = Author.objects.create(name="Author 1")
+        self.author.books.add(self.book)
+        self.url = reverse("author-list-create")
+
+    def test_second_request_served_from_cache(self):
+        first = self.client.get(self.url, format="json")
+        self.assertEqual(first["X-Cache"], "MISS")
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url, format="json")
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(second.content, first.content)
+
+    def test_etag_returns_not_modified(self):
+        etag = self.client.get(self.url, format="json")["ETag"]
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    @override_settings(THROTTLE_ENABLED=False, HEAVY_VIEW_CONCURRENCY=1)
+    def test_cache_hits_skip_admission(self):
+        first = self.client.get(self.url, format="json")
+        self.assertTrue(LIMITER.acquire("heavy", 1))
+        try:
+            hit = self.client.get(self.url, format="json")
+            self.assertEqual(hit["X-Cache"], "HIT")
+            not_modified = self.client.get(self.url, HTTP_IF_NONE_MATCH=first["ETag"])
+            self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+            miss = self.client.get(self.url, {"limit": 1}, format="json")
+            self.assertEqual(miss.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        finally:
+            LIMITER.release("heavy")
+        self.assertEqual(LIMITER.in_flight("heavy"), 0)
+
+    def test_write_invalidates_cache(self):
+        etag = self.client.get(self.url, format="json")["ETag"]
+        Author.objects.create(name="Author 2")
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.json()["results"]), 2)
+
+    def test_m2m_change_invalidates_cache(self):
+        url = reverse("book-detail", args=[str(self.book.id)])
+        self.client.get(url, format="json")
+        self.book.authors.clear()
+        response = self.client.get(url, format="json")
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.json()["authors"], [])
+
+    def test_generations_kept_outside_response_cache(self):
+        self.client.get(self.url, format="json")
+        key = GENERATION_KEY.format("author")
+        self.assertIsNotNone(generation_cache().get(key))
+        self.assertIsNone(response_cache().get(key))
+        # Другой воркер: свой кэш ответов, общий кэш поколений
+        response_cache().clear()
+        first = self.client.get(self.url, format="json")
+        bump_generations("author")
+        second = self.client.get(self.url, format="json")
+        self.assertNotEqual(first["ETag"], second["ETag"])
+        self.assertEqual(second["X-Cache"], "MISS")
+
+    @override_settings(RESPONSE_CACHE_ENABLED=False)
+    def test_disabled_cache(self):
+        first = self.client.get(self.url, format="json")
+        self.assertNotIn("X-Cache", first)
+        second = self.client.get(self.url, format="json")
+        self.assertNotIn("X-Cache", second)
+
+    def test_enabled_by_default_only_with_shared_generations(self):
+        def enabled(**env):
+            spec = importlib.util.spec_from_file_location(
+                "settings_probe", django_settings.BASE_DIR / "dev" / "settings.py"
+            )
+            module = importlib.util.module_from_spec(spec)
+            with mock.patch.dict(os.environ, env):
+                os.environ.pop("RESPONSE_CACHE_ENABLED", None)
+                spec.loader.exec_module(module)
+            return module.RESPONSE_CACHE_ENABLED
+
+        self.assertTrue(enabled(WEB_CONCURRENCY="1"))
+        self.assertFalse(enabled(WEB_CONCURRENCY="4"))
+        self.assertTrue(
+            enabled(
+                WEB_CONCURRENCY="4",
+                GENERATION_CACHE_BACKEND="django.core.cache.backends.db.DatabaseCache",
+            )
+        )
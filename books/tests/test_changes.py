@@ -0,0 +1,204 @@
+from unittest import mock
+
+from django.db import connection, transaction
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from ..benchmark import generate_catalog, measure_concurrent_writes
+from ..bulk import set_links, upsert_books
+from ..changes import prune_tombstones, touch
+from ..models import Author, Book, ChangeSequence
+from ..purge import purge
+
+
+class ChangeSequenceOrderTests(TransactionTestCase):
+    def test_autocommit_save_takes_sequence_first(self):
+        self.assertFalse(connection.in_atomic_block)
+        with CaptureQueriesContext(connection) as queries:
+            author = Author.objects.create(name="Author")
+        writes = [
+            query["sql"]
+            for query in queries
+            if query["sql"].startswith(("UPDATE", "INSERT"))
+        ]
+        self.assertIn(f'"{ChangeSequence._meta.db_table}"', writes[0])
+        author.refresh_from_db()
+        self.assertEqual(
+            author.change_seq,
+            ChangeSequence.objects.values_list("value", flat=True).get(),
+        )
+
+    def test_measure_concurrent_writes(self):
+        generate_catalog(6, 2, seed=5)
+        # SQLite в памяти отвечает на параллельную запись ошибкой блокировки
+        with mock.patch("books.benchmark.logger"):
+            results = measure_concurrent_writes(writes=6, concurrency=3)
+        self.assertEqual(results["serial"]["writes"], 6)
+        self.assertEqual(results["serial"]["errors"], 0)
+        self.assertEqual(results["concurrent"]["threads"], 3)
+        self.assertEqual(results["concurrent"]["writes"], 6)
+        self.assertIn("scaling", results)
+
+
+class ChangesFeedTests(APITestCase):
+    def setUp(self):
+        self.book = Book.objects.create(title="Book")
+        self.author = Author.objects.create(name="Author")
+        self.author.books.add(self.book)
+        self.url = reverse("changes")
+
+    def feed(self, since=None, **params):
+        if since:
+            params["since"] = since
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_full_sync_and_empty_delta(self):
+        data = self.feed()
+        self.assertFalse(data["has_more"])
+        latest = {(c["model"], c["id"]): c for c in data["changes"]}
+        self.assertEqual(
+            latest[("author", str(self.author.pk))]["data"],
+            {"id": str(self.author.pk), "name": "Author", "books": [str(self.book.pk)]},
+        )
+        self.assertEqual(
+            latest[("book", str(self.book.pk))]["data"]["authors"],
+            [str(self.author.pk)],
+        )
+        seqs = [change["seq"] for change in data["changes"]]
+        self.assertEqual(seqs, sorted(seqs))
+
+        delta = self.feed(data["next"])
+        self.assertEqual(delta["changes"], [])
+        self.assertEqual(delta["next"], data["next"])
+
+    def test_delta_contains_only_changed(self):
+        token = self.feed()["next"]
+        other = Book.objects.create(title="Other")
+        token_after_create = self.feed(token)["next"]
+
+        self.book.title = "Renamed"
+        self.book.save()
+        changes = self.feed(token_after_create)["changes"]
+        self.assertEqual(
+            [(c["model"], c["id"]) for c in changes], [("book", str(self.book.pk))]
+        )
+        self.assertEqual(changes[0]["data"]["title"], "Renamed")
+
+        self.author.books.add(other)
+        changes = self.feed(token_after_create)["changes"]
+        self.assertEqual(
+            {(c["model"], c["id"]) for c in changes},
+            {
+                ("book", str(self.book.pk)),
+                ("book", str(other.pk)),
+                ("author", str(self.author.pk)),
+            },
+        )
+
+    def test_delete_produces_tombstone(self):
+        token = self.feed()["next"]
+        response = self.client.delete(
+            reverse("author-detail", kwargs={"pk": self.author.pk})
+        )
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        changes = self.feed(token)["changes"]
+        tombstone = [c for c in changes if c["deleted"]]
+        self.assertEqual(
+            [(c["model"], c["id"]) for c in tombstone],
+            [("author", str(self.author.pk))],
+        )
+        book = next(c for c in changes if c["model"] == "book")
+        self.assertEqual(book["data"]["authors"], [])
+
+    def test_purge_and_bulk_upsert_are_tracked(self):
+        token = self.feed()["next"]
+        purge(Book.objects.all())
+        self.client.post(
+            reverse("book-bulk"),
+            [{"title": "Bulk book", "authors": [str(self.author.pk)]}],
+            format="json",
+        )
+        changes = self.feed(token)["changes"]
+        self.assertIn(
+            ("book", str(self.book.pk), True),
+            {(c["model"], c["id"], c["deleted"]) for c in changes},
+        )
+        books = [
+            c["data"] for c in changes if c["model"] == "book" and not c["deleted"]
+        ]
+        self.assertEqual([book["title"] for book in books], ["Bulk book"])
+        author = [c["data"] for c in changes if c["model"] == "author"][-1]
+        self.assertEqual(author["books"], [books[0]["id"]])
+
+    def test_pages_cover_every_change_once(self):
+        Book.objects.bulk_create([Book(title=f"B{i}") for i in range(7)])
+        touch(book_ids=Book.objects.values_list("pk", flat=True))
+        seen, token = [], None
+        while True:
+            data = self.feed(token, limit=3)
+            seen.extend((c["model"], c["id"]) for c in data["changes"])
+            token = data["next"]
+            if not data["has_more"]:
+                break
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertEqual(len(set(seen)), Book.objects.count() + Author.objects.count())
+
+    def test_delta_queries_do_not_depend_on_catalog_size(self):
+        token = self.feed()["next"]
+        Book.objects.bulk_create([Book(title=f"B{i}") for i in range(50)])
+        self.book.title = "Renamed"
+        self.book.save()
+        with CaptureQueriesContext(connection) as queries:
+            changes = self.feed(token)["changes"]
+        self.assertEqual(len(changes), 1)
+        # Номер очистки, три источника ленты и связи книги
+        self.assertEqual(len(queries), 5)
+
+    def test_sequence_locked_before_catalog_rows(self):
+        other = Book.objects.create(title="Other")
+        sequence = ChangeSequence._meta.db_table
+        writes = {
+            Author._meta.db_table,
+            Book._meta.db_table,
+            Book.authors.through._meta.db_table,
+        }
+
+        def first_write(action):
+            with CaptureQueriesContext(connection) as queries:
+                with transaction.atomic():
+                    action()
+            for query in queries:
+                sql = query["sql"]
+                if sql.startswith(("UPDATE", "INSERT", "DELETE")):
+                    return next(t for t in writes | {sequence} if f'"{t}"' in sql)
+
+        def rename():
+            self.book.title = "Renamed"
+            self.book.save()
+
+        for action in (
+            rename,
+            lambda: self.author.books.add(other),
+            lambda: self.author.books.remove(other),
+            lambda: set_links(self.author, [other]),
+            lambda: upsert_books([{"title": "Bulk", "authors": [self.author.pk]}]),
+            lambda: purge(Book.objects.filter(pk=other.pk)),
+            self.author.delete,
+        ):
+            self.assertEqual(first_write(action), sequence)
+
+    def test_invalid_and_expired_tokens(self):
+        response = self.client.get(self.url, {"since": "garbage"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        token = self.feed()["next"]
+        self.author.delete()
+        self.assertEqual(prune_tombstones(days=-1), 1)
+        response = self.client.get(self.url, {"since": token})
+        self.assertEqual(response.status_code, status.HTTP_410_GONE)
+        self.assertEqual(self.feed(self.feed()["next"])["changes"], [])
@@ -0,0 +1,155 @@
+import gzip
+import zlib
+from unittest import mock, skipIf
+
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.conf import settings as django_settings
+from django.core.cache import caches
+from django.http import StreamingHttpResponse
+from django.test import RequestFactory, override_settings
+from django.urls import reverse
+from django.utils.module_loading import import_string
+from rest_framework import status
+from rest_framework.test import APITransactionTestCase
+
+from ..cache import response_cache
+from ..compression import (
+    CompressionMiddleware,
+    acompress_stream,
+    brotli,
+    choose_encoding,
+    compress_stream,
+)
+from ..models import Author, Book
+from ..throttling import THROTTLE_CACHE
+
+
+@override_settings(COMPRESSION_MIN_SIZE=200, COMPRESSION_ENCODINGS=["br", "gzip"])
+class CompressionTests(APITransactionTestCase):
+    def setUp(self):
+        response_cache().clear()
+        caches[THROTTLE_CACHE].clear()
+        books = [Book.objects.create(title=f"Book {i}") for i in range(10)]
+        for i in range(10):
+            Author.objects.create(name=f"Author {i}").books.set(books)
+        self.url = reverse("author-list-create")
+
+    def test_choose_encoding(self):
+        factory = RequestFactory()
+        cases = {
+            "": None,
+            "gzip": "gzip",
+            "gzip, deflate": "gzip",
+            "gzip;q=0": None,
+            "br;q=0.5, gzip": "gzip",
+            "*": "br" if brotli else "gzip",
+        }
+        for header, expected in cases.items():
+            request = factory.get("/", HTTP_ACCEPT_ENCODING=header)
+            self.assertEqual(choose_encoding(request), expected, header)
+
+    def test_gzip_list(self):
+        plain = self.client.get(self.url)
+        self.assertNotIn("Content-Encoding", plain)
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertEqual(int(response["Content-Length"]), len(response.content))
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertLess(len(response.content), len(plain.content))
+
+    @skipIf(brotli is None, "Brotli не установлен")
+    def test_brotli_preferred(self):
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING="gzip, br")
+        self.assertEqual(response["Content-Encoding"], "br")
+        plain = self.client.get(self.url)
+        self.assertEqual(brotli.decompress(response.content), plain.content)
+
+    @override_settings(COMPRESSION_MIN_SIZE=100000)
+    def test_small_response_not_compressed(self):
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertNotIn("Content-Encoding", response)
+
+    def test_cached_variant_not_recompressed(self):
+        first = self.client.get(self.url, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(first["X-Cache"], "MISS")
+        with mock.patch("books.cache.compress") as compress:
+            second = self.client.get(self.url, HTTP_ACCEPT_ENCODING="gzip")
+            compress.assert_not_called()
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(second["Content-Encoding"], "gzip")
+        self.assertEqual(second.content, first.content)
+        # Клиент без сжатия получает несжатое тело из той же записи
+        plain = self.client.get(self.url)
+        self.assertEqual(plain["X-Cache"], "HIT")
+        self.assertEqual(gzip.decompress(second.content), plain.content)
+
+    def test_weak_etag_revalidates(self):
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertTrue(response["ETag"].startswith('W/"'))
+        revalidated = self.client.get(
+            self.url, HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(revalidated.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_streaming_export(self):
+        url = reverse("author-export")
+        plain = b"".join(self.client.get(url).streaming_content)
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertNotIn("Content-Length", response)
+        self.assertEqual(gzip.decompress(b"".join(response.streaming_content)), plain)
+
+    def test_async_streaming(self):
+        async def rows():
+            for i in range(200):
+                yield b'{"row": %d}\n' % i
+
+        async def get_response(request):
+            return StreamingHttpResponse(rows(), content_type="application/x-ndjson")
+
+        middleware = CompressionMiddleware(get_response)
+        self.assertTrue(iscoroutinefunction(middleware))
+        request = RequestFactory().get("/", HTTP_ACCEPT_ENCODING="gzip")
+        response = async_to_sync(middleware)(request)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+
+        async def body():
+            return b"".join([chunk async for chunk in response.streaming_content])
+
+        content = gzip.decompress(async_to_sync(body)())
+        self.assertEqual(content.count(b"\n"), 200)
+
+    @override_settings(COMPRESSION_STREAM_FLUSH_SIZE=64)
+    def test_stream_flushed_every_flush_size(self):
+        lines = [b'{"row": %d}\n' % i for i in range(40)]
+
+        async def alines():
+            for line in lines:
+                yield line
+
+        async def collect(chunks):
+            return [chunk async for chunk in chunks]
+
+        decoders = {"gzip": lambda: zlib.decompressobj(wbits=31).decompress}
+        if brotli is not None:
+            decoders["br"] = lambda: brotli.Decompressor().process
+        for encoding, decoder in decoders.items():
+            for chunks in (
+                list(compress_stream(iter(lines), encoding)),
+                async_to_sync(collect)(acompress_stream(alines(), encoding)),
+            ):
+                with self.subTest(encoding):
+                    self.assertGreater(len(chunks), 4)
+                    # Все, кроме хвоста после последнего сброса, распаковывается
+                    # до завершения потока
+                    unpack = decoder()
+                    received = b"".join(unpack(chunk) for chunk in chunks[:-1])
+                    self.assertGreaterEqual(len(received), len(b"".join(lines)) - 64)
+                    self.assertTrue(b"".join(lines).startswith(received))
+
+    def test_middleware_chain_async_capable(self):
+        # Синхронная middleware под ASGI переводит весь запрос в поток
+        for path in django_settings.MIDDLEWARE:
+            self.assertTrue(getattr(import_string(path), "async_capable", False), path)
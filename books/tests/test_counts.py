@@ -0,0 +1,102 @@
+import io
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection, models
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from ..bulk import set_links
+from ..models import Author, Book
+
+
+class MaterializedCountsTests(APITestCase):
+    def setUp(self):
+        self.author1 = Author.objects.create(name="Author 1")
+        self.author2 = Author.objects.create(name="Author 2")
+        self.book1 = Book.objects.create(title="Book 1")
+        self.book2 = Book.objects.create(title="Book 2")
+
+    def assertCounts(self, author1, author2, book1, book2):
+        self.assertEqual(
+            [
+                Author.objects.get(pk=self.author1.pk).book_count,
+                Author.objects.get(pk=self.author2.pk).book_count,
+                Book.objects.get(pk=self.book1.pk).author_count,
+                Book.objects.get(pk=self.book2.pk).author_count,
+            ],
+            [author1, author2, book1, book2],
+        )
+
+    def test_counts_follow_m2m_changes(self):
+        self.book1.authors.add(self.author1, self.author2)
+        self.author1.books.add(self.book1, self.book2)
+        self.assertCounts(2, 1, 2, 1)
+        self.book1.authors.remove(self.author2)
+        self.assertCounts(2, 0, 1, 1)
+        self.author1.books.clear()
+        self.assertCounts(0, 0, 0, 0)
+
+    def test_counts_follow_delete(self):
+        self.book1.authors.add(self.author1, self.author2)
+        self.book2.authors.add(self.author1)
+        self.author2.delete()
+        self.book2.delete()
+        self.assertEqual(Author.objects.get(pk=self.author1.pk).book_count, 1)
+        self.assertEqual(Book.objects.get(pk=self.book1.pk).author_count, 1)
+
+    def test_counts_follow_bulk_upsert(self):
+        self.book1.authors.add(self.author1)
+        data = [{"name": "Author 1", "books": [str(self.book2.id)]}]
+        self.client.post(reverse("author-bulk"), data, format="json")
+        self.assertCounts(1, 0, 0, 1)
+
+    def test_set_links_removes_with_single_delete(self):
+        self.book1.authors.add(self.author1, self.author2)
+        table = f'"{Book.authors.through._meta.db_table}"'
+        with CaptureQueriesContext(connection) as queries:
+            set_links(self.book1, [self.author2])
+        deletes = [q["sql"] for q in queries if q["sql"].startswith("DELETE")]
+        self.assertEqual(len(deletes), 1)
+        self.assertIn(table, deletes[0])
+        self.assertCounts(0, 1, 1, 0)
+
+    def test_save_does_not_overwrite_count(self):
+        stale = Author.objects.get(pk=self.author1.pk)
+        self.book1.authors.add(self.author1)
+        stale.name = "Renamed"
+        stale.save()
+        self.assertEqual(Author.objects.get(pk=self.author1.pk).book_count, 1)
+
+    def test_save_writes_every_field_but_counter(self):
+        with mock.patch.object(models.Model, "save") as save:
+            self.author1.save()
+            self.book1.save()
+        self.assertEqual(
+            [call.kwargs["update_fields"] for call in save.call_args_list],
+            [
+                ["name", "updated_at", "change_seq"],
+                ["title", "updated_at", "change_seq"],
+            ],
+        )
+
+    def test_threshold_params(self):
+        self.book1.authors.add(self.author1, self.author2)
+        self.book2.authors.add(self.author1)
+        response = self.client.get(reverse("author-filter-countbook"), {"min_books": 1})
+        self.assertEqual(len(response.data["results"]), 2)
+        response = self.client.get(reverse("book-filter-countbook"), {"max_authors": 2})
+        self.assertEqual(len(response.data["results"]), 2)
+        response = self.client.get(
+            reverse("book-filter-countbook"), {"max_authors": "x"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_rebuild_counts_command(self):
+        self.book1.authors.add(self.author1, self.author2)
+        Author.objects.update(book_count=7)
+        Book.objects.update(author_count=7)
+        call_command("rebuild_counts", batch_size=1, stdout=io.StringIO())
+        self.assertCounts(1, 1, 2, 0)
@@ -0,0 +1,84 @@
+import importlib.util
+import os
+import runpy
+from unittest import mock
+
+import django
+from django.conf import settings as django_settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.test import TransactionTestCase
+
+from dev.db import configure_pooling
+
+from ..benchmark import generate_catalog, measure_connection_modes
+from ..urls import urlpatterns
+
+
+class ConnectionPoolingTests(TransactionTestCase):
+    database = {"ENGINE": "django.db.backends.postgresql", "NAME": "books"}
+
+    def test_modes(self):
+        none = configure_pooling(self.database, "none")
+        self.assertEqual(none["CONN_MAX_AGE"], 0)
+        persistent = configure_pooling(self.database, "persistent", max_age=60)
+        self.assertEqual(persistent["CONN_MAX_AGE"], 60)
+        self.assertTrue(persistent["CONN_HEALTH_CHECKS"])
+        pgbouncer = configure_pooling(self.database, "pgbouncer")
+        self.assertTrue(pgbouncer["DISABLE_SERVER_SIDE_CURSORS"])
+        self.assertNotIn("CONN_MAX_AGE", self.database)
+        with self.assertRaises(ImproperlyConfigured):
+            configure_pooling(self.database, "bouncer")
+
+    def test_pool_mode(self):
+        if django.VERSION < (5, 1):
+            with self.assertRaises(ImproperlyConfigured):
+                configure_pooling(self.database, "pool")
+            return
+        pool = configure_pooling(self.database, "pool", min_size=1, max_size=4)
+        self.assertEqual(pool["CONN_MAX_AGE"], 0)
+        self.assertEqual(pool["OPTIONS"]["pool"]["max_size"], 4)
+
+    def test_asgi_defaults_to_connection_per_request(self):
+        def pool_mode(entry_point=None):
+            with mock.patch.dict(os.environ):
+                os.environ.pop("DB_POOL_MODE", None)
+                if entry_point:
+                    runpy.run_path(str(django_settings.BASE_DIR / "dev" / entry_point))
+                spec = importlib.util.spec_from_file_location(
+                    "settings_probe", django_settings.BASE_DIR / "dev" / "settings.py"
+                )
+                module = importlib.util.module_from_spec(spec)
+                spec.loader.exec_module(module)
+            return module.DB_POOL_MODE
+
+        self.assertEqual(pool_mode(), "persistent")
+        self.assertEqual(pool_mode("wsgi.py"), "persistent")
+        self.assertEqual(pool_mode("asgi.py"), "none")
+
+    def test_gunicorn_defaults_to_threaded_wsgi(self):
+        def config(**env):
+            with mock.patch.dict(os.environ, env):
+                os.environ.pop("GUNICORN_WORKER_CLASS", None)
+                os.environ.update(env)
+                return runpy.run_path(
+                    str(django_settings.BASE_DIR / "gunicorn.conf.py")
+                )
+
+        defaults = config()
+        self.assertEqual(defaults["worker_class"], "gthread")
+        self.assertEqual(defaults["wsgi_app"], "dev.wsgi:application")
+        self.assertGreater(defaults["threads"], 1)
+        uvicorn = config(GUNICORN_WORKER_CLASS="uvicorn.workers.UvicornWorker")
+        self.assertEqual(uvicorn["wsgi_app"], "dev.asgi:application")
+
+    def test_measure_connection_modes(self):
+        generate_catalog(5, 5, seed=3)
+        settings_dict = dict(connection.settings_dict)
+        results = measure_connection_modes(urlpatterns, requests=2)
+        self.assertEqual(set(results), {"none", "persistent"})
+        self.assertEqual(set(results["none"]), {"author-detail", "book-detail"})
+        stats = results["persistent"]["author-detail"]
+        self.assertEqual(stats["errors"], 0)
+        self.assertIn("saved_ms", stats)
+        self.assertEqual(connection.settings_dict, settings_dict)
@@ -0,0 +1,113 @@
+import gzip
+import io
+import json
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from ..benchmark import generate_catalog
+from ..export import author_row, uuid_ranges
+from ..models import Author, Book
+from ..serializers import AuthorSerializer, BookSerializer
+
+
+class NdjsonExportViewTests(APITestCase):
+    def setUp(self):
+        self.author1 = Author.objects.create(name="Лев Толстой")
+        self.author2 = Author.objects.create(name="Author 2")
+        book = Book.objects.create(title="Война и мир")
+        book.authors.add(self.author1, self.author2)
+        Book.objects.create(title="Book without authors")
+
+    def read_lines(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        content = b"".join(response.streaming_content).decode("utf-8")
+        return [json.loads(line) for line in content.splitlines()]
+
+    def test_export_authors_matches_serializer(self):
+        expected = json.loads(
+            json.dumps(
+                AuthorSerializer(Author.objects.order_by("id"), many=True).data,
+                default=str,
+            )
+        )
+        self.assertEqual(self.read_lines(reverse("author-export")), expected)
+
+    def test_export_books_matches_serializer(self):
+        expected = json.loads(
+            json.dumps(
+                BookSerializer(Book.objects.order_by("id"), many=True).data,
+                default=str,
+            )
+        )
+        self.assertEqual(self.read_lines(reverse("book-export")), expected)
+
+    async def test_asgi_export_streams_in_chunks(self):
+        rows = mock.Mock(wraps=author_row)
+        with mock.patch("books.views.author_row", rows), mock.patch(
+            "books.export.EXPORT_CHUNK_SIZE", 1
+        ):
+            response = await self.async_client.get(reverse("author-export"))
+            self.assertTrue(response.is_async)
+            chunks = aiter(response.streaming_content)
+            first = await anext(chunks)
+            # Первая строка отдана до сериализации остальных
+            self.assertEqual(rows.call_count, 1)
+            rest = [chunk async for chunk in chunks]
+        lines = (first + b"".join(rest)).decode("utf-8").splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(rows.call_count, 2)
+
+
+class ExportCatalogTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        generate_catalog(40, 60, "uniform:0-3", seed=5)
+
+    def test_uuid_ranges_cover_keyspace(self):
+        ranges = uuid_ranges(4)
+        self.assertEqual(ranges[0][0], None)
+        self.assertEqual(ranges[-1][1], None)
+        for (_, high), (low, _) in zip(ranges, ranges[1:]):
+            self.assertEqual(high, low)
+
+    def test_export_shards_and_manifest(self):
+        call_command(
+            "export_catalog",
+            "--output-dir",
+            self.tmp,
+            "--workers",
+            "1",
+            "--shards",
+            "3",
+            "--chunk-size",
+            "7",
+            stdout=io.StringIO(),
+        )
+        with open(os.path.join(self.tmp, "manifest.json"), encoding="utf-8") as f:
+            manifest = json.load(f)
+        self.assertEqual(manifest["rows"], {"authors": 40, "books": 60})
+        self.assertEqual(len(manifest["shards"]), 6)
+
+        books = {}
+        for shard in manifest["shards"]:
+            with gzip.open(os.path.join(self.tmp, shard["file"]), "rt") as f:
+                rows = [json.loads(line) for line in f]
+            self.assertEqual(len(rows), shard["rows"])
+            if shard["model"] == "books":
+                books.update((row["id"], set(row["authors"])) for row in rows)
+        self.assertEqual(len(books), 60)
+        for book in Book.objects.prefetch_related("authors"):
+            self.assertEqual(
+                books[str(book.pk)], {str(author.pk) for author in book.authors.all()}
+            )
@@ -0,0 +1,75 @@
+import json
+import uuid
+from unittest import mock
+
+from django.db import connection
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+
+from ..benchmark import generate_catalog, measure_read_paths
+from ..renderers import FastJSONRenderer
+
+
+def normalized(value):
+    """Порядок id внутри связей не гарантирован, сравниваем отсортированными"""
+    if isinstance(value, list):
+        items = [normalized(item) for item in value]
+        return sorted(items, key=json.dumps)
+    if isinstance(value, dict):
+        return {key: normalized(item) for key, item in value.items()}
+    return value
+
+
+class FastReadPathTests(APITestCase):
+    """Проверка, что списки без сериализаторов совпадают с ответом сериализаторов"""
+
+    def setUp(self):
+        generate_catalog(15, 30, "uniform:0-3", seed=3)
+
+    def get_both(self, url, params=None):
+        fast = self.client.get(url, params)
+        with override_settings(FAST_READ_PATH=False):
+            slow = self.client.get(url, params)
+        self.assertEqual(fast.status_code, status.HTTP_200_OK)
+        return json.loads(fast.content), json.loads(slow.content)
+
+    def test_lists_match_serializers(self):
+        for name, params in [
+            ("author-list-create", None),
+            ("author-filter-countbook", {"min_books": 1}),
+            ("author-filter-name", {"q": "author", "mode": "contains"}),
+            ("book-list-create", None),
+            ("book-filter-countbook", {"max_authors": 2}),
+            ("book-filter-name", {"q": "book"}),
+        ]:
+            with self.subTest(name):
+                fast, slow = self.get_both(reverse(name), params)
+                self.assertTrue(fast["results"])
+                self.assertEqual(normalized(fast), normalized(slow))
+
+    def test_cursor_pages(self):
+        url = reverse("book-list-create")
+        fast, slow = self.get_both(url, {"page_size": 10})
+        while fast["next"]:
+            self.assertEqual(fast["next"], slow["next"])
+            fast, slow = self.get_both(fast["next"])
+        self.assertEqual(normalized(fast), normalized(slow))
+
+    def test_links_fetched_in_parameter_sized_chunks(self):
+        url = reverse("author-list-create")
+        expected, _ = self.get_both(url)
+        with mock.patch.object(connection.features, "max_query_params", 4):
+            fast, _ = self.get_both(url)
+        self.assertEqual(normalized(fast), normalized(expected))
+
+    def test_renderer_matches_drf(self):
+        data = {"id": uuid.uuid4(), "name": "Автор\u2028", "items": [1, 2.5, None]}
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_measure_read_paths(self):
+        results = measure_read_paths(rows=10, repeat=1)
+        self.assertEqual(set(results), {"books", "authors"})
+        self.assertEqual(results["books"]["rows"], 10)
@@ -0,0 +1,148 @@
+import uuid
+from unittest import mock
+
+from django.core.cache import caches
+from django.db import connection
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from ..graph import AdjacencyIndex, query_neighbours
+from ..models import Author, Book
+from ..throttling import THROTTLE_CACHE
+
+
+class GraphTests(APITestCase):
+    def setUp(self):
+        caches[THROTTLE_CACHE].clear()
+        self.a, self.b, self.c, self.d, self.lonely = [
+            Author.objects.create(name=f"Author {i}") for i in range(5)
+        ]
+        self.b1 = Book.objects.create(title="Book 1")
+        self.b1.authors.set([self.a, self.b])
+        self.b2 = Book.objects.create(title="Book 2")
+        self.b2.authors.set([self.a, self.b, self.c])
+        self.b3 = Book.objects.create(title="Book 3")
+        self.b3.authors.set([self.c, self.d])
+
+    def get(self, name, pk, **params):
+        return self.client.get(reverse(name, kwargs={"pk": pk}), params)
+
+    def test_coauthors(self):
+        with self.assertNumQueries(1):
+            response = self.get("author-coauthors", self.a.pk)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data["results"],
+            [
+                {
+                    "id": str(self.b.pk),
+                    "name": "Author 1",
+                    "distance": 1,
+                    "shared_books": 2,
+                },
+                {
+                    "id": str(self.c.pk),
+                    "name": "Author 2",
+                    "distance": 1,
+                    "shared_books": 1,
+                },
+            ],
+        )
+        deep = self.get("author-coauthors", self.a.pk, depth=2).data["results"]
+        self.assertEqual(deep[-1]["id"], str(self.d.pk))
+        self.assertEqual((deep[-1]["distance"], deep[-1]["shared_books"]), (2, 0))
+        limited = self.get("author-coauthors", self.a.pk, depth=2, limit=1)
+        self.assertEqual(len(limited.data["results"]), 1)
+
+    def test_related_books(self):
+        response = self.get("book-related", self.b1.pk, depth=2)
+        self.assertEqual(
+            [
+                (item["title"], item["distance"], item["shared_authors"])
+                for item in response.data["results"]
+            ],
+            [("Book 2", 1, 2), ("Book 3", 2, 0)],
+        )
+
+    def test_missing_and_isolated(self):
+        response = self.get("author-coauthors", uuid.uuid4())
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.get("author-coauthors", self.lonely.pk)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["results"], [])
+
+    def assertIndexMatches(self, index):
+        for model, pk in ((Author, self.a.pk), (Book, self.b1.pk)):
+            for depth in (1, 2, 3):
+                self.assertEqual(
+                    index.neighbours(model, pk, depth),
+                    query_neighbours(model, pk, depth),
+                )
+
+    def test_index_follows_changes(self):
+        index = AdjacencyIndex()
+        index.refresh()
+        self.assertIndexMatches(index)
+        snapshot = index.edges
+        old_links = set(snapshot[Book][self.b1.pk])
+        self.b1.authors.add(self.d)
+        self.assertIndexMatches(index)
+        self.assertIn(self.d.pk, index.edges[Book][self.b1.pk])
+        # Прежний снимок, который мог обходить другой поток, не изменился
+        self.assertEqual(snapshot[Book][self.b1.pk], old_links)
+        self.assertNotIn(self.b1.pk, snapshot[Author].get(self.d.pk, set()))
+        self.b.delete()
+        self.assertIndexMatches(index)
+        self.assertNotIn(self.b.pk, index.edges[Author])
+        self.assertNotIn(self.b.pk, index.edges[Book][self.b2.pk])
+        self.b2.authors.clear()
+        self.assertIndexMatches(index)
+
+    def test_stale_index_not_awaited(self):
+        index = AdjacencyIndex()
+        index.refresh()
+        seq = index.seq
+        self.b1.authors.add(self.d)
+        # Другой поток обновляет индекс: обход идет в БД без ожидания
+        with index._lock:
+            self.assertEqual(
+                index.neighbours(Author, self.d.pk, 3),
+                query_neighbours(Author, self.d.pk, 3),
+            )
+        self.assertEqual(index.seq, seq)
+
+    def test_full_build_in_background(self):
+        index = AdjacencyIndex()
+        with mock.patch("books.graph.threading.Thread") as thread:
+            self.assertEqual(
+                index.neighbours(Author, self.a.pk, 2),
+                query_neighbours(Author, self.a.pk, 2),
+            )
+        self.assertIsNone(index.seq)
+        self.assertTrue(index._lock.locked())
+        kwargs = thread.call_args.kwargs
+        with mock.patch.object(connection, "close"):
+            kwargs["target"](*kwargs["args"])
+        self.assertFalse(index._lock.locked())
+        self.assertIsNotNone(index.seq)
+        with mock.patch("books.graph.query_neighbours") as query:
+            self.assertIndexMatches(index)
+        query.assert_not_called()
+
+    @override_settings(GRAPH_INDEX=True, GRAPH_INDEX_MIN_DEPTH=3)
+    def test_endpoint_with_index(self):
+        index = AdjacencyIndex()
+        index.refresh()
+        with mock.patch("books.graph.INDEX", index), mock.patch(
+            "books.graph.query_neighbours", wraps=query_neighbours
+        ) as query:
+            response = self.get("author-coauthors", self.a.pk, depth=3)
+            query.assert_not_called()
+            self.get("author-coauthors", self.a.pk, depth=1)
+            query.assert_called_once()
+        self.assertEqual(
+            [item["id"] for item in response.data["results"]],
+            [str(self.b.pk), str(self.c.pk), str(self.d.pk)],
+        )
@@ -0,0 +1,79 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+import uuid
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..importer import iter_records
+from ..models import Author, Book
+
+
+class ImportCatalogTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.state = os.path.join(self.tmp, "state.json")
+        self.authors = [uuid.uuid4() for _ in range(3)]
+        lines = [
+            {"model": "books.author", "pk": str(pk), "fields": {"name": f" A{i} "}}
+            for i, pk in enumerate(self.authors)
+        ] + [
+            {"id": str(uuid.uuid4()), "title": "B1", "authors": [str(self.authors[0])]},
+            {"id": str(uuid.uuid4()), "title": "B2", "authors": [str(uuid.uuid4())]},
+        ]
+        self.path = os.path.join(self.tmp, "catalog.ndjson")
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write("\n".join(json.dumps(line) for line in lines))
+
+    def run_import(self, *args):
+        out = io.StringIO()
+        call_command("import_catalog", *args, "--state-file", self.state, stdout=out)
+        return out.getvalue()
+
+    def test_iter_records_streams_arrays_and_ndjson(self):
+        records = [{"name": f"Автор {i}", "tags": ["[x]", "{y}"]} for i in range(5)]
+        for text in (json.dumps(records), "\n".join(map(json.dumps, records))):
+            self.assertEqual(
+                list(iter_records(io.StringIO(text), chunk_size=7)), records
+            )
+
+    def test_import_fixtures(self):
+        self.run_import(
+            "fixtures/author.json", "fixtures/book.json", "--batch-size", "4"
+        )
+        with open("fixtures/book.json", encoding="utf-8") as f:
+            books = json.load(f)
+        self.assertEqual(Book.objects.count(), len(books))
+        for book in books:
+            self.assertEqual(
+                Book.objects.get(pk=book["pk"]).author_count,
+                len(book["fields"]["authors"]),
+            )
+
+    def test_import_strips_and_skips_missing_links(self):
+        output = self.run_import(self.path, "--batch-size", "2")
+        self.assertEqual(Author.objects.get(pk=self.authors[0]).name, "A0")
+        self.assertEqual(Author.objects.get(pk=self.authors[0]).book_count, 1)
+        self.assertEqual(Book.objects.get(title="B2").author_count, 0)
+        self.assertIn("пропущено 1", output)
+
+    def test_resume_skips_committed_records(self):
+        self.run_import(self.path, "--batch-size", "2")
+        Author.objects.filter(pk=self.authors[0]).delete()
+        with open(self.state, encoding="utf-8") as f:
+            state = json.load(f)
+        entry = state[os.path.abspath(self.path)]
+        self.assertTrue(entry["done"])
+
+        # Как будто импорт оборвался после первой пачки из двух записей
+        entry.update(done=False, records=2)
+        with open(self.state, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        self.run_import(self.path, "--resume")
+        self.assertFalse(Author.objects.filter(pk=self.authors[0]).exists())
+        self.assertEqual(Author.objects.count(), 2)
+        self.assertIn("уже импортирован", self.run_import(self.path, "--resume"))
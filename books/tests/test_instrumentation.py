@@ -0,0 +1,74 @@
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from ..instrumentation import REGISTRY, InstrumentationMiddleware, QueryTracker
+from ..models import Author, Book
+
+
+@override_settings(INSTRUMENTATION_SAMPLE_RATE=1.0)
+class InstrumentationTests(APITestCase):
+    def setUp(self):
+        REGISTRY.reset()
+        author = Author.objects.create(name="Author 1")
+        Book.objects.create(title="Book 1").authors.add(author)
+
+    def test_server_timing_header(self):
+        response = self.client.get(reverse("author-list-create"))
+        timing = response["Server-Timing"]
+        self.assertIn("db;dur=", timing)
+        self.assertIn('desc="3 queries', timing)
+        for phase in ("serialize;dur=", "render;dur=", "total;dur="):
+            self.assertIn(phase, timing)
+
+    @override_settings(INSTRUMENTATION_SAMPLE_RATE=0.0)
+    def test_unsampled_request_has_no_header(self):
+        response = self.client.get(reverse("author-list-create"))
+        self.assertNotIn("Server-Timing", response)
+
+    def test_metrics_endpoint(self):
+        self.client.get(reverse("book-list-create"))
+        response = self.client.get(reverse("metrics"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        body = response.content.decode()
+        self.assertIn(
+            'books_requests_total{view="book-list-create",method="GET"} 1', body
+        )
+        self.assertIn(
+            'books_queries_total{view="book-list-create",method="GET"} 2', body
+        )
+        self.assertIn(
+            'books_request_duration_seconds_count{view="book-list-create",method="GET"} 1',
+            body,
+        )
+
+    def test_duplicate_queries_detected(self):
+        tracker = QueryTracker()
+        with connection.execute_wrapper(tracker):
+            for pk in [1, 1, 2]:
+                list(Author.objects.filter(name=str(pk)))
+        self.assertEqual(tracker.count, 3)
+        self.assertEqual(tracker.duplicates, 1)
+        self.assertEqual(tracker.similar, 2)
+
+    def test_async_chain_without_thread_hop(self):
+        async def get_response(request):
+            return HttpResponse(b"ok")
+
+        middleware = InstrumentationMiddleware(get_response)
+        self.assertTrue(iscoroutinefunction(middleware))
+        self.assertTrue(iscoroutinefunction(middleware.process_view))
+        self.assertTrue(iscoroutinefunction(middleware.process_template_response))
+        request = RequestFactory().get("/")
+        request.resolver_match = None
+        response = async_to_sync(middleware)(request)
+        self.assertIn("total;dur=", response["Server-Timing"])
+
+    async def test_async_view_sampled(self):
+        response = await self.async_client.get(reverse("author-list-create"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("db;dur=", response["Server-Timing"])
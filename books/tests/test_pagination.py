@@ -0,0 +1,35 @@
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from ..models import Author, Book
+
+
+class KeysetCursorPaginationTests(APITestCase):
+    def setUp(self):
+        for i in range(7):
+            Author.objects.create(name=f"Author {i}")
+
+    def test_walk_all_pages(self):
+        url = reverse("author-list-create")
+        params = {"page_size": 3}
+        seen = []
+        while url:
+            response = self.client.get(url, params, format="json")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data["results"]), 3)
+            seen.extend(item["id"] for item in response.data["results"])
+            url, params = response.data["next"], None
+        self.assertEqual(len(seen), 7)
+        self.assertEqual(seen, sorted(seen))
+
+    def test_insert_does_not_shift_next_page(self):
+        url = reverse("book-list-create")
+        for i in range(4):
+            Book.objects.create(title=f"Book {i}")
+        first = self.client.get(url, {"page_size": 2}, format="json").data
+        Book.objects.create(title="Inserted book")
+        second = self.client.get(first["next"], format="json").data
+        first_ids = {item["id"] for item in first["results"]}
+        self.assertFalse(first_ids & {item["id"] for item in second["results"]})
+        self.assertGreater(second["results"][0]["id"], first["results"][-1]["id"])
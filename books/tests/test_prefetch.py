@@ -0,0 +1,109 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from ..models import Author, Book
+
+
+class PrefetchQueryCountTests(APITestCase):
+    """Проверка, что чтение выполняется фиксированным числом запросов"""
+
+    def setUp(self):
+        self.authors = [Author.objects.create(name=f"Author {i}") for i in range(5)]
+        self.books = [Book.objects.create(title=f"Book {i}") for i in range(5)]
+        for book in self.books:
+            book.authors.set(self.authors)
+
+    def assertQueries(self, num, url, params=None):
+        with self.assertNumQueries(num):
+            response = self.client.get(url, params or {}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+
+    def test_author_list(self):
+        response = self.assertQueries(3, reverse("author-list-create"))
+        self.assertEqual(len(response.data["results"][0]["books"][0]["authors"]), 5)
+
+    def test_author_detail(self):
+        url = reverse("author-detail", args=[str(self.authors[0].id)])
+        response = self.assertQueries(2, url)
+        self.assertEqual(len(response.data["books"]), 5)
+
+    def test_author_filter_name(self):
+        self.assertQueries(3, reverse("author-filter-name"), {"name": "Author 1"})
+
+    def test_author_filter_count(self):
+        response = self.assertQueries(3, reverse("author-filter-countbook"))
+        self.assertEqual(len(response.data["results"]), 5)
+
+    def test_book_list(self):
+        response = self.assertQueries(2, reverse("book-list-create"))
+        self.assertEqual(len(response.data["results"][0]["authors"]), 5)
+
+    def test_book_detail(self):
+        url = reverse("book-detail", args=[str(self.books[0].id)])
+        self.assertQueries(2, url)
+
+    def test_book_filter_name(self):
+        self.assertQueries(2, reverse("book-filter-name"), {"title": "Book 1"})
+
+    def test_book_filter_count(self):
+        Book.objects.create(title="Lonely book")
+        response = self.assertQueries(2, reverse("book-filter-countbook"))
+        self.assertEqual(len(response.data["results"]), 1)
+
+
+class SparseFieldsTests(APITestCase):
+    """Проверка ?fields= и ?expand=: лишние поля не отдаются и не загружаются"""
+
+    def setUp(self):
+        self.author = Author.objects.create(name="Author 1")
+        self.book = Book.objects.create(title="Book 1")
+        self.book.authors.set([self.author])
+
+    def test_fields_skip_prefetch(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                reverse("author-list-create"), {"fields": "id,name"}
+            )
+        self.assertEqual(
+            response.data["results"], [{"id": str(self.author.id), "name": "Author 1"}]
+        )
+
+    def test_fields_trim_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse("book-list-create"), {"fields": "id"})
+        self.assertNotIn("title", queries.captured_queries[0]["sql"])
+
+    def test_nested_fields(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                reverse("author-list-create"), {"fields": "name,books.title"}
+            )
+        self.assertEqual(
+            response.data["results"],
+            [{"name": "Author 1", "books": [{"title": "Book 1"}]}],
+        )
+
+    def test_expand(self):
+        response = self.client.get(
+            reverse("book-detail", args=[str(self.book.id)]), {"expand": "authors"}
+        )
+        self.assertEqual(
+            response.data["authors"], [{"id": str(self.author.id), "name": "Author 1"}]
+        )
+        response = self.client.get(
+            reverse("author-detail", args=[str(self.author.id)]),
+            {"expand": "books", "fields": "books.title"},
+        )
+        self.assertEqual(response.data, {"books": [{"title": "Book 1"}]})
+
+    def test_write_ignores_fields(self):
+        response = self.client.patch(
+            reverse("book-detail", args=[str(self.book.id)]) + "?fields=id",
+            {"title": "Book 2"},
+            format="json",
+        )
+        self.assertEqual(response.data["title"], "Book 2")
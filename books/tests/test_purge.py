@@ -0,0 +1,65 @@
+from unittest import mock
+
+from django.db.models.query import QuerySet
+from django.db.models.signals import pre_delete
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from ..models import Author, Book
+from ..purge import purge
+
+
+class PurgeTests(APITestCase):
+    def setUp(self):
+        self.authors = [Author.objects.create(name=f"Author {i}") for i in range(4)]
+        self.keep = Author.objects.create(name="Keeper")
+        self.book = Book.objects.create(title="Book 1")
+        self.book.authors.set(self.authors + [self.keep])
+
+    def test_purge_subset_in_batches(self):
+        response = self.client.delete(
+            reverse("author-delete-all") + "?name__istartswith=author&batch_size=3"
+        )
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(response["X-Deleted-Count"], "4")
+        self.assertEqual(list(Author.objects.all()), [self.keep])
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.author_count, 1)
+        self.assertEqual(list(self.book.authors.all()), [self.keep])
+
+    def test_purge_books_by_count(self):
+        Book.objects.create(title="Lonely book")
+        response = self.client.delete(reverse("book-delete-all") + "?author_count=0")
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(list(Book.objects.all()), [self.book])
+
+    def test_purge_does_not_load_instances(self):
+        with self.assertNumQueries(10):
+            # SAVEPOINT, SELECT id, SELECT связей, DELETE связей, DELETE строк,
+            # UPDATE счетчиков, номер изменения, INSERT отметок об удалении,
+            # UPDATE номера у книг, RELEASE SAVEPOINT
+            purge(Author.objects.all(), batch_size=100)
+        self.assertEqual(Author.objects.count(), 0)
+        self.assertEqual(Book.objects.get().author_count, 0)
+
+    def test_purge_relies_on_raw_delete(self):
+        # purge() обходит Collector через частный QuerySet._raw_delete,
+        # обновление Django, которое его уберет, должно сломать этот тест
+        self.assertTrue(callable(getattr(QuerySet, "_raw_delete", None)))
+        handler = mock.Mock()
+        pre_delete.connect(handler, sender=Author)
+        self.addCleanup(pre_delete.disconnect, handler, sender=Author)
+        self.assertEqual(purge(Author.objects.all()), 5)
+        handler.assert_not_called()
+
+    def test_invalid_parameters_are_client_errors(self):
+        for url in (
+            reverse("author-delete-all") + "?batch_size=x",
+            reverse("author-delete-all") + "?book_count=abc",
+            reverse("book-delete-all") + "?author_count=abc",
+        ):
+            response = self.client.delete(url)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, url)
+        self.assertEqual(Author.objects.count(), 5)
+        self.assertEqual(Book.objects.count(), 1)
@@ -0,0 +1,108 @@
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.core.cache import caches
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+
+from ..cache import bump_generations, replica_may_lag
+from ..models import Author
+from ..routing import (
+    SELECTOR,
+    STICKY_COOKIE,
+    ReplicaRouter,
+    ReplicaRoutingMiddleware,
+    ReplicaSelector,
+    read_from,
+)
+
+
+@override_settings(DATABASE_REPLICAS=["replica1", "replica2"])
+class ReplicaRoutingTests(TestCase):
+    def setUp(self):
+        caches["default"].clear()
+        self.router = ReplicaRouter()
+        self.factory = RequestFactory()
+        self.middleware = ReplicaRoutingMiddleware(
+            lambda request: HttpResponse(
+                self.router.db_for_read(Author) or "default",
+                status=201 if request.method == "POST" else 200,
+            )
+        )
+
+    def read(self, **extra):
+        return self.middleware(self.factory.get("/api/authors/", **extra)).content
+
+    def test_round_robin(self):
+        self.assertEqual({self.read() for _ in range(4)}, {b"replica1", b"replica2"})
+        self.assertIsNone(self.router.db_for_read(Author))
+
+    def test_least_loaded(self):
+        selector = ReplicaSelector()
+        busy = selector.acquire(["replica1", "replica2"], "least-loaded")
+        for _ in range(3):
+            alias = selector.acquire(["replica1", "replica2"], "least-loaded")
+            self.assertNotEqual(alias, busy)
+            selector.release(alias)
+        selector.release(busy)
+        self.assertEqual(selector.in_flight(busy), 0)
+
+    def test_writes_and_migrations_use_primary(self):
+        self.assertEqual(self.router.db_for_write(Author), "default")
+        self.assertFalse(self.router.allow_migrate("replica1", "books"))
+        self.assertIsNone(self.router.allow_migrate("default", "books"))
+
+    def test_reads_stick_to_primary_after_write(self):
+        response = self.middleware(self.factory.post("/api/authors/"))
+        self.assertIn(STICKY_COOKIE, response.cookies)
+        cookie = response.cookies[STICKY_COOKIE].value
+        self.factory.cookies[STICKY_COOKIE] = cookie
+        self.assertEqual(self.read(REMOTE_ADDR="10.0.0.2"), b"default")
+        # Клиент без cookie закрепляется по адресу
+        del self.factory.cookies[STICKY_COOKIE]
+        self.assertEqual(self.read(), b"default")
+        self.assertNotEqual(self.read(REMOTE_ADDR="10.0.0.3"), b"default")
+
+    @override_settings(REPLICA_STICKY_SECONDS=0)
+    def test_sticky_window_disabled(self):
+        response = self.middleware(self.factory.post("/api/authors/"))
+        self.assertNotIn(STICKY_COOKIE, response.cookies)
+        self.assertNotEqual(self.read(), b"default")
+
+    def test_replica_response_not_cached_after_write(self):
+        bump_generations("author")
+        self.assertFalse(replica_may_lag())
+        with read_from("replica1"):
+            self.assertTrue(replica_may_lag())
+            with override_settings(REPLICA_STICKY_SECONDS=0):
+                self.assertFalse(replica_may_lag())
+
+    def test_streaming_response_reads_replica_until_consumed(self):
+        def rows():
+            yield self.router.db_for_read(Author).encode()
+
+        middleware = ReplicaRoutingMiddleware(
+            lambda request: StreamingHttpResponse(rows())
+        )
+        response = middleware(self.factory.get("/api/authors/export/"))
+        busy = [n for n in ("replica1", "replica2") if SELECTOR.in_flight(n) == 1]
+        self.assertEqual(len(busy), 1)
+        self.assertEqual(b"".join(response.streaming_content), busy[0].encode())
+        self.assertEqual(SELECTOR.in_flight(busy[0]), 0)
+        response.close()
+        self.assertEqual(SELECTOR.in_flight(busy[0]), 0)
+
+        # Поток, который не читали, освобождает реплику при закрытии ответа
+        response = middleware(self.factory.get("/api/authors/export/"))
+        response.close()
+        self.assertEqual(
+            [SELECTOR.in_flight(name) for name in ("replica1", "replica2")], [0, 0]
+        )
+
+    def test_async_middleware(self):
+        async def get_response(request):
+            return HttpResponse(self.router.db_for_read(Author) or "default")
+
+        middleware = ReplicaRoutingMiddleware(get_response)
+        self.assertTrue(iscoroutinefunction(middleware))
+        response = async_to_sync(middleware)(self.factory.get("/api/authors/"))
+        self.assertIn(response.content, {b"replica1", b"replica2"})
+        self.assertIsNone(self.router.db_for_read(Author))
@@ -0,0 +1,73 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from ..schema import SchemaStore, build_schema, source_hash
+
+
+class SchemaArtifactTests(APITestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, "openapi.json")
+        settings = override_settings(OPENAPI_SCHEMA_PATH=self.path)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        patcher = mock.patch("books.schema.STORE", SchemaStore())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_build_only_when_sources_change(self):
+        out = io.StringIO()
+        call_command("build_schema", stdout=out)
+        self.assertIn("собрана", out.getvalue())
+        with open(self.path) as file:
+            artifact = json.load(file)
+        self.assertEqual(artifact["hash"], source_hash())
+        self.assertIn("/api/authors/", artifact["schema"]["paths"])
+
+        with mock.patch("books.schema.generate_schema") as generate:
+            call_command("build_schema", "--check", stdout=io.StringIO())
+            self.assertFalse(build_schema())
+            generate.assert_not_called()
+        with override_settings(SPECTACULAR_SETTINGS={"TITLE": "Other"}):
+            self.assertNotEqual(source_hash(), artifact["hash"])
+            with self.assertRaises(CommandError):
+                call_command("build_schema", "--check", stdout=io.StringIO())
+
+    def test_served_from_artifact_with_etag(self):
+        build_schema()
+        url = reverse("schema")
+        with mock.patch("books.schema.generate_schema") as generate:
+            response = self.client.get(url, HTTP_ACCEPT="application/json")
+            self.client.get(url)
+            generate.assert_not_called()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Cache-Control"], "no-cache")
+        self.assertIn("/api/books/", json.loads(response.content)["paths"])
+        etag = response["ETag"]
+        response = self.client.get(
+            url, HTTP_ACCEPT="application/json", HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.content.startswith(b"openapi:"))
+
+    def test_stale_artifact_regenerated(self):
+        with open(self.path, "w") as file:
+            json.dump({"hash": "stale", "schema": {"paths": {}}}, file)
+        with self.assertLogs("books.schema", "WARNING"):
+            response = self.client.get(
+                reverse("schema"), HTTP_ACCEPT="application/json"
+            )
+        self.assertIn("/api/authors/", json.loads(response.content)["paths"])
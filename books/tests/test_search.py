@@ -0,0 +1,64 @@
+import importlib.util
+
+from django.db import connection
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from ..models import Author, Book
+
+
+class SearchViewTests(APITestCase):
+    def setUp(self):
+        for name in ["John Doe", "Johnny Cash", "Jane Doe", "Doe John"]:
+            Author.objects.create(name=name)
+        Book.objects.create(title="War and Peace")
+        Book.objects.create(title="Peace Treaty")
+
+    def search(self, url_name, **params):
+        response = self.client.get(reverse(url_name), params, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_prefix_search_is_case_insensitive(self):
+        data = self.search("author-filter-name", q="john")
+        self.assertEqual(
+            [item["name"] for item in data["results"]], ["John Doe", "Johnny Cash"]
+        )
+
+    def test_contains_search(self):
+        data = self.search("book-filter-name", q="peace", mode="contains")
+        self.assertEqual(len(data["results"]), 2)
+
+    def test_fuzzy_search_ranks_closest_first(self):
+        data = self.search("author-filter-name", q="john doe", mode="fuzzy")
+        self.assertEqual(data["results"][0]["name"], "John Doe")
+
+    def test_search_is_paginated(self):
+        data = self.search("author-filter-name", q="doe", mode="contains", limit=2)
+        self.assertEqual(len(data["results"]), 2)
+        self.assertIsNotNone(data["next"])
+        response = self.client.get(data["next"], format="json")
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertIsNone(response.data["next"])
+
+    def test_search_indexes_are_migrated_only_on_postgres(self):
+        migration = importlib.import_module(
+            "books.migrations.0004_search_indexes"
+        ).Migration
+        self.assertFalse(migration.atomic)
+        names = {op.index.name for op in migration.operations[1:]}
+        self.assertEqual(
+            names,
+            {index.name for index in Author._meta.indexes + Book._meta.indexes}
+            - {"authors_change_seq_idx", "books_change_seq_idx"},
+        )
+        with connection.cursor() as cursor:
+            existing = connection.introspection.get_constraints(cursor, "authors")
+        self.assertNotIn("authors_name_trgm_idx", existing)
+
+    def test_invalid_mode(self):
+        response = self.client.get(
+            reverse("author-filter-name"), {"q": "x", "mode": "y"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
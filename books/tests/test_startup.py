@@ -0,0 +1,84 @@
+import importlib.util
+import os
+import subprocess
+import sys
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.db.utils import OperationalError
+from django.test import override_settings
+from django.urls import NoReverseMatch, clear_url_caches, reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from dev import urls as root_urls
+from dev.startup import warm_up
+
+from ..benchmark import child_pids, process_memory_kb
+
+
+class StartupTests(APITestCase):
+    def setUp(self):
+        patcher = mock.patch.dict("dev.startup._migrated", clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_ready(self):
+        response = self.client.get(reverse("ready"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.json(),
+            {"status": "ready", "checks": {"database": "ok", "migrations": "ok"}},
+        )
+        self.assertEqual(warm_up(), {"database": "ok", "migrations": "ok"})
+
+    def test_not_ready(self):
+        with mock.patch(
+            "django.db.migrations.executor.MigrationExecutor.migration_plan",
+            return_value=[("migration", False)],
+        ):
+            response = self.client.get(reverse("ready"))
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response.json()["checks"]["migrations"][-1], "1")
+
+        cursor = mock.patch.object(
+            connection, "cursor", side_effect=OperationalError("no database")
+        )
+        with cursor, self.assertLogs("dev.startup", "WARNING"):
+            checks = warm_up()
+        self.assertEqual(checks, {"database": "no database", "migrations": "unknown"})
+
+    def test_migrations_match_models(self):
+        executor = MigrationExecutor(connection)
+        self.assertIn(("books", "0001_initial"), executor.loader.disk_migrations)
+        self.assertEqual(
+            executor.migration_plan(executor.loader.graph.leaf_nodes()), []
+        )
+        call_command("makemigrations", "books", check=True, dry_run=True, verbosity=0)
+
+    def test_disabled_apps_not_routed(self):
+        def reload():
+            clear_url_caches()
+            importlib.reload(root_urls)
+
+        self.addCleanup(reload)
+        with override_settings(ADMIN_ENABLED=False, API_DOCS_ENABLED=False):
+            reload()
+            for name in ("schema", "swagger-ui", "admin:index"):
+                with self.assertRaises(NoReverseMatch):
+                    reverse(name)
+            self.assertEqual(self.client.get(reverse("ready")).status_code, 200)
+
+    def test_process_memory(self):
+        memory = process_memory_kb(os.getpid())
+        if memory["rss_kb"] is None:
+            self.skipTest("нет /proc")
+        self.assertGreater(memory["rss_kb"], 0)
+        child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+        try:
+            self.assertIn(child.pid, child_pids(os.getpid()))
+        finally:
+            child.kill()
+            child.wait()
@@ -0,0 +1,87 @@
+from unittest import mock
+
+from django.core.cache import caches
+from django.db.utils import OperationalError
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from ..models import Author
+from ..throttling import LIMITER, THROTTLE_CACHE, BucketStore
+from ..views import BookFilterCountBooks
+
+
+@override_settings(THROTTLE_RATE=1, THROTTLE_BURST=20, HEAVY_VIEW_CONCURRENCY=1)
+class ThrottlingTests(APITestCase):
+    def setUp(self):
+        caches[THROTTLE_CACHE].clear()
+        self.author = Author.objects.create(name="Author 1")
+
+    def test_bucket_charges_view_cost(self):
+        url = reverse("author-filter-countbook")
+        for _ in range(2):
+            self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertGreaterEqual(int(response["Retry-After"]), 1)
+        # Корзина своя у каждого эндпоинта и клиента
+        detail = reverse("author-detail", kwargs={"pk": self.author.pk})
+        self.assertEqual(self.client.get(detail).status_code, status.HTTP_200_OK)
+        other = self.client.get(url, REMOTE_ADDR="10.0.0.2")
+        self.assertEqual(other.status_code, status.HTTP_200_OK)
+
+    @override_settings(THROTTLE_ENABLED=False)
+    def test_disabled(self):
+        url = reverse("author-filter-countbook")
+        for _ in range(3):
+            self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+
+    def test_bucket_refills(self):
+        store = BucketStore()
+        with mock.patch("books.throttling.time.time", return_value=100.0):
+            self.assertEqual(store.take("key", 10, rate=2, burst=10), 0)
+            self.assertEqual(store.take("key", 4, rate=2, burst=10), 2.0)
+        with mock.patch("books.throttling.time.time", return_value=102.0):
+            self.assertEqual(store.take("key", 4, rate=2, burst=10), 0)
+
+    def test_local_fallback_when_cache_fails(self):
+        store = BucketStore()
+        with mock.patch("books.throttling.caches") as broken:
+            broken.__getitem__.side_effect = OSError
+            self.assertEqual(store.take("key", 10, rate=1, burst=10), 0)
+            self.assertGreater(store.take("key", 10, rate=1, burst=10), 0)
+
+    def test_heavy_view_sheds_load(self):
+        url = reverse("book-filter-countbook")
+        self.assertTrue(LIMITER.acquire("heavy", 1))
+        try:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+            self.assertEqual(response["Retry-After"], "1")
+            # Лимит общий для тяжелых представлений
+            listing = self.client.get(reverse("author-list-create"))
+            self.assertEqual(listing.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+            # Запись в представление со списком не ограничивается
+            created = self.client.post(
+                reverse("book-list-create"), {"title": "Book 1"}, format="json"
+            )
+            self.assertEqual(created.status_code, status.HTTP_201_CREATED)
+        finally:
+            LIMITER.release("heavy")
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+        self.assertEqual(LIMITER.in_flight("heavy"), 0)
+
+    @override_settings(THROTTLE_ENABLED=False)
+    def test_slot_released_when_view_raises(self):
+        url = reverse("book-filter-countbook")
+        with mock.patch.object(
+            BookFilterCountBooks,
+            "list",
+            side_effect=OperationalError("database is locked"),
+        ):
+            for _ in range(2):
+                with self.assertRaises(OperationalError):
+                    self.client.get(url)
+        self.assertEqual(LIMITER.in_flight("heavy"), 0)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
@@ -1,11 +1,9 @@
+from django.test import TestCase
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
-from .models import Author, Book
-from django.test import TestCase
-from rest_framework.test import APITestCase
-from rest_framework import status
-from .views import *
+
+from ..models import Author, Book
 
 
 class AuthorModelTests(TestCase):
@@ -41,7 +39,7 @@ class AuthorListCreateViewTests(APITestCase):
         url = reverse("author-list-create")
         response = self.client.get(url, format="json")
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
+        self.assertEqual(len(response.data["results"]), 2)
 
 
 class AuthorRetrieveUpdateDestroyViewTests(APITestCase):
@@ -69,8 +67,8 @@ class AuthorFilterNameViewTests(APITestCase):
         url = reverse("author-filter-name")
         response = self.client.get(url, {"name": "John Doe"}, format="json")
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]["name"], "John Doe")
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertEqual(response.data["results"][0]["name"], "John Doe")
 
 
 class AuthorFilterCountBooksViewTests(APITestCase):
@@ -95,14 +93,11 @@ class AuthorDeleteAllViewTests(APITestCase):
 
 class BookFilterCountBooksViewTests(APITestCase):
     def setUp(self):
-        self.author1 = Author.objects.create(name="Author 1")
-        self.author2 = Author.objects.create(name="Author 2")
-
-        self.book1 = Book.objects.create(title="Book with single author")
-        self.book2 = Book.objects.create(title="Book with multiple authors")
-
-        self.book1.authors.add(self.author1)
-        self.book2.authors.add(self.author1, self.author2)
+        author = Author.objects.create(name="Author 1")
+        book1 = Book.objects.create(title="Book with single author")
+        book2 = Book.objects.create(title="Book with multiple authors")
+        book1.authors.add(author)
+        book2.authors.add(author)
 
 
 class BookModelTests(TestCase):
@@ -128,7 +123,7 @@ class BookListCreateViewTests(APITestCase):
         url = reverse("book-list-create")
         response = self.client.get(url, format="json")
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
+        self.assertEqual(len(response.data["results"]), 2)
 
 
 class BookRetrieveUpdateDestroyViewTests(APITestCase):
@@ -163,8 +158,8 @@ class BookFilterNameViewTests(APITestCase):
         url = reverse("book-filter-name")
         response = self.client.get(url, {"title": "Book 1"}, format="json")
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]["title"], "Book 1")
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertEqual(response.data["results"][0]["title"], "Book 1")
 
 
 class BookFilterCountBooksViewTests(APITestCase):
@@ -0,0 +1,179 @@
+import math
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.throttling import BaseThrottle
+
+THROTTLE_CACHE: str = "throttle"
+BUCKET_KEY: str = "books:bucket:{}:{}"
+# Вес запроса к представлению в токенах, у детальных запросов - 1
+LIST_COST: int = 5
+AGGREGATE_COST: int = 10
+# Корзин в памяти процесса на время недоступности общего кэша
+MAX_LOCAL_BUCKETS: int = 10000
+
+# Корзина: (токенов осталось, time.time() последнего списания)
+Bucket = Tuple[float, float]
+
+
+class BucketStore:
+    """Класс для хранения корзин токенов в кэше THROTTLE_CACHE
+
+    По умолчанию это LocMemCache процесса, и лимит считается в пределах
+    процесса: блокировка делает списание атомарным только между потоками.
+    С общим DatabaseCache или FileBasedCache лимит на несколько воркеров
+    приблизительный: чтение и запись корзины в разных процессах не
+    упорядочены, и одновременные запросы могут списать одни и те же токены.
+    Если общий кэш недоступен, корзины временно ведутся в памяти процесса.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._local: Dict[str, Bucket] = {}
+
+    def take(self, key: str, cost: float, rate: float, burst: float) -> float:
+        """Метод для списания cost токенов из корзины key
+
+        Возвращает 0, если токенов хватило, иначе число секунд, через которое
+        они накопятся. Пустая корзина пополняется до burst за burst / rate
+        секунд, после этого запись в кэше не нужна и истекает.
+        """
+        now: float = time.time()
+        timeout: int = math.ceil(burst / rate) + 1
+        with self._lock:
+            try:
+                cache: Optional[Any] = caches[THROTTLE_CACHE]
+                bucket: Optional[Bucket] = cache.get(key)
+            except Exception:
+                cache, bucket = None, self._local.get(key)
+
+            tokens, updated = bucket or (burst, now)
+            tokens = min(burst, tokens + max(0.0, now - updated) * rate)
+            wait: float = 0.0
+            if tokens >= cost:
+                tokens -= cost
+            else:
+                wait = (cost - tokens) / rate
+
+            if cache is not None:
+                try:
+                    cache.set(key, (tokens, now), timeout)
+                    self._local.pop(key, None)
+                    return wait
+                except Exception:
+                    pass
+            if len(self._local) >= MAX_LOCAL_BUCKETS:
+                self._local.clear()
+            self._local[key] = (tokens, now)
+            return wait
+
+
+STORE: BucketStore = BucketStore()
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Класс для ограничения частоты запросов корзиной токенов
+
+    Корзина своя у каждого клиента на каждом эндпоинте: емкость
+    THROTTLE_BURST, пополнение THROTTLE_RATE токенов в секунду. Запрос
+    списывает throttle_cost представления (по умолчанию 1), поэтому списки и
+    агрегаты исчерпывают лимит быстрее детальных запросов.
+    """
+
+    wait_seconds: float = 0.0
+
+    def allow_request(self, request: Request, view: Any) -> bool:
+        self.wait_seconds = 0.0
+        if not getattr(settings, "THROTTLE_ENABLED", True):
+            return True
+        rate: float = float(getattr(settings, "THROTTLE_RATE", 20))
+        burst: float = float(getattr(settings, "THROTTLE_BURST", 200))
+        cost: float = min(float(getattr(view, "throttle_cost", 1)), burst)
+        match: Any = getattr(request, "resolver_match", None)
+        endpoint: str = match.view_name if match else type(view).__name__
+        self.wait_seconds = STORE.take(
+            BUCKET_KEY.format(self.get_ident(request), endpoint), cost, rate, burst
+        )
+        return self.wait_seconds == 0
+
+    def wait(self) -> Optional[float]:
+        return self.wait_seconds or None
+
+
+class Overloaded(APIException):
+    """Ошибка при превышении лимита одновременных запросов, отдается с кодом 503"""
+
+    status_code: int = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail: str = "Сервер перегружен, повторите запрос позже."
+    default_code: str = "overloaded"
+
+    def __init__(self, wait: int) -> None:
+        super().__init__()
+        # exception_handler DRF выставляет по нему заголовок Retry-After
+        self.wait = wait
+
+
+class ConcurrencyLimiter:
+    """Класс для подсчета одновременных запросов к представлениям в процессе"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, int] = defaultdict(int)
+
+    def acquire(self, name: str, limit: int) -> bool:
+        with self._lock:
+            if self._in_flight[name] >= limit:
+                return False
+            self._in_flight[name] += 1
+            return True
+
+    def release(self, name: str) -> None:
+        with self._lock:
+            self._in_flight[name] -= 1
+
+    def in_flight(self, name: str) -> int:
+        return self._in_flight[name]
+
+
+LIMITER: ConcurrencyLimiter = ConcurrencyLimiter()
+
+
+class AdmissionControlMixin:
+    """Mixin для отказа тяжелым GET-запросам сверх HEAVY_VIEW_CONCURRENCY одновременных
+
+    Лимит общий для представлений с одинаковым admission_pool и считается в
+    пределах процесса, поэтому тяжелые запросы не занимают все потоки и
+    дешевым остается запас. Лишний запрос сразу получает 503 с Retry-After
+    вместо ожидания в очереди до таймаута; проверка идет после ограничения
+    частоты. Миксин ставится после CachedResponseMixin: слот занимает только
+    запрос, не найденный в кэше ответов, а ответы из кэша и 304 его не ждут.
+    """
+
+    admission_pool: str = "heavy"
+    admission_slot: Optional[str] = None
+
+    def get(self, request: Request, *args: Any, **kwargs: Any) -> HttpResponse:
+        limit: int = int(getattr(settings, "HEAVY_VIEW_CONCURRENCY", 0))
+        if limit > 0:
+            if not LIMITER.acquire(self.admission_pool, limit):
+                raise Overloaded(int(getattr(settings, "ADMISSION_RETRY_AFTER", 1)))
+            self.admission_slot = self.admission_pool
+        return super().get(request, *args, **kwargs)
+
+    def dispatch(self, request: Any, *args: Any, **kwargs: Any) -> HttpResponse:
+        # Слот возвращается и тогда, когда ошибка (например, БД) пробрасывается
+        # из dispatch мимо finalize_response
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            if self.admission_slot is not None:
+                LIMITER.release(self.admission_slot)
+                self.admission_slot = None
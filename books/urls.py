@@ -1,4 +1,5 @@
 from django.urls import path
+from .instrumentation import metrics_view
 from .views import (
     AuthorListCreateView,
     AuthorRetrieveUpdateDestroyView,
@@ -10,21 +11,44 @@ from .views import (
     BookFilterName,
     BookFilterCountBooks,
     BookDeleteAllView,
+    AuthorExportView,
+    BookExportView,
+    AuthorBulkView,
+    BookBulkView,
+    AuthorBatchView,
+    BookBatchView,
+    ChangesView,
+    AuthorCoauthorsView,
+    BookRelatedView,
 )
 
 urlpatterns: list[path] = [
     path("api/authors/", AuthorListCreateView.as_view(), name="author-list-create"),
+    path("api/authors/bulk/", AuthorBulkView.as_view(), name="author-bulk"),
+    path("api/authors/batch/", AuthorBatchView.as_view(), name="author-batch"),
     path(
         "api/authors/<uuid:pk>/",
         AuthorRetrieveUpdateDestroyView.as_view(),
         name="author-detail",
     ),
+    path(
+        "api/authors/<uuid:pk>/coauthors/",
+        AuthorCoauthorsView.as_view(),
+        name="author-coauthors",
+    ),
     path("api/books/", BookListCreateView.as_view(), name="book-list-create"),
+    path("api/books/bulk/", BookBulkView.as_view(), name="book-bulk"),
+    path("api/books/batch/", BookBatchView.as_view(), name="book-batch"),
     path(
         "api/books/<uuid:pk>/",
         BookRetrieveUpdateDestroyView.as_view(),
         name="book-detail",
     ),
+    path(
+        "api/books/<uuid:pk>/related/",
+        BookRelatedView.as_view(),
+        name="book-related",
+    ),
     path("api/author-name/", AuthorFilterName.as_view(), name="author-filter-name"),
     path(
         "api/author-count/",
@@ -41,4 +65,12 @@ urlpatterns: list[path] = [
         "api/book-count/", BookFilterCountBooks.as_view(), name="book-filter-countbook"
     ),
     path("api/book/delete-all/", BookDeleteAllView.as_view(), name="book-delete-all"),
+    path(
+        "api/export/authors.ndjson",
+        AuthorExportView.as_view(),
+        name="author-export",
+    ),
+    path("api/export/books.ndjson", BookExportView.as_view(), name="book-export"),
+    path("api/changes/", ChangesView.as_view(), name="changes"),
+    path("api/_metrics", metrics_view, name="metrics"),
 ]
@@ -1,22 +1,123 @@
+import uuid
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import generics, status
 from rest_framework.response import Response
 from rest_framework.request import Request
 from .models import Book, Author
-from .serializers import AuthorSerializer, BookSerializer, AuthorRetrieveSerializer
+from .serializers import (
+    AuthorSerializer,
+    BookSerializer,
+    AuthorRetrieveSerializer,
+    AuthorBulkSerializer,
+    BookBulkSerializer,
+    BatchIdsSerializer,
+    MAX_BATCH_IDS,
+)
 from typing import Type
+from django.db import DatabaseError
 from django.db.models.query import QuerySet
-from django.db.models import Count
-from typing import List, Any
+from typing import Any, Dict, List, Optional, Tuple
 from rest_framework import serializers
-from drf_spectacular.utils import extend_schema
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema, OpenApiParameter
+from django.http import Http404, StreamingHttpResponse
+from .prefetch import PrefetchRelatedMixin, apply_plan
+from .cache import CachedResponseMixin
+from .search import SEARCH_PARAMETERS, SearchMixin
+from .export import author_row, book_row, stream_ndjson
+from .bulk import BulkUpsert, upsert_authors, upsert_books
+from .purge import MAX_PURGE_BATCH_SIZE, PURGE_BATCH_SIZE, purge
+from .fastpath import FastListMixin, author_rows, book_rows
+from .throttling import AGGREGATE_COST, LIST_COST, AdmissionControlMixin
+from .graph import GRAPH_PAGE_SIZE, MAX_GRAPH_DEPTH, MAX_GRAPH_PAGE_SIZE, neighbours
+from .changes import (
+    CHANGES_PAGE_SIZE,
+    MAX_CHANGES_PAGE_SIZE,
+    Position,
+    decode_token,
+    encode_token,
+    pruned_seq,
+    read_changes,
+    token_expired,
+)
+
+NDJSON_CONTENT_TYPE: str = "application/x-ndjson"
+
+
+def threshold_param(request: Request, name: str, default: int) -> int:
+    """Метод для чтения неотрицательного порога из параметров запроса"""
+    value: str = request.query_params.get(name, str(default))
+    if not value.isdigit():
+        raise serializers.ValidationError({name: "Ожидается неотрицательное целое"})
+    return int(value)
+
+
+BATCH_PARAMETERS: List[OpenApiParameter] = [
+    OpenApiParameter(
+        "ids",
+        str,
+        description=f"id через запятую, не больше {MAX_BATCH_IDS}; для больших "
+        'списков - POST с телом {"ids": [...]}',
+    )
+]
+
+CHANGES_PARAMETERS: List[OpenApiParameter] = [
+    OpenApiParameter(
+        "since",
+        str,
+        description="Токен next из предыдущего ответа, без него лента читается с начала",
+    ),
+    OpenApiParameter(
+        "limit",
+        int,
+        description=f"Изменений на странице, по умолчанию {CHANGES_PAGE_SIZE}, "
+        f"не больше {MAX_CHANGES_PAGE_SIZE}",
+    ),
+]
+
+GRAPH_PARAMETERS: List[OpenApiParameter] = [
+    OpenApiParameter(
+        "depth",
+        int,
+        description=f"Шагов обхода графа, по умолчанию 1, не больше {MAX_GRAPH_DEPTH}",
+    ),
+    OpenApiParameter(
+        "limit",
+        int,
+        description=f"Объектов в ответе, по умолчанию {GRAPH_PAGE_SIZE}, "
+        f"не больше {MAX_GRAPH_PAGE_SIZE}",
+    ),
+]
+
+PURGE_PARAMETERS: List[OpenApiParameter] = [
+    OpenApiParameter(
+        "batch_size",
+        int,
+        description=f"Строк в одной транзакции, по умолчанию {PURGE_BATCH_SIZE}",
+    )
+]
+
+
+def purge_batch_size(request: Request) -> int:
+    """Метод для чтения размера пачки удаления из параметров запроса"""
+    batch_size: int = threshold_param(request, "batch_size", PURGE_BATCH_SIZE)
+    return max(1, min(batch_size, MAX_PURGE_BATCH_SIZE))
 
 
 @extend_schema(tags=["Author"])
-class AuthorListCreateView(generics.ListCreateAPIView):
+class AuthorListCreateView(
+    CachedResponseMixin,
+    AdmissionControlMixin,
+    FastListMixin,
+    PrefetchRelatedMixin,
+    generics.ListCreateAPIView,
+):
     """Класс для создания автора и получения всех авторов"""
 
+    throttle_cost: int = LIST_COST
     queryset: QuerySet[Author] = Author.objects.all()
+    fast_fields: Tuple[str, ...] = ("id", "name")
+    fast_rows = staticmethod(author_rows)
 
     def get_serializer_class(self) -> Type[serializers.ModelSerializer]:
         if self.request.method == "POST":
@@ -25,100 +126,438 @@ class AuthorListCreateView(generics.ListCreateAPIView):
 
 
 @extend_schema(tags=["Author"])
-class AuthorRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
+class AuthorRetrieveUpdateDestroyView(
+    CachedResponseMixin, PrefetchRelatedMixin, generics.RetrieveUpdateDestroyAPIView
+):
     """Класс для получения одного автора, изменения и удаления"""
 
     queryset: QuerySet[Author] = Author.objects.all()
     serializer_class = AuthorRetrieveSerializer
 
 
-@extend_schema(tags=["Author"])
-class AuthorFilterName(generics.ListAPIView):
-    """Класс для получения отфильтрованных авторов по имени"""
+@extend_schema(tags=["Author"], parameters=SEARCH_PARAMETERS)
+class AuthorFilterName(
+    SearchMixin,
+    CachedResponseMixin,
+    AdmissionControlMixin,
+    FastListMixin,
+    PrefetchRelatedMixin,
+    generics.ListAPIView,
+):
+    """Класс для получения отфильтрованных авторов по имени и поиска по имени"""
 
+    throttle_cost: int = LIST_COST
     queryset: QuerySet[Author] = Author.objects.all()
     serializer_class = AuthorSerializer
     filter_backends: List[Type[DjangoFilterBackend]] = [DjangoFilterBackend]
     filterset_fields: List[str] = ["name"]
+    search_field: str = "name"
+    fast_fields: Tuple[str, ...] = ("id", "name")
+    fast_rows = staticmethod(author_rows)
 
 
 @extend_schema(tags=["Author"])
-class AuthorFilterCountBooks(generics.ListAPIView):
-    """Класс для получения отфильтрованных авторов, у которых >=2 книг"""
-
-    queryset: QuerySet[Author] = Author.objects.annotate(
-        num_books=Count("books")
-    ).filter(num_books__gte=2)
+class AuthorFilterCountBooks(
+    CachedResponseMixin,
+    AdmissionControlMixin,
+    FastListMixin,
+    PrefetchRelatedMixin,
+    generics.ListAPIView,
+):
+    """Класс для получения отфильтрованных авторов, у которых >=min_books книг (по умолчанию 2)"""
+
+    throttle_cost: int = AGGREGATE_COST
+    queryset: QuerySet[Author] = Author.objects.all()
     serializer_class = AuthorSerializer
+    fast_fields: Tuple[str, ...] = ("id", "name")
+    fast_rows = staticmethod(author_rows)
+
+    @extend_schema(
+        parameters=[OpenApiParameter("min_books", int, description="По умолчанию 2")]
+    )
+    def get(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        return super().get(request, *args, **kwargs)
+
+    def get_queryset(self) -> QuerySet[Author]:
+        min_books: int = threshold_param(self.request, "min_books", 2)
+        return super().get_queryset().filter(book_count__gte=min_books)
 
 
 @extend_schema(tags=["Author"])
 class AuthorDeleteAllView(generics.GenericAPIView):
-    """Класс для удаления всех авторов"""
+    """Класс для удаления всех авторов или отобранных фильтром"""
 
     queryset: QuerySet[Author] = Author.objects.all()
     serializer_class = AuthorSerializer
+    filter_backends: List[Type[DjangoFilterBackend]] = [DjangoFilterBackend]
+    filterset_fields: Dict[str, List[str]] = {
+        "name": ["exact", "istartswith"],
+        "book_count": ["exact", "lte", "gte"],
+    }
 
+    @extend_schema(parameters=PURGE_PARAMETERS)
     def delete(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        # Неверные фильтр и batch_size - ошибка клиента (400), не сервера
+        authors: QuerySet[Author] = self.filter_queryset(self.get_queryset())
+        batch_size: int = purge_batch_size(request)
         try:
-            authors: QuerySet[Author] = self.get_queryset()
-            authors.delete()
-            return Response(status=status.HTTP_204_NO_CONTENT)
-        except Exception as e:
+            deleted: Optional[int] = purge(authors, batch_size)
+            response = Response(status=status.HTTP_204_NO_CONTENT)
+            if deleted is not None:
+                response["X-Deleted-Count"] = deleted
+            return response
+        except DatabaseError as e:
             return Response(
                 {"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
 
 @extend_schema(tags=["Books"])
-class BookListCreateView(generics.ListCreateAPIView):
+class BookListCreateView(
+    CachedResponseMixin,
+    AdmissionControlMixin,
+    FastListMixin,
+    PrefetchRelatedMixin,
+    generics.ListCreateAPIView,
+):
     """Класс для создания книги и получения всех книг"""
 
+    throttle_cost: int = LIST_COST
     queryset: QuerySet[Book] = Book.objects.all()
     serializer_class = BookSerializer
+    fast_fields: Tuple[str, ...] = ("id", "title")
+    fast_rows = staticmethod(book_rows)
 
 
 @extend_schema(tags=["Books"])
-class BookRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
+class BookRetrieveUpdateDestroyView(
+    CachedResponseMixin, PrefetchRelatedMixin, generics.RetrieveUpdateDestroyAPIView
+):
     """Класс для получения одной книги, изменения и удаления"""
 
     queryset: QuerySet[Book] = Book.objects.all()
     serializer_class = BookSerializer
 
 
-@extend_schema(tags=["Books"])
-class BookFilterName(generics.ListAPIView):
-    """Класс для получения отфильтрованных книг по названию"""
+@extend_schema(tags=["Books"], parameters=SEARCH_PARAMETERS)
+class BookFilterName(
+    SearchMixin,
+    CachedResponseMixin,
+    AdmissionControlMixin,
+    FastListMixin,
+    PrefetchRelatedMixin,
+    generics.ListAPIView,
+):
+    """Класс для получения отфильтрованных книг по названию и поиска по названию"""
 
+    throttle_cost: int = LIST_COST
     queryset: QuerySet[Book] = Book.objects.all()
     serializer_class = BookSerializer
     filter_backends: List[Type[DjangoFilterBackend]] = [DjangoFilterBackend]
     filterset_fields: List[str] = ["title"]
+    search_field: str = "title"
+    fast_fields: Tuple[str, ...] = ("id", "title")
+    fast_rows = staticmethod(book_rows)
 
 
 @extend_schema(tags=["Books"])
-class BookFilterCountBooks(generics.ListAPIView):
-    """Класс для получения отфильтрованных книг, у которых <=2 авторов"""
-
-    queryset: QuerySet[Book] = Book.objects.annotate(
-        num_authors=Count("authors")
-    ).filter(num_authors__lt=2)
+class BookFilterCountBooks(
+    CachedResponseMixin,
+    AdmissionControlMixin,
+    FastListMixin,
+    PrefetchRelatedMixin,
+    generics.ListAPIView,
+):
+    """Класс для получения отфильтрованных книг, у которых <=max_authors авторов (по умолчанию 1)"""
+
+    throttle_cost: int = AGGREGATE_COST
+    queryset: QuerySet[Book] = Book.objects.all()
     serializer_class = BookSerializer
+    fast_fields: Tuple[str, ...] = ("id", "title")
+    fast_rows = staticmethod(book_rows)
+
+    @extend_schema(
+        parameters=[OpenApiParameter("max_authors", int, description="По умолчанию 1")]
+    )
+    def get(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        return super().get(request, *args, **kwargs)
+
+    def get_queryset(self) -> QuerySet[Book]:
+        max_authors: int = threshold_param(self.request, "max_authors", 1)
+        return super().get_queryset().filter(author_count__lte=max_authors)
 
 
 @extend_schema(tags=["Books"])
 class BookDeleteAllView(generics.GenericAPIView):
-    """Класс для удаления всех книг"""
+    """Класс для удаления всех книг или отобранных фильтром"""
 
     queryset: QuerySet[Book] = Book.objects.all()
     serializer_class = BookSerializer
+    filter_backends: List[Type[DjangoFilterBackend]] = [DjangoFilterBackend]
+    filterset_fields: Dict[str, List[str]] = {
+        "title": ["exact", "istartswith"],
+        "author_count": ["exact", "lte", "gte"],
+    }
 
+    @extend_schema(parameters=PURGE_PARAMETERS)
     def delete(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        # Неверные фильтр и batch_size - ошибка клиента (400), не сервера
+        books: QuerySet[Book] = self.filter_queryset(self.get_queryset())
+        batch_size: int = purge_batch_size(request)
         try:
-            books: QuerySet[Book] = self.get_queryset()
-            books.delete()
-            return Response(status=status.HTTP_204_NO_CONTENT)
-        except Exception as e:
+            deleted: Optional[int] = purge(books, batch_size)
+            response = Response(status=status.HTTP_204_NO_CONTENT)
+            if deleted is not None:
+                response["X-Deleted-Count"] = deleted
+            return response
+        except DatabaseError as e:
             return Response(
                 {"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+
+
+@extend_schema(tags=["Export"])
+class AuthorExportView(generics.GenericAPIView):
+    """Класс для потоковой выгрузки всех авторов в формате NDJSON"""
+
+    throttle_cost: int = AGGREGATE_COST
+    queryset: QuerySet[Author] = Author.objects.order_by("id")
+    serializer_class = AuthorSerializer
+
+    def get(self, request: Request, *args: Any, **kwargs: Any) -> StreamingHttpResponse:
+        queryset: QuerySet[Author] = apply_plan(self.get_queryset(), AuthorSerializer)
+        return StreamingHttpResponse(
+            stream_ndjson(request, queryset, author_row),
+            content_type=NDJSON_CONTENT_TYPE,
+        )
+
+
+@extend_schema(tags=["Export"])
+class BookExportView(generics.GenericAPIView):
+    """Класс для потоковой выгрузки всех книг в формате NDJSON"""
+
+    throttle_cost: int = AGGREGATE_COST
+    queryset: QuerySet[Book] = Book.objects.order_by("id")
+    serializer_class = BookSerializer
+
+    def get(self, request: Request, *args: Any, **kwargs: Any) -> StreamingHttpResponse:
+        queryset: QuerySet[Book] = apply_plan(self.get_queryset(), BookSerializer)
+        return StreamingHttpResponse(
+            stream_ndjson(request, queryset, book_row),
+            content_type=NDJSON_CONTENT_TYPE,
+        )
+
+
+class BulkUpsertView(generics.GenericAPIView):
+    """Базовый класс для пакетного создания/обновления по уникальному полю"""
+
+    throttle_cost: int = LIST_COST
+    key: str
+    relation: str
+    related_model: Type[Any]
+    upsert: Any
+
+    def post(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        if not isinstance(request.data, list):
+            return Response(
+                {"error": "Ожидается список объектов"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        report = BulkUpsert(
+            self.get_serializer_class(),
+            self.key,
+            self.relation,
+            self.related_model,
+            self.upsert,
+        ).run(request.data)
+        return Response(report, status=status.HTTP_200_OK)
+
+
+@extend_schema(tags=["Author"], request=AuthorBulkSerializer(many=True))
+class AuthorBulkView(BulkUpsertView):
+    """Класс для пакетного создания/обновления авторов по имени"""
+
+    serializer_class = AuthorBulkSerializer
+    key = "name"
+    relation = "books"
+    related_model = Book
+    upsert = staticmethod(upsert_authors)
+
+
+@extend_schema(tags=["Books"], request=BookBulkSerializer(many=True))
+class BookBulkView(BulkUpsertView):
+    """Класс для пакетного создания/обновления книг по названию"""
+
+    serializer_class = BookBulkSerializer
+    key = "title"
+    relation = "authors"
+    related_model = Author
+    upsert = staticmethod(upsert_books)
+
+
+class BatchLookupView(
+    CachedResponseMixin, PrefetchRelatedMixin, generics.GenericAPIView
+):
+    """Базовый класс для получения многих объектов по списку id одним запросом
+
+    Ответ: {"results": {id: объект}, "missing": [id]}; порядок results
+    совпадает с порядком запрошенных id, повторы отбрасываются.
+    """
+
+    throttle_cost: int = LIST_COST
+
+    def lookup_ids(self, data: Any) -> List[uuid.UUID]:
+        serializer = BatchIdsSerializer(data=data)
+        serializer.is_valid(raise_exception=True)
+        return list(dict.fromkeys(serializer.validated_data["ids"]))
+
+    def batch_response(self, ids: List[uuid.UUID]) -> Response:
+        objects: Dict[uuid.UUID, Any] = {
+            obj.pk: obj for obj in self.get_queryset().filter(pk__in=ids)
+        }
+        found: List[uuid.UUID] = [pk for pk in ids if pk in objects]
+        data = self.get_serializer([objects[pk] for pk in found], many=True).data
+        return Response(
+            {
+                "results": {str(pk): item for pk, item in zip(found, data)},
+                "missing": [str(pk) for pk in ids if pk not in objects],
+            }
+        )
+
+    @extend_schema(parameters=BATCH_PARAMETERS)
+    def get(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        ids: List[str] = [
+            part.strip()
+            for value in request.query_params.getlist("ids")
+            for part in value.split(",")
+            if part.strip()
+        ]
+        return self.batch_response(self.lookup_ids({"ids": ids}))
+
+    @extend_schema(request=BatchIdsSerializer)
+    def post(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        return self.batch_response(self.lookup_ids(request.data))
+
+
+@extend_schema(tags=["Author"])
+class AuthorBatchView(BatchLookupView):
+    """Класс для получения многих авторов по списку id"""
+
+    queryset: QuerySet[Author] = Author.objects.all()
+    serializer_class = AuthorRetrieveSerializer
+
+
+@extend_schema(tags=["Books"])
+class BookBatchView(BatchLookupView):
+    """Класс для получения многих книг по списку id"""
+
+    queryset: QuerySet[Book] = Book.objects.all()
+    serializer_class = BookSerializer
+
+
+@extend_schema(tags=["Changes"])
+class ChangesView(generics.GenericAPIView):
+    """Класс для ленты изменений авторов и книг после токена since
+
+    Ответ: {"changes": [...], "next": токен, "has_more": bool}. Изменение
+    содержит номер seq, модель, id, updated_at и объект data в формате
+    /api/authors/<pk>/ или /api/books/<pk>/; удаления приходят с
+    "deleted": true (id = null - удалены все объекты модели). Если отметки
+    об удалении после since уже очищены, возвращается 410 и клиент заново
+    читает ленту с начала.
+    """
+
+    throttle_cost: int = LIST_COST
+    queryset: QuerySet[Author] = Author.objects.all()
+
+    @extend_schema(parameters=CHANGES_PARAMETERS, responses=OpenApiTypes.OBJECT)
+    def get(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        limit: int = min(
+            max(threshold_param(request, "limit", CHANGES_PAGE_SIZE), 1),
+            MAX_CHANGES_PAGE_SIZE,
+        )
+        using: str = self.get_queryset().db
+        pruned: int = pruned_seq(using)
+        position: Optional[Position] = None
+        since: str = request.query_params.get("since", "")
+        if since:
+            try:
+                position, token_pruned = decode_token(since)
+            except ValueError as e:
+                raise serializers.ValidationError({"since": str(e)})
+            if token_expired(position, token_pruned, pruned):
+                return Response(
+                    {"error": "Токен устарел, выполните полную синхронизацию"},
+                    status=status.HTTP_410_GONE,
+                )
+
+        changes, last, has_more = read_changes(position, limit, using)
+        return Response(
+            {
+                "changes": changes,
+                "next": encode_token(last, pruned) if last else None,
+                "has_more": has_more,
+            }
+        )
+
+
+class GraphView(generics.GenericAPIView):
+    """Базовый класс для связанных объектов, найденных обходом графа авторы-книги
+
+    Ответ: {"id": pk, "depth": d, "results": [...]}; ближние объекты идут
+    первыми, при равном расстоянии - с большим числом общих соседей.
+    Обход выполняется одним запросом к БД (books/graph.py) или по индексу в
+    памяти при GRAPH_INDEX.
+    """
+
+    throttle_cost: int = AGGREGATE_COST
+    label: str
+    shared: str
+
+    @extend_schema(parameters=GRAPH_PARAMETERS, responses=OpenApiTypes.OBJECT)
+    def get(self, request: Request, pk: uuid.UUID) -> Response:
+        depth: int = min(max(threshold_param(request, "depth", 1), 1), MAX_GRAPH_DEPTH)
+        limit: int = min(
+            max(threshold_param(request, "limit", GRAPH_PAGE_SIZE), 1),
+            MAX_GRAPH_PAGE_SIZE,
+        )
+        queryset: QuerySet = self.get_queryset()
+        results = neighbours(queryset.model, pk, depth, limit, queryset.db)
+        # Пустой результат бывает и у объекта без связей
+        if not results and not queryset.filter(pk=pk).exists():
+            raise Http404
+        return Response(
+            {
+                "id": str(pk),
+                "depth": depth,
+                "results": [
+                    {
+                        "id": str(node),
+                        self.label: label,
+                        "distance": distance,
+                        self.shared: shared,
+                    }
+                    for node, label, distance, shared in results
+                ],
+            }
+        )
+
+
+@extend_schema(tags=["Author"])
+class AuthorCoauthorsView(CachedResponseMixin, AdmissionControlMixin, GraphView):
+    """Класс для соавторов автора: distance=1 - общие книги, больше - соавторы соавторов"""
+
+    queryset: QuerySet[Author] = Author.objects.all()
+    serializer_class = AuthorSerializer
+    label = "name"
+    shared = "shared_books"
+
+
+@extend_schema(tags=["Books"])
+class BookRelatedView(CachedResponseMixin, AdmissionControlMixin, GraphView):
+    """Класс для книг, связанных с книгой через общих авторов"""
+
+    queryset: QuerySet[Book] = Book.objects.all()
+    serializer_class = BookSerializer
+    label = "title"
+    shared = "shared_authors"
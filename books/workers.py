@@ -0,0 +1,5 @@
+def setup_django() -> None:
+    """Инициализация Django в процессе-воркере (spawn), до импорта моделей"""
+    import django
+
+    django.setup()
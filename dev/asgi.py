@@ -12,5 +12,8 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "dev.settings")
+# Постоянные подключения живут в потоках sync_to_async и не закрываются
+# по окончании запроса; пул (DB_POOL_MODE=pool) требует Django 5.1+
+os.environ.setdefault("DB_POOL_MODE", "none")
 
 application = get_asgi_application()
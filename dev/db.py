@@ -0,0 +1,65 @@
+from importlib.util import find_spec
+from typing import Any, Dict, Tuple
+
+import django
+from django.core.exceptions import ImproperlyConfigured
+
+# none - подключение на запрос, persistent - постоянные подключения с
+# проверкой перед запросом, pool - пул psycopg 3 (Django 5.1+, для ASGI),
+# pgbouncer - постоянные подключения к PgBouncer в режиме transaction
+POOL_MODES: Tuple[str, ...] = ("none", "persistent", "pool", "pgbouncer")
+
+
+def configure_pooling(
+    database: Dict[str, Any],
+    mode: str,
+    max_age: int = 600,
+    min_size: int = 2,
+    max_size: int = 10,
+    timeout: float = 10,
+) -> Dict[str, Any]:
+    """Метод для настройки подключений к БД под выбранный режим пула
+
+    Возвращает копию словаря из DATABASES; max_age - время жизни постоянного
+    подключения в секундах, min_size/max_size/timeout - параметры пула
+    psycopg_pool.ConnectionPool.
+    """
+    if mode not in POOL_MODES:
+        raise ImproperlyConfigured(
+            f"DB_POOL_MODE={mode!r}, допустимо: {', '.join(POOL_MODES)}"
+        )
+    database = {**database, "OPTIONS": dict(database.get("OPTIONS") or {})}
+    database["OPTIONS"].pop("pool", None)
+
+    if mode == "none":
+        database["CONN_MAX_AGE"] = 0
+        database["CONN_HEALTH_CHECKS"] = False
+    elif mode == "pool":
+        if django.VERSION < (5, 1):
+            raise ImproperlyConfigured(
+                "DB_POOL_MODE=pool требует Django 5.1+, "
+                f"установлен {django.get_version()}"
+            )
+        if find_spec("psycopg") is None or find_spec("psycopg_pool") is None:
+            raise ImproperlyConfigured(
+                "DB_POOL_MODE=pool требует psycopg[binary,pool] вместо psycopg2"
+            )
+        if "postgresql" not in database.get("ENGINE", ""):
+            raise ImproperlyConfigured(
+                "DB_POOL_MODE=pool доступен только для PostgreSQL"
+            )
+        # Подключения возвращаются в пул после запроса, постоянные не нужны
+        database["CONN_MAX_AGE"] = 0
+        database["CONN_HEALTH_CHECKS"] = False
+        database["OPTIONS"]["pool"] = {
+            "min_size": min_size,
+            "max_size": max_size,
+            "timeout": timeout,
+        }
+    else:
+        database["CONN_MAX_AGE"] = max_age
+        database["CONN_HEALTH_CHECKS"] = True
+        if mode == "pgbouncer":
+            # В режиме transaction курсор не переживает транзакцию
+            database["DISABLE_SERVER_SIDE_CURSORS"] = True
+    return database
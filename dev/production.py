@@ -0,0 +1,19 @@
+"""
+Production settings for dev project: DJANGO_SETTINGS_MODULE=dev.production.
+
+DEBUG is off, so executed queries are not kept in memory, and the admin is
+not loaded. Any value can still be overridden with an environment variable.
+"""
+
+import os
+
+# Значения по умолчанию профиля; переменные окружения их перекрывают
+PRODUCTION_DEFAULTS = {
+    "DEBUG": "0",
+    "ADMIN_ENABLED": "0",
+    "API_DOCS_ENABLED": "1",
+}
+for name, value in PRODUCTION_DEFAULTS.items():
+    os.environ.setdefault(name, value)
+
+from dev.settings import *  # noqa: E402,F401,F403
@@ -0,0 +1,111 @@
+import gc
+import logging
+from typing import Any, Dict, List, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.migrations.executor import MigrationExecutor
+from django.http import HttpRequest, JsonResponse
+from django.urls import get_resolver
+
+logger = logging.getLogger(__name__)
+
+# Лениво импортируемые классы DRF, которые иначе загружаются первым запросом
+DRF_SETTINGS: Tuple[str, ...] = (
+    "DEFAULT_RENDERER_CLASSES",
+    "DEFAULT_PARSER_CLASSES",
+    "DEFAULT_AUTHENTICATION_CLASSES",
+    "DEFAULT_PERMISSION_CLASSES",
+    "DEFAULT_THROTTLE_CLASSES",
+    "DEFAULT_CONTENT_NEGOTIATION_CLASS",
+    "DEFAULT_PAGINATION_CLASS",
+    "DEFAULT_FILTER_BACKENDS",
+)
+
+# Базы, миграции которых уже проверены: откатить их работающий процесс не может
+_migrated: Dict[str, bool] = {}
+
+
+def readiness(using: str = DEFAULT_DB_ALIAS) -> Dict[str, str]:
+    """Метод для проверки готовности процесса принимать запросы
+
+    Возвращает {проверка: "ok" или описание ошибки}: database - БД доступна,
+    migrations - все миграции применены.
+    """
+    checks: Dict[str, str] = {}
+    connection: Any = connections[using]
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        checks["database"] = "ok"
+    except Exception as e:
+        checks["database"] = str(e) or type(e).__name__
+        checks["migrations"] = "unknown"
+        return checks
+
+    if not _migrated.get(using):
+        executor = MigrationExecutor(connection)
+        plan: List[Any] = executor.migration_plan(executor.loader.graph.leaf_nodes())
+        if plan:
+            checks["migrations"] = f"не применено миграций: {len(plan)}"
+            return checks
+        _migrated[using] = True
+    checks["migrations"] = "ok"
+    return checks
+
+
+def ready(request: HttpRequest) -> JsonResponse:
+    """Метод для проверки готовности балансировщиком: 200 или 503 со списком проверок"""
+    checks: Dict[str, str] = readiness()
+    ok: bool = all(value == "ok" for value in checks.values())
+    return JsonResponse(
+        {"status": "ready" if ok else "unavailable", "checks": checks},
+        status=200 if ok else 503,
+    )
+
+
+def warm_up() -> Dict[str, str]:
+    """Метод для загрузки при старте того, что иначе загружает первый запрос
+
+    Импортируются url и все представления, классы из настроек DRF и бэкенды
+    кэшей, и проверяется готовность (подключение к БД, миграции). Ошибка проверки не
+    останавливает старт: процесс отвечает 503 на /ready/, пока БД недоступна.
+    При GRAPH_INDEX строится граф связей в памяти.
+    """
+    from rest_framework.settings import api_settings
+
+    get_resolver().url_patterns
+    for name in DRF_SETTINGS:
+        getattr(api_settings, name)
+    for alias in settings.CACHES:
+        caches[alias]
+    checks: Dict[str, str] = readiness()
+    failed: Dict[str, str] = {k: v for k, v in checks.items() if v != "ok"}
+    if failed:
+        logger.warning("Процесс не готов к запросам: %s", failed)
+    elif getattr(settings, "GRAPH_INDEX", False):
+        from books.graph import INDEX
+
+        # При preload_app воркеры, в том числе перезапущенные, получают
+        # готовый граф от мастера и только догоняют БД
+        INDEX.refresh()
+    return checks
+
+
+def prepare_fork() -> None:
+    """Метод для подготовки мастер-процесса gunicorn к fork воркеров (preload_app)
+
+    Подключения к БД закрываются (сокет нельзя делить между процессами), а
+    объекты, созданные при загрузке, замораживаются в сборщике мусора: он не
+    обходит их в воркерах, и страницы памяти остаются общими с мастером.
+    """
+    warm_up()
+    for connection in connections.all(initialized_only=True):
+        connection.close()
+        # Пул psycopg (DB_POOL_MODE=pool) держит потоки, которые не переживут fork
+        close_pool: Any = getattr(connection, "close_pool", None)
+        if close_pool is not None:
+            close_pool()
+    gc.collect()
+    gc.freeze()
@@ -1,23 +1,34 @@
-from django.contrib import admin
+from django.conf import settings
 from django.urls import path, include
-from drf_spectacular.views import (
-    SpectacularAPIView,
-    SpectacularRedocView,
-    SpectacularSwaggerView,
-)
+
+from dev.startup import ready
 
 urlpatterns: list[path] = [
-    path("admin/", admin.site.urls),
     path("", include("books.urls")),
-    path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
-    path(
-        "api/schema/swagger-ui/",
-        SpectacularSwaggerView.as_view(url_name="schema"),
-        name="swagger-ui",
-    ),
-    path(
-        "api/schema/redoc/",
-        SpectacularRedocView.as_view(url_name="schema"),
-        name="redoc",
-    ),
+    path("ready/", ready, name="ready"),
 ]
+
+# Выключенные админка и документация не импортируются при старте
+if settings.ADMIN_ENABLED:
+    from django.contrib import admin
+
+    urlpatterns.append(path("admin/", admin.site.urls))
+
+if settings.API_DOCS_ENABLED:
+    from drf_spectacular.views import SpectacularRedocView, SpectacularSwaggerView
+
+    from books.schema import CachedSchemaView
+
+    urlpatterns += [
+        path("api/schema/", CachedSchemaView.as_view(), name="schema"),
+        path(
+            "api/schema/swagger-ui/",
+            SpectacularSwaggerView.as_view(url_name="schema"),
+            name="swagger-ui",
+        ),
+        path(
+            "api/schema/redoc/",
+            SpectacularRedocView.as_view(url_name="schema"),
+            name="redoc",
+        ),
+    ]
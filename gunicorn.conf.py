@@ -0,0 +1,43 @@
+import multiprocessing
+import os
+
+# По умолчанию WSGI-воркер с потоками: каждый поток держит постоянное
+# подключение к БД (DB_POOL_MODE=persistent). Пул подключений для ASGI
+# требует Django 5.1+, поэтому под uvicorn-воркером (dev/asgi.py)
+# подключение открывается на каждый запрос, если не задан pgbouncer.
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+threads = int(os.getenv("GUNICORN_THREADS", 4))
+wsgi_app = (
+    "dev.asgi:application" if "uvicorn" in worker_class else "dev.wsgi:application"
+)
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+# Настройки Django по числу воркеров решают, включать ли кэш ответов
+os.environ["WEB_CONCURRENCY"] = str(workers)
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", 5))
+
+# Приложение загружается в мастере до fork: воркеры стартуют сразу и делят с
+# ним память импортированного кода (dev/startup.py, prepare_fork)
+preload_app = os.getenv("GUNICORN_PRELOAD", "1") == "1"
+# Воркер перезапускается после max_requests запросов (со случайным разбросом,
+# чтобы не все сразу), и накопленная им память возвращается системе
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 1000))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", 100))
+# Загрузка url, представлений и проверка БД до первого запроса
+warm_up = os.getenv("GUNICORN_WARM_UP", "1") == "1"
+
+
+def when_ready(server):
+    if preload_app and warm_up:
+        from dev.startup import prepare_fork
+
+        prepare_fork()
+
+
+def post_worker_init(worker):
+    if not preload_app and warm_up:
+        from dev.startup import warm_up as warm_up_worker
+
+        warm_up_worker()